@@ -49,6 +49,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',  # Handles user authentication
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'homepage.metrics.MetricsMiddleware',  # Times the homepage views when EUCHRE_METRICS is enabled
+    'homepage.query_budget.QueryBudgetMiddleware',  # Counts queries per request when EUCHRE_QUERY_BUDGET is enabled
 ]
 
 ROOT_URLCONF = 'euchreapp.urls'
@@ -127,4 +129,37 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')  # Add this for production
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-LOGIN_REDIRECT_URL = '/' #redirect to homepage after non admin login
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/' #redirect to homepage after non admin login
+# Sampling (PIMC) bot used for card play in start_euchre_round instead of the BotLogic rules, see homepage/pimc.py
+# TIME_LIMIT is a hard cap in seconds per card, MAX_SAMPLES and MAX_NODES bound the work done before that
+EUCHRE_SAMPLING_BOT = {
+    'ENABLED': False,
+    'MAX_SAMPLES': 32,
+    'MAX_NODES': 200000,
+    'TIME_LIMIT': 0.05,
+    'SEED': 0,
+}
+
+# ISMCTS bot (homepage/ismcts.py) for calling trump and card play, used instead of the sampling bot when enabled
+# Each decision runs ITERATIONS iterations or TIME_LIMIT seconds, whichever runs out first
+EUCHRE_ISMCTS_BOT = {
+    'ENABLED': False,
+    'ITERATIONS': 2000,
+    'TIME_LIMIT': 0.25,
+    'MAX_NODES': 100000,
+    'EXPLORATION': 0.7,
+    'SEED': 0,
+}
+
+# Bot decision, round and view latency metrics (homepage/metrics.py), served at /metrics in the Prometheus text format.
+# Anyone who can reach the site can read them, so only turn this on where /metrics is not public
+EUCHRE_METRICS = {
+    'ENABLED': False,
+}
+
+# Query count and time headers on every response (homepage/query_budget.py). Requests that run more queries than their
+# view's @query_budget are printed, or fail with QueryBudgetExceeded when STRICT is on (the tests turn both on)
+EUCHRE_QUERY_BUDGET = {
+    'ENABLED': False,
+    'STRICT': False,
+}
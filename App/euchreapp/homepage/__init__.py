@@ -0,0 +1,4 @@
+"""
+Euchre app. The bot and simulation modules here import each other package-relatively, so the
+scripts among them are run as modules from App/euchreapp, e.g. python -m homepage.bot_simulations
+"""
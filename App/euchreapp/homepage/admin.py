@@ -34,10 +34,20 @@ class HandAdmin(admin.ModelAdmin):
 # Register the Card model
 @admin.register(Card)
 class CardAdmin(admin.ModelAdmin):
-    list_display = ("id", "rank", "suit", "is_trump")
-    list_filter = ("suit", "is_trump")
+    list_display = ("id", "rank", "suit")
+    list_filter = ("suit",)
     search_fields = ("rank", "suit")
 
+    # The 24 cards are seeded by a migration and shared by every game (see card_registry.py)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 # Register the PlayedCard model
 @admin.register(PlayedCard)
@@ -0,0 +1,600 @@
+"""
+NumPy batch version of MonteCarloSimulation.run_simulation.
+
+Instead of playing one deal at a time with card objects, N deals are held as arrays of card_engine
+hand masks (one 24-bit mask per seat, stored as uint32) and every BotLogic decision is made for all
+N deals at once. The rules mirror BotLogic.determine_trump, get_worst_card, determine_best_card and
+choose_lead_card step for step. Deals are grouped by suit first, so each group works with a single
+trump suit and the suit masks and card orders are plain constants.
+
+When BotLogic has to choose between two cards of the same rank it keeps the one that comes first in
+the hand. The batch version takes the lower card id instead, which is the same card because deal()
+hands out every hand in card id order. Feeding the same decks to run_simulation therefore gives the
+same results deal for deal.
+
+Seats are numbered 0-3 in play order (Bot 1 to Bot 4) and team 1 is seats 0 and 2.
+"""
+import numpy as np
+
+from .bot_logic import BotLogic
+from .card_engine import (
+    ACE, CARD_BIT, EFFECTIVE_SUIT, FULL_DECK, JACK, NO_LEAD, NUM_CARDS, NUM_RANKS, NUM_SUITS,
+    RANK_TABLE, RAW_SUIT_MASK, SUIT_MASK, TRUMP_MASK, make_card, partner_suit
+)
+from .hand_strength import BINOM, HAND_COUNT, HAND_SIZE, NUM_COMPONENTS, use_hand_strength_table
+from .trick_history import HIGHEST_UNSEEN_RANK
+
+
+POSITIONS = ['first', 'second', 'third', 'dealer']
+
+NO_CARD = -1
+
+# Card tables get one extra entry at the end so indexing them with NO_CARD (-1) is harmless:
+# no bit, rank -1 (below every card) and every card ranks above it.
+CARD_BIT_NP = np.array(CARD_BIT + [0], dtype=np.uint32)
+RANK_NP = np.array([[ranks + [-1] for ranks in by_lead] for by_lead in RANK_TABLE], dtype=np.int16)  # [trump, lead, card]
+EFFECTIVE_SUIT_NP = np.array([suits + [0] for suits in EFFECTIVE_SUIT])  # [trump, card]
+SUIT_MASK_NP = np.array(SUIT_MASK, dtype=np.uint32)  # [trump, suit]
+HIGHEST_UNSEEN_NP = np.array([-1 if rank is None else rank for rank in HIGHEST_UNSEEN_RANK])
+
+# ABOVE_MASK_NP[trump, card]: cards that outrank `card` when nothing has been led
+ABOVE_MASK_NP = np.array([
+    [
+        sum(CARD_BIT[other] for other in range(NUM_CARDS) if RANK_TABLE[trump][NO_LEAD][other] > RANK_TABLE[trump][NO_LEAD][card])
+        for card in range(NUM_CARDS)
+    ] + [FULL_DECK]
+    for trump in range(NUM_SUITS)
+], dtype=np.uint32)
+
+NON_ACES = np.uint32(FULL_DECK & ~sum(CARD_BIT[make_card(ACE, suit)] for suit in range(NUM_SUITS)))
+
+
+def _hand_index_table():
+    """
+    table[byte][cards in lower bytes][byte value]: the part of hand_strength.hand_index() that comes from the
+    cards in one byte of a hand mask, so a 5 card hand is indexed with three lookups
+    """
+    table = np.zeros((3, HAND_SIZE + 1, 256), dtype=np.int64)
+    for byte in range(3):
+        for below in range(HAND_SIZE + 1):
+            for value in range(256):
+                cards = [byte * 8 + bit for bit in range(8) if value >> bit & 1]
+                if below + len(cards) <= HAND_SIZE:
+                    table[byte, below, value] = sum(BINOM[card][below + i + 1] for i, card in enumerate(cards))
+    return table
+
+
+HAND_INDEX_NP = _hand_index_table()
+
+
+# Bits set in each byte value, for NumPy before 2.0 which has no np.bitwise_count
+POPCOUNT_NP = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _count(masks):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    masks = np.asarray(masks, dtype=np.uint32)
+    return (POPCOUNT_NP[masks & 0xFF] + POPCOUNT_NP[masks >> 8 & 0xFF]
+            + POPCOUNT_NP[masks >> 16 & 0xFF] + POPCOUNT_NP[masks >> 24])
+
+
+def _has(masks, card):
+    """ True where the mask holds the card (card may be an array containing NO_CARD) """
+    return (masks & CARD_BIT_NP[card]) != 0
+
+
+def _take(choice, condition, cards):
+    """ Fills rows of `choice` that are still undecided and match `condition` """
+    update = condition & (choice == NO_CARD)
+    choice[update] = cards[update]
+
+
+class CardOrder:
+    """
+    Picks the first card of each hand mask in a fixed order of the 24 cards.
+
+    The mask is remapped one byte at a time so that bit i is the i-th card of the order, then the
+    lowest set bit is the card we want. That is a handful of array operations per pick instead of
+    searching a (N, 24) array.
+    """
+    def __init__(self, cards):
+        position = {card: i for i, card in enumerate(cards)}
+        self.byte_table = np.array([
+            [sum(1 << position[byte * 8 + bit] for bit in range(8) if value >> bit & 1) for value in range(256)]
+            for byte in range(3)
+        ], dtype=np.uint32)
+        # The lowest set bit of an empty mask comes out as bit 32
+        self.cards = np.array(list(cards) + [NO_CARD] * (33 - len(cards)))
+
+    def first(self, masks):
+        table = self.byte_table
+        ordered = table[0][masks & 0xFF] | table[1][masks >> 8 & 0xFF] | table[2][masks >> 16]
+        return self.cards[_count((ordered & -ordered) - np.uint32(1))]
+
+
+def _rank_order(trump, highest_first):
+    """
+    Cards by Euchre rank with nothing led, ties between off suit cards of the same rank going to the lower card id
+    """
+    ranks = RANK_TABLE[trump][NO_LEAD]
+    if highest_first:
+        return CardOrder(sorted(range(NUM_CARDS), key=lambda card: (-ranks[card], card)))
+    return CardOrder(sorted(range(NUM_CARDS), key=lambda card: (ranks[card], card)))
+
+
+# Stand-ins for min(cards, key=euchre_rank) and max(cards, key=euchre_rank) in each trump suit.
+# Cards that follow the same suit never tie, so these also work for the lead suit.
+LOWEST = [_rank_order(trump, highest_first=False) for trump in range(NUM_SUITS)]
+HIGHEST = [_rank_order(trump, highest_first=True) for trump in range(NUM_SUITS)]
+
+
+def _by_seat(settings):
+    """
+    Turns one settings dict per seat (TRUMP_THRESHOLDS or STRATEGY_WEIGHTS) into a single dict of the same
+    shape whose values are arrays indexed by seat
+    """
+    if isinstance(settings[0], dict):
+        return {key: _by_seat([seat_settings[key] for seat_settings in settings]) for key in settings[0]}
+    return np.array(settings)
+
+
+class BatchSimulation:
+    def __init__(self, bot=None, bots=None):
+        # Thresholds and weights come from BotLogic instances so tuned variants can be simulated too,
+        # either `bot` in every seat or a list of four `bots` in seat order
+        bots = bots or [bot or BotLogic()] * 4
+        self.thresholds = _by_seat([seat_bot.TRUMP_THRESHOLDS for seat_bot in bots])
+        self.weights = _by_seat([seat_bot.STRATEGY_WEIGHTS for seat_bot in bots])
+
+        table = use_hand_strength_table()
+        self.hand_table = np.frombuffer(table.values, dtype=np.float64).reshape(HAND_COUNT, NUM_SUITS, NUM_COMPONENTS)
+
+    def deal(self, num_deals, rng):
+        """
+        Random decks, one row of 24 card ids per deal. Seat s gets deck[5s:5s+5] (sorted by card id) and deck[20] is the up card.
+        """
+        decks = rng.permuted(np.tile(np.arange(NUM_CARDS), (num_deals, 1)), axis=1)
+        decks[:, :20] = np.sort(decks[:, :20].reshape(num_deals, 4, 5), axis=2).reshape(num_deals, 20)
+        return decks
+
+    def simulate(self, decks, dealer=3):
+        """
+        Plays every deal in `decks` and returns per deal arrays of the outcome
+        """
+        num_deals = len(decks)
+        dealer = np.broadcast_to(np.asarray(dealer), (num_deals,)).copy()
+
+        hands = np.bitwise_or.reduce(CARD_BIT_NP[decks[:, :20].reshape(num_deals, 4, 5)], axis=2)
+        up_card = decks[:, 20]
+        up_suit = up_card // NUM_RANKS
+
+        caller = np.full(num_deals, -1)
+        trump = np.full(num_deals, -1)
+        going_alone = np.zeros(num_deals, dtype=bool)
+        trump_round = np.zeros(num_deals, dtype=np.int64)
+        for suit in range(NUM_SUITS):
+            group = up_suit == suit
+            group_hands = hands[group]
+            caller[group], trump[group], going_alone[group], trump_round[group] = self.decide_trump(
+                group_hands, up_card[group], dealer[group], suit
+            )
+            # Keeps the dealer's pickup
+            hands[group] = group_hands
+
+        team1_tricks = np.zeros(num_deals, dtype=np.int64)
+        team2_tricks = np.zeros(num_deals, dtype=np.int64)
+        for suit in range(NUM_SUITS):
+            group = trump == suit
+            team1_tricks[group], team2_tricks[group] = self.play_tricks(
+                hands[group], suit, caller[group], going_alone[group], dealer[group]
+            )
+
+        team1_points, team2_points = self.evaluate_points(team1_tricks, team2_tricks, caller, going_alone)
+        called = caller >= 0
+
+        return {
+            "caller": caller,
+            "trump": trump,
+            "going_alone": going_alone,
+            "trump_round": trump_round,
+            "team1_tricks": team1_tricks,
+            "team2_tricks": team2_tricks,
+            "team1_points": np.where(called, team1_points, 0),
+            "team2_points": np.where(called, team2_points, 0),
+        }
+
+    def hand_scores(self, hands, trump, seat):
+        """
+        evaluate_hand for 5 card hand masks in one trump suit with the weights of each hand's seat, looked up in the hand strength table
+        """
+        low, middle, high = hands & 0xFF, hands >> 8 & 0xFF, hands >> 16
+        below_middle = _count(low)
+        below_high = below_middle + _count(middle)
+        index = HAND_INDEX_NP[0, 0, low] + HAND_INDEX_NP[1, below_middle, middle] + HAND_INDEX_NP[2, below_high, high]
+
+        # Same order of operations as evaluate_hand so the scores match exactly
+        components = self.hand_table[index, trump]
+        weights = self.weights
+        return (components[:, 0] * weights['trump_cards'][seat] + components[:, 1] * weights['off_aces'][seat]
+                + components[:, 2] * weights['num_suits'][seat])
+
+    def worst_card(self, hands, trump):
+        """
+        BotLogic.get_worst_card for hand masks in one trump suit
+        """
+        non_trump = hands & np.uint32(FULL_DECK & ~TRUMP_MASK[trump])
+
+        # Non trump, non ace cards that are the only one of their printed suit can be thrown to make a void
+        possible_voids = np.zeros_like(hands)
+        for suit in range(NUM_SUITS):
+            suit_cards = non_trump & np.uint32(RAW_SUIT_MASK[suit])
+            possible_voids |= np.where(_count(suit_cards) == 1, suit_cards & NON_ACES, np.uint32(0))
+
+        candidates = np.where(possible_voids != 0, possible_voids, np.where(non_trump != 0, non_trump, hands))
+        return LOWEST[trump].first(candidates)
+
+    def decide_trump(self, hands, up_card, dealer, up_suit):
+        """
+        Both rounds of BotLogic.determine_trump for deals with the up card in `up_suit`, seats deciding in order
+        starting left of the dealer. The dealer's hand in `hands` is updated when they pick up.
+        """
+        num_deals = len(hands)
+        rows = np.arange(num_deals)
+        round1 = self.thresholds['round1']
+        round2 = self.thresholds['round2']
+
+        up_is_jack = up_card % NUM_RANKS == JACK
+        next_suit = partner_suit(up_suit)
+        reverse_suit_1 = 2 if up_suit < 2 else 0
+        reverse_suit_2 = reverse_suit_1 + 1
+
+        caller = np.full(num_deals, -1)
+        trump = np.full(num_deals, -1)
+        going_alone = np.zeros(num_deals, dtype=bool)
+        trump_round = np.zeros(num_deals, dtype=np.int64)
+
+        # Dealer's hand after a hypothetical pickup, needed for their round 1 decision and for the real pickup
+        dealer_hand = hands[rows, dealer] | CARD_BIT_NP[up_card]
+        dealer_hand &= ~CARD_BIT_NP[self.worst_card(dealer_hand, up_suit)]
+
+        # Round 1
+        for position in range(4):
+            seat = (dealer + 1 + position) % 4
+            open_deals = caller < 0
+            thresholds = round1[POSITIONS[position]]
+
+            hand = dealer_hand if position == 3 else hands[rows, seat]
+            hand_score = self.hand_scores(hand, up_suit, seat)
+            normal, loner = thresholds['normal'][seat], thresholds['loner'][seat]
+
+            will_go_alone = hand_score >= loner
+            if position in (0, 2):
+                will_go_alone &= ~up_is_jack
+            decision = hand_score >= normal
+
+            if position == 0:
+                # First seat compares with calling next in round 2 when they would get the first chance
+                next_hand_score = self.hand_scores(hand, next_suit, seat)
+                hand_score_margin = hand_score - normal
+                next_hand_score_margin = next_hand_score - round2['first']['next']['normal'][seat]
+                decision &= ~(next_hand_score_margin > hand_score_margin)
+                will_go_alone &= decision
+
+            calls = open_deals & decision
+            caller[calls] = seat[calls]
+            trump[calls] = up_suit
+            going_alone[calls] = will_go_alone[calls]
+            trump_round[calls] = 1
+
+        # The dealer picks up the up card when it was ordered up
+        picked_up = trump_round == 1
+        hands[picked_up, dealer[picked_up]] = dealer_hand[picked_up]
+
+        # Round 2
+        for position in range(4):
+            seat = (dealer + 1 + position) % 4
+            open_deals = caller < 0
+            if not open_deals.any():
+                break
+            thresholds = round2[POSITIONS[position]]
+            next_normal, next_loner = thresholds['next']['normal'][seat], thresholds['next']['loner'][seat]
+            reverse_normal, reverse_loner = thresholds['reverse']['normal'][seat], thresholds['reverse']['loner'][seat]
+
+            hand = hands[rows, seat]
+            next_suit_score = self.hand_scores(hand, next_suit, seat)
+            reverse_suit_score_1 = self.hand_scores(hand, reverse_suit_1, seat)
+            reverse_suit_score_2 = self.hand_scores(hand, reverse_suit_2, seat)
+
+            next_margin = next_suit_score - next_normal
+            reverse_margin_1 = reverse_suit_score_1 - reverse_normal
+            reverse_margin_2 = reverse_suit_score_2 - reverse_normal
+            next_is_best = (next_margin >= reverse_margin_1) & (next_margin >= reverse_margin_2)
+
+            if position == 3:
+                # Dealer takes the option with the largest margin (first one listed on ties)
+                decision = np.where(next_is_best, next_suit, np.where(reverse_margin_1 >= reverse_margin_2, reverse_suit_1, reverse_suit_2))
+                will_go_alone = np.where(
+                    next_is_best, next_suit_score >= next_loner,
+                    np.where(reverse_margin_1 >= reverse_margin_2, reverse_suit_score_1 >= reverse_loner, reverse_suit_score_2 >= reverse_loner)
+                )
+                calls = open_deals
+            else:
+                should_call_next = next_suit_score >= next_normal
+                should_go_alone_next = next_suit_score >= next_loner
+                should_call_reverse = (reverse_suit_score_1 >= reverse_normal) | (reverse_suit_score_2 >= reverse_normal)
+                should_go_alone_reverse = (reverse_suit_score_1 >= reverse_loner) | (reverse_suit_score_2 >= reverse_loner)
+
+                best_reverse = np.where(reverse_suit_score_1 >= reverse_suit_score_2, reverse_suit_1, reverse_suit_2)
+                choose_next = should_call_next & (~should_call_reverse | next_is_best)
+
+                decision = np.where(choose_next, next_suit, best_reverse)
+                will_go_alone = np.where(choose_next, should_go_alone_next, should_go_alone_reverse)
+                calls = open_deals & (should_call_next | should_call_reverse)
+
+            caller[calls] = seat[calls]
+            trump[calls] = decision[calls]
+            going_alone[calls] = will_go_alone[calls]
+            trump_round[calls] = 2
+
+        return caller, trump, going_alone, trump_round
+
+    def boss_cards(self, seen, trump):
+        """
+        Mask of the cards BotLogic.is_boss_card would call boss cards given the cards already played, and the
+        highest trump remaining (what get_boss_card returns for trump)
+        """
+        trump_cards = np.uint32(TRUMP_MASK[trump])
+        boss = np.zeros_like(seen)
+        highest_trump = None
+
+        for suit in range(NUM_SUITS):
+            suit_seen = seen >> suit * NUM_RANKS & 0x3F
+            partner_jack_seen = seen >> make_card(JACK, partner_suit(suit)) & 1
+
+            # Off suits: highest rank of the printed suit not played yet
+            off_rank = HIGHEST_UNSEEN_NP[suit_seen]
+            off_boss = np.where(off_rank >= 0, suit * NUM_RANKS + off_rank, NO_CARD)
+
+            # Trump: right bower, then left bower, then the rest of the printed suit
+            trump_rank = HIGHEST_UNSEEN_NP[suit_seen | 1 << JACK]
+            trump_boss = np.where(trump_rank >= 0, suit * NUM_RANKS + trump_rank, NO_CARD)
+            trump_boss = np.where(partner_jack_seen == 0, make_card(JACK, partner_suit(suit)), trump_boss)
+            trump_boss = np.where(suit_seen >> JACK & 1 == 0, make_card(JACK, suit), trump_boss)
+
+            # is_boss_card checks a card against the boss of its printed suit, as trump if the card is trump
+            suit_cards = np.uint32(RAW_SUIT_MASK[suit])
+            boss |= CARD_BIT_NP[off_boss] & suit_cards & ~trump_cards
+            boss |= CARD_BIT_NP[trump_boss] & suit_cards & trump_cards
+
+            if suit == trump:
+                highest_trump = trump_boss
+
+        return boss, highest_trump
+
+    def play_tricks(self, hands, trump, caller, going_alone, dealer):
+        """
+        Plays all 5 tricks in one trump suit with BotLogic.determine_best_card rules and returns tricks won by each team
+        """
+        num_deals = len(hands)
+        rows = np.arange(num_deals)
+        trump_cards = np.uint32(TRUMP_MASK[trump])
+        lead_ranks = RANK_NP[trump]
+
+        # The partner of a lone caller sits out
+        sitting_out = np.where(going_alone, (caller + 2) % 4, -1)
+        hands[going_alone, sitting_out[going_alone]] = 0
+        num_players = np.where(going_alone, 3, 4)
+
+        seen = np.zeros(num_deals, dtype=np.uint32)
+        trump_led_before = np.zeros(num_deals, dtype=bool)
+        tricks = np.zeros((num_deals, 2), dtype=np.int64)
+
+        # Left of the dealer leads the first trick, skipping the partner who sits out
+        leader = (dealer + 1) % 4
+        leader = np.where(leader == sitting_out, (leader + 1) % 4, leader)
+
+        for trick_number in range(5):
+            is_boss, highest_trump = self.boss_cards(seen, trump)
+
+            player = leader.copy()
+            trick_cards = np.zeros(num_deals, dtype=np.uint32)
+            winning_card = np.full(num_deals, NO_CARD)
+            winning_player = np.full(num_deals, -1)
+            trump_played = np.zeros(num_deals, dtype=bool)
+
+            for position in range(4):
+                playing = position < num_players
+
+                hand = hands[rows, player]
+                if position == 0:
+                    card = self.choose_lead_card(
+                        hand, trump, is_boss, highest_trump, trump_led_before, player, caller, going_alone, tricks, trick_number
+                    )
+                    lead_suit = EFFECTIVE_SUIT_NP[trump, card]
+                    trump_led_before |= _has(trump_cards, card)
+                else:
+                    card = self.follow_card(
+                        hand, trump, lead_suit, is_boss, player, winning_card, winning_player, trump_played, position
+                    )
+
+                # Play the card
+                card = np.where(playing, card, NO_CARD)
+                hands[rows, player] = hand & ~CARD_BIT_NP[card]
+                trick_cards |= CARD_BIT_NP[card]
+
+                takes_lead = lead_ranks[lead_suit, card] > lead_ranks[lead_suit, winning_card]
+                winning_card = np.where(takes_lead, card, winning_card)
+                winning_player = np.where(takes_lead, player, winning_player)
+                trump_played |= _has(trump_cards, card)
+
+                # Next seat to the left, skipping the partner who sits out
+                next_player = (player + 1) % 4
+                player = np.where(next_player == sitting_out, (next_player + 1) % 4, next_player)
+
+            seen |= trick_cards
+            tricks[rows, winning_player % 2] += 1
+            leader = winning_player
+
+        return tricks[:, 0], tricks[:, 1]
+
+    def choose_lead_card(self, hand, trump, is_boss, highest_trump, trump_was_led_previously,
+                         player, caller, going_alone, tricks, trick_number):
+        """
+        BotLogic.choose_lead_card, conditions are applied in the same order as the if statements there
+        """
+        rows = np.arange(len(hand))
+        choice = np.full(len(hand), NO_CARD)
+        lowest, highest = LOWEST[trump], HIGHEST[trump]
+
+        partner_called_trump = caller == (player + 2) % 4
+        player_called_trump = caller == player
+        opponent_called_trump = ~partner_called_trump & ~player_called_trump
+        player_going_alone = going_alone & player_called_trump
+        secured_point = tricks[rows, player % 2] >= 3
+
+        hand_size = _count(hand)
+        hand_trump = hand & np.uint32(TRUMP_MASK[trump])
+        num_trump = _count(hand_trump)
+        offsuit_cards = hand ^ hand_trump
+        non_trump_boss = offsuit_cards & is_boss
+        has_non_trump_boss = non_trump_boss != 0
+        have_highest_trump = _has(hand, highest_trump)
+
+        highest_trump_card = highest.first(hand_trump)
+        lowest_trump_card = lowest.first(hand_trump)
+
+        # Only card left
+        _take(choice, hand_size == 1, lowest.first(hand))
+
+        # Highest trump and an offsuit boss card, lead the trump then the boss card
+        _take(choice, have_highest_trump & has_non_trump_boss & (
+            player_called_trump | partner_called_trump | (opponent_called_trump & trump_was_led_previously)
+        ), highest_trump_card)
+
+        # Second to last trick with one trump and one offsuit
+        if trick_number == 3:
+            last_two = (hand_size == 2) & (num_trump == 1)
+            _take(choice, last_two & player_going_alone & secured_point, highest_trump_card)
+            _take(choice, last_two, lowest.first(hand))
+
+        # Lead strong if partner called trump
+        _take(choice, partner_called_trump & (num_trump > 0) & (
+            ~trump_was_led_previously | ((num_trump > 1) & has_non_trump_boss)
+        ), highest_trump_card)
+
+        # Player called trump
+        _take(choice, player_called_trump & have_highest_trump, highest_trump_card)
+        _take(choice, player_called_trump & (num_trump > 1) & player_going_alone, highest_trump_card)
+        _take(choice, player_called_trump & (num_trump > 1), lowest_trump_card)
+        _take(choice, player_called_trump & player_going_alone, highest.first(offsuit_cards))
+
+        # Opponents called but the hand is strong
+        strong_defence = opponent_called_trump & has_non_trump_boss & (num_trump >= 3)
+        _take(choice, strong_defence & have_highest_trump, highest_trump_card)
+        _take(choice, strong_defence, lowest_trump_card)
+
+        # Highest offsuit boss card
+        _take(choice, has_non_trump_boss, highest.first(non_trump_boss))
+
+        # Otherwise create a void or lead the lowest card
+        _take(choice, hand_size > 0, self.worst_card(hand, trump))
+        return choice
+
+    def follow_card(self, hand, trump, lead_suit, is_boss, player, winning_card, winning_player, trump_played, position):
+        """
+        The not leading half of BotLogic.determine_best_card
+        """
+        choice = np.full(len(hand), NO_CARD)
+        lowest, highest = LOWEST[trump], HIGHEST[trump]
+        ranks = RANK_NP[trump, NO_LEAD]
+
+        hand_size = _count(hand)
+        hand_trump = hand & np.uint32(TRUMP_MASK[trump])
+        lowest_card = self.worst_card(hand, trump)
+
+        winning_rank = ranks[winning_card]
+        is_partner_winning = winning_player == (player + 2) % 4
+        player_is_last_to_play = position == 3
+        winning_is_boss = _has(is_boss, winning_card)
+
+        # Only card left
+        _take(choice, hand_size == 1, lowest.first(hand))
+
+        # Follow suit
+        lead_suit_cards = hand & SUIT_MASK_NP[trump, lead_suit]
+        has_lead_suit = lead_suit_cards != 0
+        high_lead = highest.first(lead_suit_cards)
+        low_lead = lowest.first(lead_suit_cards)
+        high_lead_wins = ranks[high_lead] > winning_rank
+
+        if player_is_last_to_play:
+            _take(choice, has_lead_suit & is_partner_winning, low_lead)
+        _take(choice, has_lead_suit & is_partner_winning & winning_is_boss, low_lead)
+        _take(choice, has_lead_suit & high_lead_wins, high_lead)
+        _take(choice, has_lead_suit, low_lead)
+
+        # No trump played yet
+        small_trump = lowest.first(hand_trump)
+        can_trump = ~trump_played & (hand_trump != 0)
+        if player_is_last_to_play:
+            _take(choice, can_trump & is_partner_winning, lowest_card)
+        _take(choice, can_trump & is_partner_winning & ~winning_is_boss, small_trump)
+        _take(choice, can_trump & is_partner_winning, lowest_card)
+        _take(choice, can_trump, small_trump)
+        _take(choice, ~trump_played, lowest_card)
+
+        # Trump has been played, overtrump an opponent with the smallest trump that wins
+        _take(choice, is_partner_winning, lowest_card)
+        winning_trump_cards = hand_trump & ABOVE_MASK_NP[trump, winning_card]
+        _take(choice, winning_trump_cards != 0, lowest.first(winning_trump_cards))
+        _take(choice, hand_size > 0, lowest_card)
+        return choice
+
+    def evaluate_points(self, team1_tricks, team2_tricks, caller, going_alone):
+        """
+        MonteCarloSimulation.evaluate_points for arrays of deals
+        """
+        calling_team = np.where(caller % 2 == 0, 1, 2)
+
+        team1_points = np.where(
+            team1_tricks >= 3,
+            np.where(calling_team == 1, np.where(going_alone & (team1_tricks == 5), 4, np.where(team1_tricks < 5, 1, 2)), 2),
+            0
+        )
+        team2_points = np.where(
+            team2_tricks >= 3,
+            np.where(calling_team == 2, np.where(going_alone & (team2_tricks == 5), 4, np.where(team2_tricks < 5, 1, 2)), 2),
+            0
+        )
+        return team1_points, team2_points
+
+    def add_to_counters(self, results, counters, names):
+        """
+        Adds batch results to counters laid out like MonteCarloSimulation.new_counters
+        """
+        caller = results["caller"]
+        going_alone = results["going_alone"]
+        trump_round = results["trump_round"]
+        team1_points = results["team1_points"]
+        team2_points = results["team2_points"]
+
+        for seat, name in enumerate(names):
+            for round_number in (1, 2):
+                calls = (caller == seat) & (trump_round == round_number)
+                counters[f"calls_round{round_number}"][name] += int(calls.sum())
+                counters[f"loner_attempts_round{round_number}"][name] += int((calls & going_alone).sum())
+
+        counters["team1_total_points"] += int(team1_points.sum())
+        counters["team2_total_points"] += int(team2_points.sum())
+
+        for team, points, other_points in ((1, team1_points, team2_points), (2, team2_points, team1_points)):
+            calls = (caller >= 0) & (caller % 2 == team - 1)
+            wins = calls & (points > other_points)
+            counters[f"team{team}_calls"] += int(calls.sum())
+            counters[f"team{team}_wins"] += int(wins.sum())
+            counters[f"team{team}_marches"] += int((wins & (points == 2)).sum())
+            counters[f"team{team}_loner_attempts"] += int((calls & going_alone).sum())
+            counters[f"team{team}_loner_wins"] += int((calls & going_alone & (points == 4)).sum())
+
+        return counters
@@ -0,0 +1,373 @@
+"""
+Micro-benchmarks for the bot hot paths: BotLogic.euchre_rank, evaluate_hand, get_worst_card,
+determine_trump and determine_best_card, and MonteCarloSimulation.play_hand.
+
+Every benchmark runs over a fixed corpus of positions built from its own seeded random.Random.
+Positions come from random deals played out with random legal cards, so the corpora do not
+depend on the bot logic being measured and stay the same from commit to commit. Card play is
+measured separately for leading, following suit, trumping in and going alone positions.
+
+For each benchmark the corpus is run repeatedly for ops/sec, then once more with every call timed
+for the latency percentiles (the timer's own overhead is subtracted). Results can be saved to JSON
+and compared against an earlier run, which fails if any benchmark got slower than the threshold.
+
+    python -m homepage.benchmarks --output before.json
+    python -m homepage.benchmarks --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from .bot_logic import BotLogic
+from .bot_simulations import Card, MonteCarloSimulation, PlayedCard
+from .card_engine import (
+    CARD_BIT, EFFECTIVE_SUIT, NO_LEAD, RANKS, SUIT_INDEX, SUIT_MASK, SUITS, TRUMP_MASK, card_index, hand_mask, legal_cards
+)
+from .hand_strength import get_hand_strength_table, use_hand_strength_table
+from .suit_symmetry import trump_decision_cache
+from .trick_history import TrickHistory
+
+# Positions per corpus
+CORPUS_SIZE = 500
+
+# Minimum seconds of repeated runs for ops/sec
+MIN_TIME = 0.5
+
+# A benchmark whose ops/sec drops by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+CARD_PLAY_CASES = ["leading", "following", "trumping", "loner"]
+
+PERCENTILES = [50, 90, 99]
+
+
+# Position corpora, each a list of argument tuples for its benchmark
+
+def deal(rng, simulation):
+    """
+    Four seated bots, their hands and the up card from a shuffled deck (Bot 4 deals)
+    """
+    deck = simulation.shuffled_deck(rng)
+    players = simulation.create_bots()
+    hands = {player.name: simulation.convert_to_cards(deck[seat * 5:seat * 5 + 5], player) for seat, player in enumerate(players)}
+    rank, suit = deck[20].split(" of ")
+    return players, hands, Card(rank, suit)
+
+
+def random_card(rng):
+    return Card(rng.choice(RANKS), rng.choice(SUITS))
+
+
+def euchre_rank_corpus(rng, size):
+    return [(random_card(rng), rng.choice(SUITS), rng.choice(SUITS + [None])) for _ in range(size)]
+
+
+def hand_corpus(rng, size):
+    """
+    (bot, 5 card hand, trump suit) for evaluate_hand and get_worst_card
+    """
+    simulation = MonteCarloSimulation()
+    corpus = []
+    for _ in range(size):
+        players, hands, _ = deal(rng, simulation)
+        bot = rng.choice(players)
+        corpus.append((bot, hands[bot.name], rng.choice(SUITS)))
+    return corpus
+
+
+def trump_corpus(rng, size):
+    """
+    (bot, hand, dealer, up card, player order, round) from every seat in both rounds
+    """
+    simulation = MonteCarloSimulation()
+    corpus = []
+    for _ in range(size):
+        players, hands, up_card = deal(rng, simulation)
+        bot = rng.choice(players)
+        corpus.append((bot, hands[bot.name], players[3], up_card, players, rng.choice(["1", "2"])))
+    return corpus
+
+
+def play_random_cards(rng, order, hands, trump, count):
+    """
+    First `count` players in order play random legal cards to a new trick
+    """
+    played_cards = []
+    lead = NO_LEAD
+    for bot in order[:count]:
+        hand = hands[bot.name]
+        legal = legal_cards(hand_mask(hand), trump, lead)
+        card = rng.choice([card for card in hand if legal & CARD_BIT[card_index(card)]])
+        hand.remove(card)
+        played_cards.append(PlayedCard(card=card, player=bot))
+        if lead == NO_LEAD:
+            lead = EFFECTIVE_SUIT[trump][card_index(card)]
+    return played_cards
+
+
+def card_play_position(rng, simulation, case):
+    """
+    A position for determine_best_card after a random number of randomly played tricks, or None if the
+    player to act does not fit the case
+    """
+    players, hands, _ = deal(rng, simulation)
+    trump_suit = rng.choice(SUITS)
+    trump = SUIT_INDEX[trump_suit]
+    trump_caller = rng.choice(players)
+    going_alone = case == "loner"
+
+    order = players[:]
+    if going_alone:
+        order.remove(next(player for player in players if player.name == trump_caller.partner))
+    leader = rng.randrange(len(order))
+    order = order[leader:] + order[:leader]
+
+    previous_tricks = TrickHistory(trump_suit)
+    tricks_won = {1: 0, 2: 0}
+    for trick_number in range(1, rng.randrange(5) + 1):
+        played_cards = play_random_cards(rng, order, hands, trump, len(order))
+        previous_tricks[trick_number] = played_cards
+        winner = simulation.evaluate_trick_winner(trump_suit, played_cards)
+        tricks_won[winner.team] += 1
+        winner_index = order.index(winner)
+        order = order[winner_index:] + order[:winner_index]
+
+    if case == "leading":
+        to_play = 0
+    elif case == "loner":
+        to_play = rng.randrange(len(order))
+    else:
+        to_play = rng.randrange(1, len(order))
+    played_cards = play_random_cards(rng, order, hands, trump, to_play)
+    bot = order[to_play]
+    hand = hands[bot.name]
+
+    if case in ("following", "trumping"):
+        lead = EFFECTIVE_SUIT[trump][card_index(played_cards[0].card)]
+        mask = hand_mask(hand)
+        can_follow = mask & SUIT_MASK[trump][lead]
+        if case == "following" and not can_follow:
+            return None
+        if case == "trumping" and (can_follow or not mask & TRUMP_MASK[trump]):
+            return None
+
+    return (bot, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won[bot.team])
+
+
+def card_play_corpus(rng, size, case):
+    simulation = MonteCarloSimulation()
+    corpus = []
+    while len(corpus) < size:
+        position = card_play_position(rng, simulation, case)
+        if position is not None:
+            corpus.append(position)
+    return corpus
+
+
+def play_hand_corpus(rng, size):
+    """
+    (hands, players, trump suit, trump caller, going alone) for whole hands, one in ten played alone
+    """
+    simulation = MonteCarloSimulation()
+    corpus = []
+    for _ in range(size):
+        players, hands, _ = deal(rng, simulation)
+        corpus.append((hands, players, rng.choice(SUITS), rng.choice(players), rng.random() < 0.1))
+    return corpus
+
+
+def copy_hands(args):
+    """ play_hand removes cards from the hands it is given, so every run gets fresh lists """
+    hands, players, trump_suit, trump_caller, going_alone = args
+    return ({name: hand[:] for name, hand in hands.items()}, players, trump_suit, trump_caller, going_alone)
+
+
+def build_benchmarks(seed=0, size=CORPUS_SIZE):
+    """
+    [(name, function, corpus, prepare)] where prepare (or None) makes each call's arguments from a corpus entry
+    """
+    def corpus_rng(name):
+        # One generator per corpus, so adding a benchmark leaves the other corpora unchanged
+        return random.Random(f"{seed}:{name}")
+
+    simulation = MonteCarloSimulation()
+    hands = hand_corpus(corpus_rng("hands"), size)
+    trump_positions = trump_corpus(corpus_rng("determine_trump"), size)
+
+    benchmarks = [
+        ("euchre_rank", BotLogic.euchre_rank, euchre_rank_corpus(corpus_rng("euchre_rank"), size), None),
+        ("evaluate_hand", BotLogic.evaluate_hand, hands, None),
+        ("get_worst_card", BotLogic.get_worst_card, hands, None),
+        # As the bots call it, through the shared trump decision cache (cleared before the benchmark)
+        ("determine_trump", BotLogic.determine_trump, trump_positions, None),
+        # The decision itself, without the cache
+        ("decide_trump", BotLogic.decide_trump, trump_positions, None),
+    ]
+    for case in CARD_PLAY_CASES:
+        corpus = card_play_corpus(corpus_rng(f"determine_best_card:{case}"), size, case)
+        benchmarks.append((f"determine_best_card:{case}", BotLogic.determine_best_card, corpus, None))
+    benchmarks.append(("play_hand", simulation.play_hand, play_hand_corpus(corpus_rng("play_hand"), size), copy_hands))
+
+    return benchmarks
+
+
+# Measurement
+
+def timer_overhead():
+    """ Median nanoseconds for an empty pair of perf_counter_ns calls """
+    samples = []
+    for _ in range(10000):
+        start = time.perf_counter_ns()
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def percentile(sorted_values, percent):
+    """ Nearest rank percentile of an already sorted list """
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(function, corpus, prepare=None, min_time=MIN_TIME, overhead=0):
+    """
+    Ops/sec over repeated runs of the corpus and latency percentiles (microseconds) from one timed run
+    """
+    def arguments():
+        return [prepare(args) for args in corpus] if prepare else corpus
+
+    # Warm up caches and the hand strength table pages
+    for args in arguments():
+        function(*args)
+
+    ops, elapsed = 0, 0.0
+    while elapsed < min_time:
+        runs = arguments()
+        start = time.perf_counter()
+        for args in runs:
+            function(*args)
+        elapsed += time.perf_counter() - start
+        ops += len(runs)
+
+    latencies = []
+    for args in arguments():
+        start = time.perf_counter_ns()
+        function(*args)
+        latencies.append(max(0, time.perf_counter_ns() - start - overhead))
+    latencies.sort()
+
+    result = {"ops": ops, "ops_per_sec": ops / elapsed, "mean_us": sum(latencies) / len(latencies) / 1000}
+    for percent in PERCENTILES:
+        result[f"p{percent}_us"] = percentile(latencies, percent) / 1000
+    return result
+
+
+def run_benchmarks(seed=0, size=CORPUS_SIZE, min_time=MIN_TIME, only=None):
+    """
+    Runs every benchmark (or those named in `only`) and returns the results with details of the run
+    """
+    overhead = timer_overhead()
+    results = {}
+    for name, function, corpus, prepare in build_benchmarks(seed, size):
+        if only and name not in only:
+            continue
+        if name == "determine_trump":
+            trump_decision_cache.clear()
+        results[name] = run_benchmark(function, corpus, prepare, min_time, overhead)
+        if name == "determine_trump":
+            results[name]["cache_hit_rate"] = trump_decision_cache.hit_rate()
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "corpus_size": size,
+        "hand_strength_table": get_hand_strength_table() is not None,
+        "timer_overhead_ns": overhead,
+        "results": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Reporting
+
+def print_results(run):
+    print(f"Benchmarks at {run['commit']} (Python {run['python']}, {run['corpus_size']} positions per corpus, "
+          f"hand strength table {'loaded' if run['hand_strength_table'] else 'not loaded'}):")
+    print(f"{'Benchmark':<32} {'ops/sec':>12} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9}")
+    for name, result in run["results"].items():
+        print(f"{name:<32} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>9.2f} {result['p90_us']:>9.2f} {result['p99_us']:>9.2f}")
+
+
+def compare_results(run, previous, threshold=REGRESSION_THRESHOLD):
+    """
+    Prints the change in ops/sec for every benchmark in both runs and returns the names of those that slowed
+    down by more than the threshold
+    """
+    print(f"Compared with {previous.get('commit')}:")
+    regressions = []
+    for name, result in run["results"].items():
+        if name not in previous["results"]:
+            continue
+        change = result["ops_per_sec"] / previous["results"][name]["ops_per_sec"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def save_results(run, path):
+    with open(path, "w") as file:
+        json.dump(run, file, indent=2)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the bot hot paths")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="ops/sec drop counted as a regression")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=CORPUS_SIZE, help="positions per corpus")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds of repeated runs per benchmark")
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    args = parser.parse_args(argv)
+
+    use_hand_strength_table()
+    run = run_benchmarks(args.seed, args.size, args.min_time, args.only)
+    print_results(run)
+
+    if args.output:
+        save_results(run, args.output)
+
+    if args.compare:
+        previous = load_results(args.compare)
+        if (previous["seed"], previous["corpus_size"]) != (run["seed"], run["corpus_size"]):
+            print("Warning: the runs used different corpora (seed or size), so the comparison is rough")
+        if compare_results(run, previous, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
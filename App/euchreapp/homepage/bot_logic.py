@@ -1,3 +1,11 @@
+from math import fsum
+
+from .card_engine import ACE, CARD_BIT, CARD_IDS, CARD_RANK, CARD_SUIT, EFFECTIVE_SUIT, LEAD_INDEX, LEFT_BOWER, NO_LEAD, RANK_TABLE, RIGHT_BOWER, SUIT_INDEX, SUITS, TRUMP_MASK
+from .hand_strength import get_hand_strength_table
+from .suit_symmetry import canonical_key, decode_decision, encode_decision, trump_decision_cache
+from .trick_history import TrickHistory
+
+
 class BotLogic:    
     SUIT_PAIRS = {
         'hearts': 'diamonds',
@@ -6,20 +14,115 @@ class BotLogic:
         'spades': 'clubs'
     }
 
+    # Thresholds for both rounds of trump selection, compared against evaluate_hand scores
+    TRUMP_THRESHOLDS = {
+        'round1': {
+            'first': {
+                'normal': 0.33,
+                'loner': 0.51
+            },
+            'second': {
+                'normal': 0.225,
+                'loner': 0.451
+            },
+            'third': {
+                'normal': 0.355,
+                'loner': 0.525
+            },
+            'dealer': {
+                'normal': 0.26,
+                'loner': 0.47
+            }
+        },
+        'round2': {
+            'first': {
+                'next': {
+                    'normal': 0.2,
+                    'loner': 0.45
+                },
+                'reverse': {
+                    'normal': 0.315,
+                    'loner': 0.48
+                }
+            },
+            'second': {
+                'next': {
+                    'normal': 0.315,
+                    'loner': 0.48
+                },
+                'reverse': {
+                    'normal': 0.2,
+                    'loner': 0.45
+                }
+            },
+            'third': {
+                'next': {
+                    'normal': 0.23,
+                    'loner': 0.465
+                },
+                'reverse': {
+                    'normal': 0.305,
+                    'loner': 0.485
+                }
+            },
+            'dealer': {
+                'next': {
+                    'normal': 0.35,
+                    'loner': 0.46
+                },
+                'reverse': {
+                    'normal': 0.3,
+                    'loner': 0.45
+                }
+            }
+        }
+    }
+
+    # Weights of each part of the evaluate_hand score
+    STRATEGY_WEIGHTS = {
+        'trump_cards': 0.7,
+        'off_aces': 0.2,
+        'num_suits': 0.1
+        # 'seat_position': 0.2
+    }
+
     @staticmethod
     def euchre_rank(card, trump_suit, lead_suit=None):
-        """ Assigns rank values based on Euchre hierarchy. """
-        if card.is_right_bower(trump_suit):
-            return 25  # Right Bower (Highest)
-        elif card.is_left_bower(trump_suit):
-            return 24  # Left Bower
-        if card.suit == trump_suit:
-            return 15 + ["9", "10", "Q", "K", "A"].index(card.rank)
-        if card.suit == lead_suit:
-            return 6 + ["9", "10", "J", "Q", "K", "A"].index(card.rank)
-        return ["9", "10", "J", "Q", "K", "A"].index(card.rank)
+        """ Assigns rank values based on Euchre hierarchy (precomputed in card_engine.RANK_TABLE). """
+        # Right Bower 25, Left Bower 24, other trump 15-19, lead suit 6-11, everything else 0-5
+        return RANK_TABLE[SUIT_INDEX[trump_suit]][LEAD_INDEX[lead_suit]][CARD_IDS[card.rank, card.suit]]
 
     def determine_trump(self, hand, dealer, up_card, player_order, trump_round):
+        """
+        Determines the trump suit, looking the decision up in the shared cache when the bot uses the default
+        thresholds and weights (decisions that only differ by suit labels share an entry, see suit_symmetry.py)
+        """
+        if (not trump_decision_cache.maxsize or trump_round not in ("1", "2")
+                or self.TRUMP_THRESHOLDS is not BotLogic.TRUMP_THRESHOLDS or self.STRATEGY_WEIGHTS is not BotLogic.STRATEGY_WEIGHTS):
+            return self.decide_trump(hand, dealer, up_card, player_order, trump_round)
+
+        up_card_id = CARD_IDS[up_card.rank, up_card.suit]
+        if trump_round == "1" and self.name == dealer.name:
+            # The dealer's decision only depends on the hand they keep after picking up and discarding
+            cards = list(hand) + [up_card]
+            cards.remove(self.get_worst_card(cards, up_card.suit))
+        else:
+            cards = hand
+
+        mask = 0
+        for card in cards:
+            mask |= CARD_BIT[CARD_IDS[card.rank, card.suit]]
+        key, suit_map = canonical_key(mask, up_card_id, self.get_seat_position(player_order), trump_round)
+
+        value = trump_decision_cache.get(key)
+        if value is None:
+            decision, will_go_alone = self.decide_trump(hand, dealer, up_card, player_order, trump_round)
+            trump_decision_cache.put(key, encode_decision(decision, will_go_alone, suit_map))
+            return decision, will_go_alone
+
+        return decode_decision(value, SUIT_INDEX[up_card.suit])
+
+    def decide_trump(self, hand, dealer, up_card, player_order, trump_round):
         """
         Determines the trump suit by scoring their hand and comparing it to the thresholds for their position
         """
@@ -28,69 +131,7 @@ class BotLogic:
         trump_suit = up_card.suit
         position = self.get_seat_position(player_order)
 
-        # Thresholds for both rounds of trump selection
-        thresholds = {
-            'round1': {
-                'first': {
-                    'normal': 0.33,
-                    'loner': 0.51
-                },
-                'second': {
-                    'normal': 0.225,
-                    'loner': 0.451
-                },
-                'third': {
-                    'normal': 0.355,
-                    'loner': 0.525
-                },
-                'dealer': {
-                    'normal': 0.26,
-                    'loner': 0.47
-                }
-            },
-            'round2': {
-                'first': {
-                    'next': {
-                        'normal': 0.2,
-                        'loner': 0.45
-                    },
-                    'reverse': {
-                        'normal': 0.315,
-                        'loner': 0.48
-                    }
-                },
-                'second': {
-                    'next': {
-                        'normal': 0.315,
-                        'loner': 0.48
-                    },
-                    'reverse': {
-                        'normal': 0.2,
-                        'loner': 0.45
-                    }
-                },
-                'third': {
-                    'next': {
-                        'normal': 0.23,
-                        'loner': 0.465
-                    },
-                    'reverse': {
-                        'normal': 0.305,
-                        'loner': 0.485
-                    }
-                },
-                'dealer': {
-                    'next': {
-                        'normal': 0.35,
-                        'loner': 0.46
-                    },
-                    'reverse': {
-                        'normal': 0.3,
-                        'loner': 0.45
-                    }
-                }
-            }
-        }
+        thresholds = self.TRUMP_THRESHOLDS
 
         if trump_round == "1":
             # If you are dealer, in the first round, your hand should contain the up card and discard a card
@@ -201,30 +242,32 @@ class BotLogic:
         """
         Evaluates the strength of the hand based on the trump suit, aces, and suit voids, multiplying each by the strategy weights
         """
-        strategy_weights = {
-            'trump_cards': 0.7,
-            'off_aces': 0.2,
-            'num_suits': 0.1
-            # 'seat_position': 0.2
-        }
+        strategy_weights = self.STRATEGY_WEIGHTS
         
         score = 0
 
+        # Look the hand up in the precomputed table when one is loaded (see hand_strength.py)
+        table = get_hand_strength_table()
+        if table is not None and len(hand) == 5:
+            trump_strength, aces_strength, voids_strength = table.components(hand, trump_suit)
+        else:
+            trump_strength = self.evaluate_trump(hand, trump_suit)
+            aces_strength = self.evaluate_aces(hand, trump_suit)
+            voids_strength = self.evaluate_voids(hand, trump_suit)
+
         # Evaluate strength of trump cards
-        trump_strength = self.evaluate_trump(hand, trump_suit)
         score += trump_strength * strategy_weights['trump_cards']
 
         # Evaluate strength of Aces
-        aces_strength = self.evaluate_aces(hand, trump_suit)
         score += aces_strength * strategy_weights['off_aces']
 
-
         # Evaluate suit voids
-        voids_strength = self.evaluate_voids(hand, trump_suit)
         score += voids_strength * strategy_weights['num_suits']
 
         return score
 
+    # evaluate_trump, evaluate_aces and evaluate_voids are precomputed by hand_strength.py, bump its
+    # SCORING_VERSION when changing them
     def evaluate_trump(self, hand, trump_suit):
         """
         Evaluates the strength of the trump cards in the hand by adding their values together and normalizing to 0-1
@@ -232,22 +275,27 @@ class BotLogic:
         # TODO: King could be a boss card (basically an Ace) if an ace was the up card and turned down, so should be evaluated differently (Same with Jacks if a bower was turned down the JA are top two, not JJ)
 
         trump_cards = self.get_trump_cards(hand, trump_suit)
+        trump = SUIT_INDEX[trump_suit]
 
         trump_ranks = {"right": 1.0, "left": 0.9, "A": 0.8, "K": 0.7, "Q": 0.6, "10": 0.575, "9": 0.55}
 
-        trump_score = 0
+        trump_values = []
         has_right_bower = False
         has_left_bower = False
 
         for card in trump_cards:
-            if card.is_right_bower(trump_suit):
-                trump_score += trump_ranks["right"]
+            card_id = CARD_IDS[card.rank, card.suit]
+            if card_id == RIGHT_BOWER[trump]:
+                trump_values.append(trump_ranks["right"])
                 has_right_bower = True
-            elif card.is_left_bower(trump_suit):
-                trump_score += trump_ranks["left"]
+            elif card_id == LEFT_BOWER[trump]:
+                trump_values.append(trump_ranks["left"])
                 has_left_bower = True
-            elif card.suit == trump_suit:
-                trump_score += trump_ranks[card.rank]
+            else:
+                trump_values.append(trump_ranks[card.rank])
+
+        # fsum is exactly rounded, so the score does not depend on the order of the cards in the hand
+        trump_score = fsum(trump_values)
 
         multiplier = 1.0
         num_trump = len(trump_cards)
@@ -274,11 +322,11 @@ class BotLogic:
         """
         # TODO: Add evaluation for doubletons (Kx, Qx) as those should be evaluated differently (could become sorta like aces)
         # TODO: King could be a boss card (basically an Ace) if an ace was the up card and turned down
-        aces_sum = 0
+        ace_values = []
         num_aces = 0
 
         trump_cards = self.get_trump_cards(hand, trump_suit)
-        non_trump_cards = [card for card in hand if card not in trump_cards]
+        non_trump_cards = self.get_non_trump_cards(hand, trump_suit)
 
         suit_counts = {}
         for card in non_trump_cards:
@@ -300,7 +348,7 @@ class BotLogic:
                 else:
                     multiplier = 0.5
 
-                aces_sum += base_score * multiplier
+                ace_values.append(base_score * multiplier)
 
         # Aces are more valuable if you have a lot of trump
         bonus = 1.0
@@ -310,7 +358,7 @@ class BotLogic:
             if num_non_trump_suits == 1:
                 bonus += 0.1
 
-        aces_sum *= bonus
+        aces_sum = fsum(ace_values) * bonus
 
         max_possible_score = 2.9
         return min(1, aces_sum / max_possible_score) # Normalize value to 0-1 
@@ -326,7 +374,7 @@ class BotLogic:
             # Voids are not valuable if you have no trump cards
             return 0
 
-        non_trump_cards = [card for card in hand if card not in trump_cards]
+        non_trump_cards = self.get_non_trump_cards(hand, trump_suit)
         non_trump_suits = set(card.suit for card in non_trump_cards)
         num_non_trump_suits = len(non_trump_suits)
 
@@ -365,6 +413,9 @@ class BotLogic:
         if len(hand) == 1:
             return hand[0]
 
+        # Fold the previous tricks into bitmasks once, callers that keep a TrickHistory skip this
+        previous_tricks = TrickHistory.of(previous_tricks, trump_suit)
+
         partner_called_trump = trump_caller.name == self.partner
         player_called_trump = trump_caller.name == self.name
         opponent_called_trump = not partner_called_trump and not player_called_trump # TODO: It can be useful to know which opponent called trump specifically as that can change the card to play
@@ -375,11 +426,10 @@ class BotLogic:
             # Decide what card to lead
             return self.choose_lead_card(hand, trump_suit, previous_tricks, partner_called_trump, player_called_trump, opponent_called_trump, player_going_alone, tricks_won)
         
-        # Not leading, so get suit that was lead
-        if played_cards[0].card.is_left_bower(trump_suit):
-            lead_suit = played_cards[0].card.next_suit()
-        else:
-            lead_suit = played_cards[0].card.suit
+        # Not leading, so get suit that was lead (the left bower leads trump)
+        trump = SUIT_INDEX[trump_suit]
+        lead_card = played_cards[0].card
+        lead_suit = SUITS[EFFECTIVE_SUIT[trump][CARD_IDS[lead_card.rank, lead_card.suit]]]
 
         # Find winner of current trick
         winning_played_card = max(played_cards, key=lambda x: BotLogic.euchre_rank(x.card, trump_suit, lead_suit))
@@ -394,7 +444,7 @@ class BotLogic:
         if lead_suit == trump_suit:
             lead_suit_cards = trump_cards
         else:
-            lead_suit_cards = [card for card in hand if card.suit == lead_suit and not card.is_left_bower(trump_suit)]
+            lead_suit_cards = [card for card in hand if card.suit == lead_suit and CARD_IDS[card.rank, card.suit] != LEFT_BOWER[trump]]
 
         # Get lowest card in hand
         lowest_card = self.get_worst_card(hand, trump_suit)
@@ -463,10 +513,10 @@ class BotLogic:
 
         # Get all cards that are the highest card in the suit remaining
         boss_cards = self.get_boss_cards_in_hand(hand, previous_tricks, trump_suit)
-        non_trump_boss = [card for card in boss_cards if card.suit != trump_suit and not card.is_left_bower(trump_suit)]
-        offsuit_cards = [card for card in hand if card.suit != trump_suit and not card.is_left_bower(trump_suit)]
+        non_trump_boss = self.get_non_trump_cards(boss_cards, trump_suit)
+        offsuit_cards = self.get_non_trump_cards(hand, trump_suit)
         have_highest_trump = self.has_boss_card(hand, trump_suit, previous_tricks, trump_suit)
-        trump_was_led_previously = any((trick_cards[0].card.suit == trump_suit or trick_cards[0].card.is_left_bower(trump_suit)) for trick_cards in previous_tricks.values())
+        trump_was_led_previously = TrickHistory.of(previous_tricks, trump_suit).trump_led(trump_suit)
         secured_point = tricks_won >= 3
 
         # If you have highest trump card and a offsuit boss card, lead the trump then the boss card
@@ -527,36 +577,15 @@ class BotLogic:
         """
         Determines the highest card of the highest rank remaining in the suit
         """
-        card_ranks = ["A", "K", "Q", "J", "10", "9"]
-
-        if is_trump:
-            all_previous_cards = [card for trick in previous_tricks.values() for card in trick]
-            # Deal with bowers
-            if not any(played_card.card.is_right_bower(suit) for played_card in all_previous_cards):
-                return "J", suit
-            elif not any(played_card.card.is_left_bower(suit) for played_card in all_previous_cards):
-                return "J", BotLogic.SUIT_PAIRS[suit] # Get left bower suit
-
-            # Both bowers have been played already    
-            card_ranks.remove("J")
-
-        # Get all previous cards of the relevant suit
-        relevant_previous_cards = [card for trick_cards in previous_tricks.values() for card in trick_cards if card.card.suit == suit]
-
-        for card in relevant_previous_cards:
-            if card.card.rank in card_ranks:
-                card_ranks.remove(card.card.rank)
-
-        if card_ranks == []:
-            return None, None
-
-        return card_ranks[0], suit
+        # The trick history keeps played cards as bitmasks, so this is a couple of table lookups
+        return TrickHistory.of(previous_tricks).boss_card(suit, is_trump)
         
     def is_boss_card(self, card, previous_cards, trump_suit):
         """
         Determines if a card is the highest card of the highest rank remaining in the suit
         """
-        highest_card_rank, highest_card_suit = self.get_boss_card(card.suit, previous_cards, (card.suit == trump_suit or card.is_left_bower(trump_suit)))
+        is_trump = bool(TRUMP_MASK[SUIT_INDEX[trump_suit]] & CARD_BIT[CARD_IDS[card.rank, card.suit]])
+        highest_card_rank, highest_card_suit = self.get_boss_card(card.suit, previous_cards, is_trump)
 
         return card.rank == highest_card_rank and card.suit == highest_card_suit
 
@@ -572,36 +601,42 @@ class BotLogic:
         return any(card.rank == highest_card_rank and card.suit == highest_card_suit for card in hand)
                 
     def get_trump_cards(self, hand, trump_suit):
-        return [card for card in hand if card.suit == trump_suit or card.is_left_bower(trump_suit)]
+        trump_mask = TRUMP_MASK[SUIT_INDEX[trump_suit]]
+        return [card for card in hand if trump_mask & CARD_BIT[CARD_IDS[card.rank, card.suit]]]
+
+    def get_non_trump_cards(self, hand, trump_suit):
+        trump_mask = TRUMP_MASK[SUIT_INDEX[trump_suit]]
+        return [card for card in hand if not trump_mask & CARD_BIT[CARD_IDS[card.rank, card.suit]]]
 
     def get_worst_card(self, hand, trump_suit):
         """
         Choose a card to discard based on creating a suit void if possible
         """
-        trump_cards = self.get_trump_cards(hand, trump_suit)
-        non_trump_cards = [card for card in hand if card not in trump_cards]
+        trump = SUIT_INDEX[trump_suit]
+        ranks = RANK_TABLE[trump][NO_LEAD]
+        card_ids = [CARD_IDS[card.rank, card.suit] for card in hand]
+
+        # Positions in the hand are compared so ties keep going to the first card in hand order
+        non_trump_cards = [i for i, card_id in enumerate(card_ids) if not TRUMP_MASK[trump] & CARD_BIT[card_id]]
 
         if not non_trump_cards:
             # Hand is all trump cards, so discard lowest trump card
-            return min(trump_cards, key=lambda x: BotLogic.euchre_rank(x, trump_suit))
-        
+            return hand[min(range(len(hand)), key=lambda i: ranks[card_ids[i]])]
+
         # Find a possible void
-        suit_counts = {}
-        for card in non_trump_cards:
-            suit = card.suit
-            if suit not in suit_counts:
-                suit_counts[suit] = []
-            suit_counts[suit].append(card)
+        suit_counts = [0, 0, 0, 0]
+        for i in non_trump_cards:
+            suit_counts[CARD_SUIT[card_ids[i]]] += 1
 
         # Find any suits with only one card (not Aces)
         possible_voids = [
-            cards[0] for suit, cards in suit_counts.items()
-            if len(cards) == 1 and cards[0].rank != "A"
+            i for i in non_trump_cards
+            if suit_counts[CARD_SUIT[card_ids[i]]] == 1 and CARD_RANK[card_ids[i]] != ACE
         ]
 
         if possible_voids:
             # Choose the lowest card of the possible voids
-            return min(possible_voids, key=lambda x: BotLogic.euchre_rank(x, trump_suit))
-        
+            return hand[min(possible_voids, key=lambda i: ranks[card_ids[i]])]
+
         # If no possible voids, discard lowest non-trump card
-        return min(non_trump_cards, key=lambda x: BotLogic.euchre_rank(x, trump_suit))
\ No newline at end of file
+        return hand[min(non_trump_cards, key=lambda i: ranks[card_ids[i]])]
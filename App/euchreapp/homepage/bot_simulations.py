@@ -1,11 +1,70 @@
-from bot_logic import BotLogic
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .bot_logic import BotLogic
+from .card_engine import CARD_IDS, SUIT_INDEX, card_from_name
+from .hand_log import HandLogWriter, pack_record
+from .hand_strength import use_hand_strength_table
+from .scoring import round_points
+from .simulation_stats import RunningStat, SimulationStats
+from .suit_symmetry import trump_decision_cache
+from .trick_history import TrickHistory
 
 class Bot(BotLogic):
-    def __init__(self, name, partner, team):
+    def __init__(self, name, partner, team, strategy=None):
         self.name = name
         self.partner = partner
         self.team = team
 
+        # Decisions go to the strategy if there is one (see strategies.py), otherwise to the BotLogic rules
+        self.strategy = strategy
+        if strategy is not None:
+            strategy.seat(self)
+
+        # Everyone playing the current hand in play order and the up card (card, dealer, picked up), set by
+        # play_hand for the strategy's choose_card
+        self.in_hand = []
+        self.up_card = (None, None, False)
+
+        # Time spent in the strategy and how many decisions it made, to weigh a strategy against its CPU cost
+        self.think_time = 0.0
+        self.decisions = 0
+
+    def determine_trump(self, hand, dealer, up_card, player_order, trump_round):
+        if self.strategy is None:
+            return BotLogic.determine_trump(self, hand, dealer, up_card, player_order, trump_round)
+        start = time.perf_counter()
+        decision = self.strategy.choose_trump(self, hand, dealer, up_card, player_order, trump_round)
+        self.add_think_time(start)
+        return decision
+
+    def discard(self, hand, trump_suit):
+        """
+        Card the dealer discards after picking up the up card
+        """
+        if self.strategy is None:
+            return self.get_worst_card(hand, trump_suit)
+        start = time.perf_counter()
+        card = self.strategy.choose_discard(self, hand, trump_suit)
+        self.add_think_time(start)
+        return card
+
+    def determine_best_card(self, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won):
+        if self.strategy is None:
+            return BotLogic.determine_best_card(self, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+        start = time.perf_counter()
+        card = self.strategy.choose_card(
+            self, self.in_hand, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won, *self.up_card
+        )
+        self.add_think_time(start)
+        return card
+
+    def add_think_time(self, start):
+        self.think_time += time.perf_counter() - start
+        self.decisions += 1
+
     def __str__(self):
         return self.name
 
@@ -49,140 +108,395 @@ class PlayedCard():
         return f"{self.player.name} played {self.card.rank} of {self.card.suit}"
     
 class MonteCarloSimulation():
-    def run_simulation(self, num_simulations=1000):
+    # HandLogWriter every simulated hand is recorded to (see hand_log.py), None to keep nothing
+    hand_log = None
+
+    def run_simulation(self, num_simulations=1000, seed=None, hand_log=None):
+        """
+        Runs a simulation to determine the call percentage for each seat position in order to tweak thresholds and strategy weights.
+        Every hand is also appended to hand_log if one is given.
         """
-        Runs a simulation to determine the call percentage for each seat position in order to tweak thresholds and strategy weights
+        use_hand_strength_table()
+        players = self.create_bots()
+        counters = self.new_counters(players)
+        stats = SimulationStats(counters)
+
+        # Without a seed the shared random module is used, as before
+        rng = random if seed is None else random.Random(seed)
+        self.hand_log = hand_log
+        try:
+            self.simulate_deals(num_simulations, players, counters, rng, stats)
+        finally:
+            self.hand_log = None
+
+        self.print_results(counters, num_simulations)
+        return stats.result()
+
+    def run_until_precise(self, target_half_width=0.01, metrics=None, batch_size=1000, max_simulations=1000000, seed=None,
+                          min_trials=100, exclude=()):
         """
-        import random
+        Simulates batch_size deals at a time until every tracked metric's 95% confidence interval half-width is at
+        most target_half_width with at least min_trials samples, or max_simulations deals have been played. Metrics
+        named in exclude (e.g. "loner_success_rate") are not waited for. See simulation_stats.py for the metric
+        names and SimulationStats.is_precise for the targets. Returns a SimulationResult without printing anything,
+        its converged is False if max_simulations ran out first.
+        """
+        use_hand_strength_table()
+        players = self.create_bots()
+        counters = self.new_counters(players)
+        stats = SimulationStats(counters)
+        rng = random if seed is None else random.Random(seed)
+
+        converged = False
+        while stats.num_deals < max_simulations:
+            self.simulate_deals(min(batch_size, max_simulations - stats.num_deals), players, counters, rng, stats)
+            if stats.is_precise(target_half_width, metrics, min_trials=min_trials, exclude=exclude):
+                converged = True
+                break
+
+        return stats.result(converged)
+
+    def run_parallel_simulation(self, num_simulations=1000000, workers=None, seed=0, hand_log=None):
+        """
+        run_simulation split into one shard per worker process. Each shard shuffles with its own random.Random
+        seeded from the master seed and the shard number, and the counters are merged in shard order, so the
+        results only depend on num_simulations, workers and seed. With a hand_log, each shard logs to a file
+        of its own next to it and the shard logs are appended to hand_log in shard order.
+        """
+        workers = workers or os.cpu_count()
 
-        bot1 = Bot("Bot 1", partner="Bot 3", team=1)
-        bot2 = Bot("Bot 2", partner="Bot 4", team=2)
-        bot3 = Bot("Bot 3", partner="Bot 1", team=1)
-        bot4 = Bot("Bot 4", partner="Bot 2", team=2) # always dealer
+        # Built here if missing, before the workers need it
+        use_hand_strength_table()
 
-        players = [bot1, bot2, bot3, bot4]
+        # Spread the deals as evenly as possible, the first shards get one extra deal
+        shard_sizes = [num_simulations // workers + (1 if shard < num_simulations % workers else 0) for shard in range(workers)]
+        shard_seeds = [f"{seed}:{shard}" for shard in range(workers)]
+        shard_logs = [f"{hand_log.path}.shard{shard}" if hand_log else None for shard in range(workers)]
 
-        # Track number of calls for each player
-        calls_round1 = {player.name: 0 for player in players}
-        calls_round2 = {player.name: 0 for player in players}
+        counters = self.new_counters(self.create_bots())
+        stats = SimulationStats(counters)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard_counters, shard_stats, shard_log in executor.map(simulate_shard, shard_sizes, shard_seeds, shard_logs):
+                self.merge_counters(counters, shard_counters)
+                stats.merge(shard_stats)
+                if shard_log:
+                    hand_log.write_from(shard_log)
 
-        # Track number of wins for each team
-        team1_wins = 0
-        team2_wins = 0
+        self.print_results(counters, num_simulations)
+        return stats.result()
 
-        # Track number of calls for each team
-        team1_calls = 0
-        team2_calls = 0
+    def simulate_deals(self, num_simulations, players, counters, rng, stats=None):
+        """
+        Shuffles and plays num_simulations deals with the given random number generator, adding each deal's points to stats
+        """
+        for _ in range(num_simulations):
+            points = self.simulate_deal(self.shuffled_deck(rng), players, counters)
+            if stats is not None and points is not None:
+                stats.add_deal(*points)
 
-        # Track number of times each team marches
-        team1_marches = 0
-        team2_marches = 0
+        return counters
 
-        # Track total points for each team
-        team1_total_points = 0
-        team2_total_points = 0
+    def shuffled_deck(self, rng):
+        """
+        A new deck of "rank of suit" strings shuffled with rng
+        """
+        suits = ["hearts", "diamonds", "clubs", "spades"]
+        ranks = ["A", "K", "Q", "J", "10", "9"]
+        deck = [f"{rank} of {suit}" for rank in ranks for suit in suits]
+        rng.shuffle(deck)
+        return deck
 
-        # Track loner attempts
-        loner_attempts_round1 = {player.name: 0 for player in players}
-        loner_attempts_round2 = {player.name: 0 for player in players}
-        team1_loner_attempts = 0
-        team2_loner_attempts = 0
-        team1_loner_wins = 0
-        team2_loner_wins = 0
+    def run_batch_simulation(self, num_simulations=1000000, batch_size=100000, seed=None):
+        """
+        Same statistics as run_simulation, but deals are played batch_size at a time with NumPy arrays (see batch_simulation.py)
+        """
+        import numpy as np
+        from .batch_simulation import BatchSimulation
 
-        for _ in range(num_simulations):
-            
-            team1_points, team2_points = 0, 0
+        players = self.create_bots()
+        names = [player.name for player in players]
+        counters = self.new_counters(players)
+        stats = SimulationStats(counters)
 
-            # Make and shuffle deck
-            suits = ["hearts", "diamonds", "clubs", "spades"]
-            ranks = ["A", "K", "Q", "J", "10", "9"]
-            deck = [f"{rank} of {suit}" for rank in ranks for suit in suits]
-            random.shuffle(deck)
+        batch = BatchSimulation(players[0])
+        rng = np.random.default_rng(seed)
 
-            # Deal cards to players
-            dealt_hands = {}
-            for bot in players:
-                bot_cards = deck[:5]
-                deck = deck[5:]
+        remaining = num_simulations
+        while remaining > 0:
+            decks = batch.deal(min(batch_size, remaining), rng)
+            results = batch.simulate(decks)
+            batch.add_to_counters(results, counters, names)
+            stats.add_batch(results["team1_points"], results["team2_points"])
+            remaining -= len(decks)
 
-                dealt_hands[bot.name] = self.convert_to_cards(bot_cards, bot)
+        self.print_results(counters, num_simulations)
+        return stats.result()
 
-            up_card_string = deck[0]
+    def run_duplicate_simulation(self, num_deals=10000, players=None, seed=None):
+        """
+        Duplicate mode for comparing the bots on team 1 against the bots on team 2. Every deal is replayed eight
+        times: the hands rotated through all four seats, each with team 1 and then team 2 in the dealer's
+        partnership. Both teams play every hand from every seat, so the card luck and the dealer's advantage cancel
+        out of the difference between them.
 
-            dealer = bot4
-            
-            up_card_rank, up_card_suit = up_card_string.split(" of ")
-            up_card = Card(up_card_rank, up_card_suit)
+        The points margin for team 1 (team 1 less team 2, averaged over the eight replays) is reported per deal
+        as "duplicate_margin:team1" in the returned SimulationResult. Other estimates are per hand played.
+        """
+        use_hand_strength_table()
+        players = players or self.create_bots()
+        counters = self.new_counters(players)
+        stats = SimulationStats(counters)
+        margin = RunningStat()
+        rng = random if seed is None else random.Random(seed)
+
+        for _ in range(num_deals):
+            margin.add(self.play_duplicate_deal(self.shuffled_deck(rng), players, counters, stats))
+
+        result = stats.result()
+        result.estimates["duplicate_margin:team1"] = margin.estimate(stats.z)
+
+        estimate = result["duplicate_margin:team1"]
+        print(f"Team 1 duplicate margin after {num_deals} deals ({stats.num_deals} hands): "
+              f"{estimate.value:.4f} points per hand (95% CI {estimate.low:.4f} to {estimate.high:.4f})")
+        return result
+
+    def play_duplicate_deal(self, deck, players, counters, stats=None):
+        """
+        Plays the eight duplicate replays of one deck and returns team 1's points margin averaged over them.
+        A replay everyone passes on scores nothing for either team.
+        """
+        # Shifting the seats by one puts the other team in the dealer's seat (the last player deals)
+        seatings = [players, players[1:] + players[:1]]
+        num_replays = len(seatings) * 4
+
+        deal_margin = 0
+        for seating in seatings:
+            for rotation in range(4):
+                points = self.simulate_deal(self.rotate_deck(deck, rotation), seating, counters)
+                if points is None:
+                    continue
+                if stats is not None:
+                    stats.add_deal(*points)
+                deal_margin += points[0] - points[1]
+
+        return deal_margin / num_replays
+
+    def rotate_deck(self, deck, rotation):
+        """
+        Deck for simulate_deal with each 5 card hand moved `rotation` seats to the right, the up card stays on top of the kitty
+        """
+        hands = [deck[seat * 5:seat * 5 + 5] for seat in range(4)]
+        rotated = []
+        for seat in range(4):
+            rotated.extend(hands[(seat - rotation) % 4])
+        return rotated + deck[20:]
+
+    def create_bots(self, strategies=None):
+        """
+        Seats the four bots, Bot 4 is always the dealer. strategies is an optional strategy for each seat
+        (see strategies.py), None for the BotLogic rules.
+        """
+        strategies = strategies or [None] * 4
+        bot1 = Bot("Bot 1", partner="Bot 3", team=1, strategy=strategies[0])
+        bot2 = Bot("Bot 2", partner="Bot 4", team=2, strategy=strategies[1])
+        bot3 = Bot("Bot 3", partner="Bot 1", team=1, strategy=strategies[2])
+        bot4 = Bot("Bot 4", partner="Bot 2", team=2, strategy=strategies[3]) # always dealer
+
+        return [bot1, bot2, bot3, bot4]
+
+    def new_counters(self, players):
+        """
+        Counters collected over a simulation run, keyed the same way by run_simulation and the batch simulator
+        """
+        return {
+            # Track number of calls for each player
+            "calls_round1": {player.name: 0 for player in players},
+            "calls_round2": {player.name: 0 for player in players},
+
+            # Track loner attempts
+            "loner_attempts_round1": {player.name: 0 for player in players},
+            "loner_attempts_round2": {player.name: 0 for player in players},
+
+            # Track number of wins for each team
+            "team1_wins": 0,
+            "team2_wins": 0,
+
+            # Track number of calls for each team
+            "team1_calls": 0,
+            "team2_calls": 0,
+
+            # Track number of times each team marches
+            "team1_marches": 0,
+            "team2_marches": 0,
+
+            # Track total points for each team
+            "team1_total_points": 0,
+            "team2_total_points": 0,
+
+            "team1_loner_attempts": 0,
+            "team2_loner_attempts": 0,
+            "team1_loner_wins": 0,
+            "team2_loner_wins": 0,
+        }
+
+    def merge_counters(self, counters, other):
+        """
+        Adds the counts in `other` into `counters` (both laid out like new_counters)
+        """
+        for key, value in other.items():
+            if isinstance(value, dict):
+                for name, count in value.items():
+                    counters[key][name] += count
+            else:
+                counters[key] += value
+        return counters
+
+    def simulate_deal(self, deck, players, counters):
+        """
+        Deals a shuffled deck of "rank of suit" strings, runs the trump decisions and plays the hand, adding the results to counters.
+        The last player deals. Returns the points (team 1, team 2), or None if everyone passed.
+        """
+        team1_points, team2_points = 0, 0
 
-            # Each bot makes trump decision
-            trump_maker = None
-            for trump_round in (1, 2):
-                for bot in players:
+        # The dealt cards as card ids, before the deck is used up, for the hand log
+        if self.hand_log is not None:
+            logged_hands = [[card_from_name(card) for card in deck[seat * 5:seat * 5 + 5]] for seat in range(4)]
+            logged_up_card = card_from_name(deck[20])
+            discarded_card = None
+
+        # Deal cards to players
+        dealt_hands = {}
+        for bot in players:
+            bot_cards = deck[:5]
+            deck = deck[5:]
+
+            dealt_hands[bot.name] = self.convert_to_cards(bot_cards, bot)
+
+        up_card_string = deck[0]
+
+        dealer = players[3]
+        
+        up_card_rank, up_card_suit = up_card_string.split(" of ")
+        up_card = Card(up_card_rank, up_card_suit)
 
-                    trump_decision, going_alone = bot.determine_trump(
-                        hand=dealt_hands[bot.name],
-                        dealer=dealer,
-                        up_card=up_card,
-                        player_order=players,
-                        trump_round=str(trump_round)
-                    )
+        # Each bot makes trump decision
+        trump_maker = None
+        for trump_round in (1, 2):
+            for bot in players:
 
-                    if trump_decision != 'pass':
+                trump_decision, going_alone = bot.determine_trump(
+                    hand=dealt_hands[bot.name],
+                    dealer=dealer,
+                    up_card=up_card,
+                    player_order=players,
+                    trump_round=str(trump_round)
+                )
 
-                        # print(f"{bot.name} called {trump_decision} ({up_card}) in round {trump_round} with hand: {', '.join([str(card) for card in dealt_hands[bot.name]])} ({going_alone})")
+                if trump_decision != 'pass':
 
-                        if trump_round == 1:
-                            calls_round1[bot.name] += 1
+                    # print(f"{bot.name} called {trump_decision} ({up_card}) in round {trump_round} with hand: {', '.join([str(card) for card in dealt_hands[bot.name]])} ({going_alone})")
 
-                            if going_alone:
-                                loner_attempts_round1[bot.name] += 1
+                    if trump_round == 1:
+                        counters["calls_round1"][bot.name] += 1
 
-                            dealt_hands[dealer.name].append(up_card)
-                            
-                            discarded_card = dealer.get_worst_card(dealt_hands[dealer.name], up_card.suit)
-                            dealt_hands[dealer.name].remove(discarded_card)
-                        else:
-                            calls_round2[bot.name] += 1
+                        if going_alone:
+                            counters["loner_attempts_round1"][bot.name] += 1
 
-                            if going_alone:
-                                loner_attempts_round2[bot.name] += 1
+                        dealt_hands[dealer.name].append(up_card)
+                        
+                        discarded_card = dealer.discard(dealt_hands[dealer.name], up_card.suit)
+                        dealt_hands[dealer.name].remove(discarded_card)
+                    else:
+                        counters["calls_round2"][bot.name] += 1
 
-                        trump_maker = bot
+                        if going_alone:
+                            counters["loner_attempts_round2"][bot.name] += 1
 
-                        break
+                    trump_maker = bot
 
-                if trump_maker:
                     break
 
-            # Use this to get stats on how many times each call was successful or euchred
-            team1_points, team2_points = self.play_hand(dealt_hands, players, trump_decision, trump_maker, going_alone)
-
-            team1_total_points += team1_points
-            team2_total_points += team2_points
-
-            # Calculate calls and wins
-            if trump_maker.team == 1:
-                team1_calls += 1
-                if going_alone:
-                    team1_loner_attempts += 1
-                    if team1_points == 4:
-                        team1_loner_wins += 1
-                if team1_points > team2_points:
-                    team1_wins += 1
-                    if team1_points == 2:
-                        team1_marches += 1
-            else:
-                team2_calls += 1
-                if going_alone:
-                    team2_loner_attempts += 1
-                    if team2_points == 4:
-                        team2_loner_wins += 1
-                if team2_points > team1_points:
-                    team2_wins += 1
-                    if team2_points == 2:
-                        team2_marches += 1
+            if trump_maker:
+                break
+
+        if trump_maker is None:
+            # Everyone passed twice, the hand is thrown in and redealt
+            if self.hand_log is not None:
+                self.hand_log.write(pack_record(logged_hands, logged_up_card, 3))
+            return None
 
+        # Use this to get stats on how many times each call was successful or euchred
+        trick_log = [] if self.hand_log is not None else None
+        team1_points, team2_points = self.play_hand(
+            dealt_hands, players, trump_decision, trump_maker, going_alone, trick_log, (up_card, dealer, trump_round == 1)
+        )
+
+        if trick_log is not None:
+            self.log_hand(logged_hands, logged_up_card, players, trump_maker, trump_round, trump_decision, going_alone,
+                          discarded_card, trick_log, team1_points, team2_points)
+
+        counters["team1_total_points"] += team1_points
+        counters["team2_total_points"] += team2_points
+
+        # Calculate calls and wins
+        if trump_maker.team == 1:
+            counters["team1_calls"] += 1
+            if going_alone:
+                counters["team1_loner_attempts"] += 1
+                if team1_points == 4:
+                    counters["team1_loner_wins"] += 1
+            if team1_points > team2_points:
+                counters["team1_wins"] += 1
+                if team1_points == 2:
+                    counters["team1_marches"] += 1
+        else:
+            counters["team2_calls"] += 1
+            if going_alone:
+                counters["team2_loner_attempts"] += 1
+                if team2_points == 4:
+                    counters["team2_loner_wins"] += 1
+            if team2_points > team1_points:
+                counters["team2_wins"] += 1
+                if team2_points == 2:
+                    counters["team2_marches"] += 1
+
+        return team1_points, team2_points
+
+    def log_hand(self, hands, up_card, players, trump_maker, trump_round, trump_suit, going_alone, discarded_card,
+                 trick_log, team1_points, team2_points):
+        """
+        Appends a played hand to self.hand_log, cards as card ids and players as seats (the dealer is seat 3)
+        """
+        seats = {player.name: seat for seat, player in enumerate(players)}
+        tricks = []
+        team_tricks = {1: 0, 2: 0}
+        for played_cards, winner in trick_log:
+            cards = [None] * len(players)
+            for played_card in played_cards:
+                cards[seats[played_card.player.name]] = CARD_IDS[played_card.card.rank, played_card.card.suit]
+            tricks.append((seats[played_cards[0].player.name], cards))
+            team_tricks[winner.team] += 1
+
+        self.hand_log.write(pack_record(
+            hands, up_card, 3, seats[trump_maker.name], trump_round, SUIT_INDEX[trump_suit], going_alone,
+            None if discarded_card is None else CARD_IDS[discarded_card.rank, discarded_card.suit],
+            tricks, team_tricks[1], team_tricks[2], team1_points, team2_points,
+        ))
+
+    def print_results(self, counters, num_simulations):
+        """
+        Prints call, loner, win and march rates from simulation counters
+        """
+        calls_round1 = counters["calls_round1"]
+        calls_round2 = counters["calls_round2"]
+        loner_attempts_round1 = counters["loner_attempts_round1"]
+        loner_attempts_round2 = counters["loner_attempts_round2"]
+        team1_wins, team2_wins = counters["team1_wins"], counters["team2_wins"]
+        team1_calls, team2_calls = counters["team1_calls"], counters["team2_calls"]
+        team1_marches, team2_marches = counters["team1_marches"], counters["team2_marches"]
+        team1_total_points, team2_total_points = counters["team1_total_points"], counters["team2_total_points"]
+        team1_loner_attempts, team2_loner_attempts = counters["team1_loner_attempts"], counters["team2_loner_attempts"]
+        team1_loner_wins, team2_loner_wins = counters["team1_loner_wins"], counters["team2_loner_wins"]
 
         # Calculate probabilities
         call_rates_round1 = {
@@ -281,12 +595,13 @@ class MonteCarloSimulation():
             print(f"Total loner success rate: {total_loner_success_rate:.2f}%")
 
 
-    def play_hand(self, dealt_hands, players, trump_suit, trump_maker, going_alone):
+    def play_hand(self, dealt_hands, players, trump_suit, trump_maker, going_alone, trick_log=None, up_card=(None, None, False)):
         """
-        Plays a hand of Euchre
+        Plays a hand of Euchre. If trick_log is a list, (played cards, winner) is appended to it for each trick.
+        up_card is (card turned up, dealer, whether the dealer picked it up), everyone saw it.
         """
 
-        previous_tricks = {}
+        previous_tricks = TrickHistory(trump_suit)
         team1_tricks = 0
         team2_tricks = 0
 
@@ -299,6 +614,10 @@ class MonteCarloSimulation():
             play_order.remove(partner)
             del dealt_hands[partner.name]
 
+        for bot in play_order:
+            bot.in_hand = play_order
+            bot.up_card = up_card
+
         for trick_number in range(1, 6):
             played_cards = []
 
@@ -323,6 +642,8 @@ class MonteCarloSimulation():
 
             # Add the played cards to the previous cards
             previous_tricks[trick_number] = played_cards
+            if trick_log is not None:
+                trick_log.append((played_cards, winner))
 
             # Add 1 to the number of tricks the winner has in the original player list
             if winner.team == 1:
@@ -352,44 +673,10 @@ class MonteCarloSimulation():
 
     def evaluate_points(self, team1_tricks, team2_tricks, trump_maker, went_alone):
         """
-        Evaluates the points for each team based on how many tricks they took
+        Evaluates the points for each team based on how many tricks they took (same scoring as the web game, see scoring.py)
         """
-        # 1 point if you call it and win 3 tricks
-        # 2 points if you call it and win 5 tricks
-        # 2 points if the other team calls it and you win 3 tricks
-        # 4 points if you win all 5 tricks when going alone
-        # TODO: Update for alone attempts when that is implemented
-
-        team1_points = 0
-        team2_points = 0
-
-        if trump_maker.team == 1:
-            trump_calling_team = 1
-        else:
-            trump_calling_team = 2
-
-        if team1_tricks >= 3:
-            if trump_calling_team == 1:
-                # Team 1 called trump and won
-                if went_alone and team1_tricks == 5:
-                    team1_points += 4
-                else:
-                    team1_points += 1 if team1_tricks < 5 else 2
-            else:
-                # Team 1 euchred the other team
-                team1_points += 2
-        if team2_tricks >= 3:
-            if trump_calling_team == 2:
-                # Team 2 called trump and won
-                if went_alone and team2_tricks == 5:
-                    team2_points += 4
-                else:
-                    team2_points += 1 if team2_tricks < 5 else 2
-            else:
-                # Team 2 euchred the other team
-                team2_points += 2
-
-        return team1_points, team2_points
+        trump_calling_team = 1 if trump_maker.team == 1 else 2
+        return round_points(team1_tricks, team2_tricks, trump_calling_team, went_alone)
 
     def convert_to_cards(self, string_cards, player):
         dummy_hand = []
@@ -430,7 +717,35 @@ class MonteCarloSimulation():
         print(f"  Total Score: {total_score:.3f}")
 
         
+def simulate_shard(num_simulations, seed, log_path=None):
+    """
+    One shard of MonteCarloSimulation.run_parallel_simulation, runs in a worker process and returns its counters,
+    stats and hand log path (None when not logging)
+    """
+    use_hand_strength_table()
+    simulation = MonteCarloSimulation()
+    players = simulation.create_bots()
+    counters = simulation.new_counters(players)
+    stats = SimulationStats(counters)
+    if log_path is None:
+        simulation.simulate_deals(num_simulations, players, counters, random.Random(seed), stats)
+    else:
+        # Left over from an interrupted run
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        with HandLogWriter(log_path) as hand_log:
+            simulation.hand_log = hand_log
+            simulation.simulate_deals(num_simulations, players, counters, random.Random(seed), stats)
+    return counters, stats, log_path
+
+
 if __name__ == "__main__":
     simulation = MonteCarloSimulation()
     simulation.run_simulation(10000)
+    print(f"Trump decision cache: {trump_decision_cache.info()}, hit rate {trump_decision_cache.hit_rate():.1%}")
+    # simulation.run_parallel_simulation(1000000, seed=1)
+    # result = simulation.run_until_precise(target_half_width=0.005, seed=1); print(result.widest())
+    # simulation.run_duplicate_simulation(10000, seed=1)
+    # with HandLogWriter("hands.bin") as hand_log: simulation.run_parallel_simulation(10000000, seed=1, hand_log=hand_log)
+    # simulation.run_batch_simulation(1000000, seed=1)  # needs numpy
     # simulation.print_hand_scores("A of diamonds, A of hearts, J of spades, J of diamonds, J of hearts", "diamonds")
@@ -0,0 +1,153 @@
+"""
+Compact card engine for the bots.
+
+Each of the 24 cards is a small int (suit * 6 + rank) and a hand is a 24-bit mask with
+bit `card_id` set for every card it holds. Everything that depends on the trump or lead
+suit (Euchre rank, effective suit, bowers) is precomputed into tables indexed by suit
+index, so the hot paths in BotLogic never compare rank/suit strings.
+"""
+
+SUITS = ["hearts", "diamonds", "clubs", "spades"]
+RANKS = ["9", "10", "J", "Q", "K", "A"]
+
+NUM_SUITS = len(SUITS)
+NUM_RANKS = len(RANKS)
+NUM_CARDS = NUM_SUITS * NUM_RANKS
+FULL_DECK = (1 << NUM_CARDS) - 1
+
+# Index used in the rank tables when no suit has been led yet
+NO_LEAD = NUM_SUITS
+
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+LEAD_INDEX = dict(SUIT_INDEX)
+LEAD_INDEX[None] = NO_LEAD
+
+JACK = RANK_INDEX["J"]
+ACE = RANK_INDEX["A"]
+
+
+def make_card(rank_index, suit_index):
+    return suit_index * NUM_RANKS + rank_index
+
+
+def partner_suit(suit_index):
+    """ Same colour suit (hearts <-> diamonds, clubs <-> spades). """
+    return suit_index ^ 1
+
+
+CARD_SUIT = [card // NUM_RANKS for card in range(NUM_CARDS)]
+CARD_RANK = [card % NUM_RANKS for card in range(NUM_CARDS)]
+CARD_BIT = [1 << card for card in range(NUM_CARDS)]
+CARD_NAMES = [f"{RANKS[CARD_RANK[card]]} of {SUITS[CARD_SUIT[card]]}" for card in range(NUM_CARDS)]
+CARD_IDS = {(RANKS[CARD_RANK[card]], SUITS[CARD_SUIT[card]]): card for card in range(NUM_CARDS)}
+
+RIGHT_BOWER = [make_card(JACK, suit) for suit in range(NUM_SUITS)]
+LEFT_BOWER = [make_card(JACK, partner_suit(suit)) for suit in range(NUM_SUITS)]
+
+# Cards of each printed suit, ignoring bowers
+RAW_SUIT_MASK = [sum(CARD_BIT[make_card(rank, suit)] for rank in range(NUM_RANKS)) for suit in range(NUM_SUITS)]
+
+
+def _effective_suit(card, trump):
+    if card == LEFT_BOWER[trump]:
+        return trump
+    return CARD_SUIT[card]
+
+
+def _euchre_rank(card, trump, lead):
+    """ Same values as the original string based BotLogic.euchre_rank. """
+    if card == RIGHT_BOWER[trump]:
+        return 25
+    if card == LEFT_BOWER[trump]:
+        return 24
+    if CARD_SUIT[card] == trump:
+        return 15 + ["9", "10", "Q", "K", "A"].index(RANKS[CARD_RANK[card]])
+    if CARD_SUIT[card] == lead:
+        return 6 + CARD_RANK[card]
+    return CARD_RANK[card]
+
+
+# EFFECTIVE_SUIT[trump][card]: suit the card belongs to once trump is known (left bower counts as trump)
+EFFECTIVE_SUIT = [[_effective_suit(card, trump) for card in range(NUM_CARDS)] for trump in range(NUM_SUITS)]
+
+# SUIT_MASK[trump][suit]: cards that follow `suit` when `trump` is trump
+SUIT_MASK = [
+    [sum(CARD_BIT[card] for card in range(NUM_CARDS) if EFFECTIVE_SUIT[trump][card] == suit) for suit in range(NUM_SUITS)]
+    for trump in range(NUM_SUITS)
+]
+TRUMP_MASK = [SUIT_MASK[trump][trump] for trump in range(NUM_SUITS)]
+
+# RANK_TABLE[trump][lead][card]: Euchre rank of the card, lead is NO_LEAD when nothing has been led
+RANK_TABLE = [
+    [[_euchre_rank(card, trump, lead) for card in range(NUM_CARDS)] for lead in range(NUM_SUITS + 1)]
+    for trump in range(NUM_SUITS)
+]
+
+
+def card_index(card):
+    """ Card id of any object with `rank` and `suit` attributes (models.Card or bot_simulations.Card). """
+    return CARD_IDS[card.rank, card.suit]
+
+
+def card_from_name(name):
+    """ Card id from a "rank of suit" string. """
+    rank, suit = name.split(" of ")
+    return CARD_IDS[rank, suit]
+
+
+def hand_mask(hand):
+    """ 24-bit mask of a list of card objects. """
+    mask = 0
+    for card in hand:
+        mask |= CARD_BIT[CARD_IDS[card.rank, card.suit]]
+    return mask
+
+
+def mask_from_ids(card_ids):
+    mask = 0
+    for card in card_ids:
+        mask |= CARD_BIT[card]
+    return mask
+
+
+def cards_in_mask(mask):
+    """ Card ids held in the mask, lowest id first. """
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return cards
+
+
+def popcount(mask):
+    return mask.bit_count()
+
+
+def highest_card(mask, trump, lead=NO_LEAD):
+    """ Highest ranked card id in the mask (lowest id wins ties), or None if the mask is empty. """
+    ranks = RANK_TABLE[trump][lead]
+    best = None
+    for card in cards_in_mask(mask):
+        if best is None or ranks[card] > ranks[best]:
+            best = card
+    return best
+
+
+def lowest_card(mask, trump, lead=NO_LEAD):
+    """ Lowest ranked card id in the mask (lowest id wins ties), or None if the mask is empty. """
+    ranks = RANK_TABLE[trump][lead]
+    worst = None
+    for card in cards_in_mask(mask):
+        if worst is None or ranks[card] < ranks[worst]:
+            worst = card
+    return worst
+
+
+def legal_cards(mask, trump, lead=NO_LEAD):
+    """ Cards in the mask that may be played to a trick led in `lead` (any card when leading or void). """
+    if lead == NO_LEAD:
+        return mask
+    following = mask & SUIT_MASK[trump][lead]
+    return following if following else mask
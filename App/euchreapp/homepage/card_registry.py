@@ -0,0 +1,75 @@
+"""
+The 24 Card rows, loaded once per process and shared by every game.
+
+The rows are seeded by migration 0016 and never written afterwards, so they are read from the
+database the first time a card is needed and then looked up in memory by id or by "rank of suit".
+Whether a card is trump depends on the game's trump suit (Card.is_trump(trump_suit)), not on the row.
+
+    deck = all_cards()                       # new list, safe to shuffle
+    card = card_by_name("J of spades")
+    card = get_card(played_card.card_id)     # no query for the card
+"""
+import threading
+
+SUITS = ["hearts", "diamonds", "clubs", "spades"]
+RANKS = ["9", "10", "J", "Q", "K", "A"]
+
+_lock = threading.Lock()
+_cards = None  # (cards in id order, {id: card}, {"rank of suit": card}), None until first loaded
+
+
+def seed_cards(card_model):
+    """
+    Creates whichever of the 24 cards are missing (migration 0016 creates them with its own copy of this)
+    """
+    existing = set(card_model.objects.values_list("rank", "suit"))
+    card_model.objects.bulk_create([
+        card_model(suit=suit, rank=rank) for suit in SUITS for rank in RANKS if (rank, suit) not in existing
+    ])
+
+
+def load_cards():
+    """
+    Reads the cards into the registry (seeding any that are missing) and returns them in id order
+    """
+    global _cards
+    from .models import Card
+
+    with _lock:
+        if _cards is None:
+            seed_cards(Card)
+            cards = list(Card.objects.order_by("id"))
+            _cards = (
+                cards,
+                {card.id: card for card in cards},
+                {f"{card.rank} of {card.suit}": card for card in cards},
+            )
+    return _cards[0]
+
+
+def clear_card_registry(**kwargs):
+    """
+    Forgets the loaded cards, connected to post_migrate so a rebuilt (test) database is read again
+    """
+    global _cards
+    with _lock:
+        _cards = None
+
+
+def all_cards():
+    """ Every card in id order, as a new list """
+    return list(_cards[0] if _cards is not None else load_cards())
+
+
+def get_card(card_id):
+    """ Card by primary key, KeyError if there is no such card """
+    if _cards is None:
+        load_cards()
+    return _cards[1][card_id]
+
+
+def card_by_name(name):
+    """ Card from a "rank of suit" string, KeyError if there is no such card """
+    if _cards is None:
+        load_cards()
+    return _cards[2][name]
@@ -0,0 +1,221 @@
+"""
+Columnar export of simulated hands to NumPy .npy files, one file per column.
+
+A run is first recorded to a hand log (hand_log.py), then every record is expanded into one row per
+seat, hand major (rows 4i to 4i+3 are the seats of hand i). The log is read through NumPy without
+copying and converted in chunks, so exports of tens of millions of hands never hold more than one
+chunk in memory. Columns, seats numbered as in the hand log (team 1 is seats 0 and 2, seat 3 deals):
+
+    hand          int64    index of the hand in the log
+    seat          int8
+    team          int8     1 or 2
+    up_card       int8     card id of the up card
+    scores        float64  (rows, 4) evaluate_hand for the seat's dealt cards with each suit as trump
+    decision      int8     1 if the seat called trump in round 1, 2 in round 2, otherwise 0
+    going_alone   bool     the seat called trump and went alone
+    trump         int8     trump suit index for the hand, -1 if everyone passed
+    tricks        int8     tricks the seat won
+    team_tricks   int8     tricks the seat's team won
+    points        int8     points the seat's team scored
+
+Columns load memory mapped, so aggregating over them reads only the pages touched:
+
+    columns = load_columns("export")
+    columns["points"][columns["decision"] == 1].mean()
+
+    python -m homepage.columnar_export export 10000000
+"""
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .batch_simulation import CARD_BIT_NP, EFFECTIVE_SUIT_NP, RANK_NP, BatchSimulation
+from .bot_simulations import MonteCarloSimulation
+from .hand_log import NONE, NUM_SEATS, NUM_TRICKS, RECORD, HandLogReader, HandLogWriter
+
+# Same layout as hand_log.RECORD, so a log's records can be viewed as a NumPy array in place
+RECORD_DTYPE = np.dtype([
+    ("hands", np.uint8, (NUM_SEATS * 5,)),
+    ("up_card", np.uint8),
+    ("dealer", np.uint8),
+    ("caller", np.uint8),
+    ("call_round", np.uint8),
+    ("trump", np.uint8),
+    ("going_alone", np.uint8),
+    ("discard", np.uint8),
+    ("plays", np.uint8, (NUM_TRICKS * NUM_SEATS,)),
+    ("leaders", np.uint8, (NUM_TRICKS,)),
+    ("team1_tricks", np.uint8),
+    ("team2_tricks", np.uint8),
+    ("team1_points", np.uint8),
+    ("team2_points", np.uint8),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+COLUMNS = {
+    # name: (dtype, extra dimensions)
+    "hand": (np.int64, ()),
+    "seat": (np.int8, ()),
+    "team": (np.int8, ()),
+    "up_card": (np.int8, ()),
+    "scores": (np.float64, (4,)),
+    "decision": (np.int8, ()),
+    "going_alone": (np.bool_, ()),
+    "trump": (np.int8, ()),
+    "tricks": (np.int8, ()),
+    "team_tricks": (np.int8, ()),
+    "points": (np.int8, ()),
+}
+
+# Hands converted at a time
+CHUNK_SIZE = 1000000
+
+SEATS = np.arange(NUM_SEATS)
+SEAT_TEAMS = np.array([1, 2, 1, 2])
+
+# Card slot for a seat that sat out a trick (RANK_NP ranks it below every card)
+NO_CARD = len(CARD_BIT_NP) - 1
+
+
+def log_records(reader):
+    """ A HandLogReader's records as a structured array over the memory map (no copy) """
+    return np.frombuffer(reader.raw(), dtype=RECORD_DTYPE)
+
+
+def seat_tricks(records):
+    """
+    Tricks won by each seat, shape (hands, 4), 0 for hands everyone passed on
+    """
+    count = len(records)
+    called = records["trump"] != NONE
+    trump = np.where(called, records["trump"], 0).astype(np.int64)
+
+    plays = records["plays"].reshape(count, NUM_TRICKS, NUM_SEATS).astype(np.int64)
+    plays[plays == NONE] = NO_CARD
+    leaders = np.where(called[:, None], records["leaders"], 0).astype(np.int64)
+
+    lead_card = np.take_along_axis(plays, leaders[:, :, None], axis=2)[:, :, 0]
+    lead_suit = EFFECTIVE_SUIT_NP[trump[:, None], lead_card]
+    ranks = RANK_NP[trump[:, None, None], lead_suit[:, :, None], plays]
+    winners = ranks.argmax(axis=2)
+
+    tricks = np.zeros((count, NUM_SEATS), dtype=np.int8)
+    for seat in SEATS:
+        tricks[:, seat] = (winners == seat).sum(axis=1)
+    tricks[~called] = 0
+    return tricks
+
+
+def hand_scores(records, batch):
+    """
+    evaluate_hand for every seat's dealt cards in every trump suit, shape (hands, 4 seats, 4 suits)
+    """
+    count = len(records)
+    masks = np.bitwise_or.reduce(CARD_BIT_NP[records["hands"].reshape(count, NUM_SEATS, 5)], axis=2).reshape(-1)
+    seats = np.tile(SEATS, count)
+
+    scores = np.empty((count * NUM_SEATS, 4))
+    for suit in range(4):
+        scores[:, suit] = batch.hand_scores(masks, suit, seats)
+    return scores.reshape(count, NUM_SEATS, 4)
+
+
+def chunk_columns(records, first_hand, batch):
+    """
+    Column arrays for a chunk of records, one row per seat
+    """
+    count = len(records)
+    called = records["caller"] != NONE
+    caller = records["caller"].astype(np.int64)
+    is_caller = called[:, None] & (SEATS[None, :] == caller[:, None])
+
+    team = np.broadcast_to(SEAT_TEAMS, (count, NUM_SEATS))
+    tricks = seat_tricks(records)
+    team_tricks = np.where(team == 1, records["team1_tricks"][:, None], records["team2_tricks"][:, None])
+    points = np.where(team == 1, records["team1_points"][:, None], records["team2_points"][:, None])
+
+    return {
+        "hand": np.repeat(np.arange(first_hand, first_hand + count), NUM_SEATS),
+        "seat": np.tile(SEATS, count),
+        "team": team.reshape(-1),
+        "up_card": np.repeat(records["up_card"], NUM_SEATS),
+        "scores": hand_scores(records, batch).reshape(-1, 4),
+        "decision": np.where(is_caller, records["call_round"][:, None], 0).reshape(-1),
+        "going_alone": (is_caller & (records["going_alone"][:, None] == 1)).reshape(-1),
+        "trump": np.repeat(np.where(called, records["trump"].astype(np.int64), -1), NUM_SEATS),
+        "tricks": tricks.reshape(-1),
+        "team_tricks": team_tricks.reshape(-1),
+        "points": points.reshape(-1),
+    }
+
+
+def export_hand_log(log_path, out_dir, chunk_size=CHUNK_SIZE):
+    """
+    Writes every column of a hand log to out_dir/<column>.npy and returns the number of rows
+    """
+    with HandLogReader(log_path) as reader:
+        # Every view of the memory map is gone once write_columns returns, so the reader can close
+        return write_columns(log_records(reader), out_dir, chunk_size)
+
+
+def write_columns(records, out_dir, chunk_size=CHUNK_SIZE):
+    """
+    Writes the columns for an array of records (RECORD_DTYPE) and returns the number of rows
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    batch = BatchSimulation()
+    rows = len(records) * NUM_SEATS
+    columns = {
+        name: open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=(rows,) + shape)
+        for name, (dtype, shape) in COLUMNS.items()
+    }
+
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        for name, values in chunk_columns(chunk, start, batch).items():
+            columns[name][start * NUM_SEATS:(start + len(chunk)) * NUM_SEATS] = values
+
+    for column in columns.values():
+        column.flush()
+    return rows
+
+
+def export_simulation(out_dir, num_simulations, workers=None, seed=0, keep_log=False):
+    """
+    Runs MonteCarloSimulation.run_parallel_simulation with a hand log in out_dir and exports it to columns.
+    Returns the run's SimulationResult.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    log_path = os.path.join(out_dir, "hands.bin")
+    if os.path.exists(log_path):
+        os.remove(log_path)
+
+    with HandLogWriter(log_path) as hand_log:
+        result = MonteCarloSimulation().run_parallel_simulation(num_simulations, workers=workers, seed=seed, hand_log=hand_log)
+
+    export_hand_log(log_path, out_dir)
+    if not keep_log:
+        os.remove(log_path)
+    return result
+
+
+def load_columns(out_dir, mmap_mode="r"):
+    """
+    {column: array} for an export, memory mapped unless mmap_mode is None
+    """
+    return {
+        name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in COLUMNS if os.path.exists(os.path.join(out_dir, f"{name}.npy"))
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "export"
+    num_simulations = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    export_simulation(out_dir, num_simulations, seed=1)
+
+    columns = load_columns(out_dir)
+    print(f"Exported {len(columns['seat'])} rows to {out_dir}")
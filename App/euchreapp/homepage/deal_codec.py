@@ -0,0 +1,246 @@
+"""
+Deal codec: every Euchre deal as a single integer, and an index of deal fingerprints.
+
+A deal is the four 5 card hands in seat order (the dealer last), the up card and the three other
+kitty cards. Each hand is ranked among the cards still undealt with the combinatorial number
+system, the up card by its place among the last four cards, and the ranks are combined as mixed
+radix digits, seat 0 first:
+
+    C(24,5) * C(19,5) * C(14,5) * C(9,5) * 4 = 24! / (5!^4 * 3!) = 498,688,594,500,096 deals
+
+so a deal fits in 49 bits and every integer below NUM_DEALS is exactly one deal. Deals can then be
+stored in 8 bytes, compared and deduplicated as integers, and drawn by index, for example one from
+each of N equal slices of the index range for stratified sampling.
+
+    index = rank_deal(hands, up_card)          # hands: four card masks (card_engine.hand_mask)
+    hands, up_card = unrank_deal(index)
+    deck = deck_for_deal(index)                # "rank of suit" strings for MonteCarloSimulation.simulate_deal
+"""
+import bisect
+import mmap
+import os
+import struct
+from array import array
+
+from .card_engine import CARD_BIT, CARD_NAMES, CARD_SUIT, FULL_DECK, NUM_CARDS, card_from_name, cards_in_mask
+from .hand_strength import BINOM, HAND_SIZE
+from .suit_symmetry import canonical_mask
+
+NUM_SEATS = 4
+KITTY_SIZE = NUM_CARDS - NUM_SEATS * HAND_SIZE
+
+# Cards left to deal from before each seat's hand: 24, 19, 14, 9
+CARDS_BEFORE_SEAT = [NUM_CARDS - seat * HAND_SIZE for seat in range(NUM_SEATS)]
+HANDS_FOR_SEAT = [BINOM[cards][HAND_SIZE] for cards in CARDS_BEFORE_SEAT]
+
+NUM_DEALS = HANDS_FOR_SEAT[0] * HANDS_FOR_SEAT[1] * HANDS_FOR_SEAT[2] * HANDS_FOR_SEAT[3] * KITTY_SIZE
+
+
+def position_in(card, remaining):
+    """ How many cards in the remaining mask have a lower card id than card """
+    return (remaining & (CARD_BIT[card] - 1)).bit_count()
+
+
+def rank_subset(mask, remaining):
+    """ Combinatorial number system rank of a 5 card mask among the remaining cards """
+    rank = 0
+    for i, card in enumerate(cards_in_mask(mask)):
+        rank += BINOM[position_in(card, remaining)][i + 1]
+    return rank
+
+
+def unrank_subset(rank, remaining):
+    """ The 5 card mask with the given rank among the remaining cards (inverse of rank_subset) """
+    cards = cards_in_mask(remaining)
+    mask = 0
+    position = len(cards)
+    for i in range(HAND_SIZE, 0, -1):
+        position -= 1
+        while BINOM[position][i] > rank:
+            position -= 1
+        rank -= BINOM[position][i]
+        mask |= CARD_BIT[cards[position]]
+    return mask
+
+
+def rank_deal(hands, up_card):
+    """
+    Index (0 to NUM_DEALS - 1) of a deal given as four hand masks in seat order and the up card id
+    """
+    remaining = FULL_DECK
+    index = 0
+    for seat, hand in enumerate(hands):
+        if hand & ~remaining or hand.bit_count() != HAND_SIZE:
+            raise ValueError("Hands must be 5 cards each with no card dealt twice")
+        index = index * HANDS_FOR_SEAT[seat] + rank_subset(hand, remaining)
+        remaining &= ~hand
+
+    if not remaining & CARD_BIT[up_card]:
+        raise ValueError("The up card is in one of the hands")
+    return index * KITTY_SIZE + position_in(up_card, remaining)
+
+
+def unrank_deal(index):
+    """
+    (four hand masks in seat order, up card id) for a deal index
+    """
+    if not 0 <= index < NUM_DEALS:
+        raise ValueError(f"Deal index must be between 0 and {NUM_DEALS - 1}")
+
+    # Mixed radix digits, least significant (the up card) first
+    index, up_position = divmod(index, KITTY_SIZE)
+    hand_ranks = []
+    for seat in reversed(range(NUM_SEATS)):
+        index, rank = divmod(index, HANDS_FOR_SEAT[seat])
+        hand_ranks.append(rank)
+    hand_ranks.reverse()
+
+    remaining = FULL_DECK
+    hands = []
+    for rank in hand_ranks:
+        hand = unrank_subset(rank, remaining)
+        hands.append(hand)
+        remaining &= ~hand
+
+    return hands, cards_in_mask(remaining)[up_position]
+
+
+def rank_deck(deck):
+    """
+    Index of a MonteCarloSimulation deck ("rank of suit" strings, seat s holds deck[5s:5s+5] and deck[20] is the up card)
+    """
+    hands = []
+    for seat in range(NUM_SEATS):
+        hand = 0
+        for name in deck[seat * HAND_SIZE:(seat + 1) * HAND_SIZE]:
+            hand |= CARD_BIT[card_from_name(name)]
+        hands.append(hand)
+    return rank_deal(hands, card_from_name(deck[NUM_SEATS * HAND_SIZE]))
+
+
+def rank_record(record):
+    """
+    Index of the deal in a hand_log.HandRecord, 8 bytes instead of the record's 21 bytes of dealt cards
+    """
+    return rank_deal([sum(CARD_BIT[card] for card in hand) for hand in record.hands], record.up_card)
+
+
+def deck_for_deal(index):
+    """
+    Deck laid out like MonteCarloSimulation.shuffled_deck for a deal index (hands and the rest of the kitty in card id order)
+    """
+    hands, up_card = unrank_deal(index)
+    kitty = FULL_DECK & ~CARD_BIT[up_card]
+    for hand in hands:
+        kitty &= ~hand
+
+    card_ids = [card for hand in hands for card in cards_in_mask(hand)] + [up_card] + cards_in_mask(kitty)
+    return [CARD_NAMES[card] for card in card_ids]
+
+
+def stratified_indexes(num_deals, rng):
+    """
+    One uniformly random deal index from each of num_deals equal slices of the index range
+    """
+    return [NUM_DEALS * stratum // num_deals + rng.randrange(NUM_DEALS * (stratum + 1) // num_deals - NUM_DEALS * stratum // num_deals)
+            for stratum in range(num_deals)]
+
+
+def fingerprint(hands, up_card, canonical=False):
+    """
+    Deal index used as a fingerprint. With canonical=True the suits are first relabeled so the up suit is hearts
+    (see suit_symmetry.py), so deals that only differ by suit labels share a fingerprint. BotLogic plays those
+    the same except where the dealer discards from tied worst cards, which depends on the order cards are held in.
+    """
+    if not canonical:
+        return rank_deal(hands, up_card)
+    up_suit = CARD_SUIT[up_card]
+    return rank_deal([canonical_mask(hand, up_suit) for hand in hands], canonical_mask(CARD_BIT[up_card], up_suit).bit_length() - 1)
+
+
+# DealIndex file layout: 16 byte header (magic, version, count), then the fingerprints as sorted uint64
+INDEX_HEADER = struct.Struct("<8sII")
+INDEX_MAGIC = b"EUCHDI01"
+INDEX_VERSION = 1
+
+
+class DealIndex:
+    """
+    Set of deal fingerprints that have already been analysed. A saved index is memory mapped and searched in
+    place, fingerprints added since are kept in memory until save().
+
+        index = DealIndex("solved.bin")
+        if fingerprint(hands, up_card) not in index: ...; index.add(fingerprint(hands, up_card))
+        index.save()
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.added = set()
+        self.saved = ()
+        self.file = self.mapped = None
+        if path and os.path.exists(path):
+            self.open(path)
+
+    def open(self, path):
+        self.file = open(path, "rb")
+        # mmap cannot map an empty file, and a file shorter than the header is not an index either
+        if os.fstat(self.file.fileno()).st_size < INDEX_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} deal index")
+        self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = INDEX_HEADER.unpack_from(self.mapped)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or len(self.mapped) != INDEX_HEADER.size + 8 * count:
+            self.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} deal index")
+        self.saved = memoryview(self.mapped)[INDEX_HEADER.size:].cast("Q")
+
+    def __contains__(self, deal_fingerprint):
+        if deal_fingerprint in self.added:
+            return True
+        position = bisect.bisect_left(self.saved, deal_fingerprint)
+        return position < len(self.saved) and self.saved[position] == deal_fingerprint
+
+    def __len__(self):
+        return len(self.saved) + len(self.added)
+
+    def add(self, deal_fingerprint):
+        """ Adds a fingerprint, returns False if it was already in the index """
+        if deal_fingerprint in self:
+            return False
+        self.added.add(deal_fingerprint)
+        return True
+
+    def save(self, path=None):
+        """
+        Writes every fingerprint (saved and added) to path, by default the file the index was opened from
+        """
+        path = path or self.path
+        merged = array("Q", sorted(set(self.saved) | self.added))
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(merged)))
+            merged.tofile(f)
+
+        self.close()
+        os.replace(temp_path, path)
+        self.path = path
+        self.added = set()
+        self.open(path)
+
+    def close(self):
+        if isinstance(self.saved, memoryview):
+            self.saved.release()
+        self.saved = ()
+        if self.mapped is not None:
+            self.mapped.close()
+        if self.file is not None:
+            self.file.close()
+        self.file = self.mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,291 @@
+"""
+Double dummy solver for a Euchre hand.
+
+With every hand visible, trump known and the leader fixed, finds the most tricks the declaring
+side can take against best defence. The search is alpha-beta over legal plays on card_engine
+hand masks, with a transposition table at trick boundaries and one card tried per run of
+touching cards (holding the K and Q of a suit when the A is gone, only one of them is tried).
+
+    solve_hand(player_hands, "hearts", leader=bot1, declarer=bot1)
+"""
+import time
+
+from .card_engine import CARD_BIT, CARD_IDS, EFFECTIVE_SUIT, NUM_SUITS, RANK_TABLE, SUIT_INDEX, SUIT_MASK
+from .trick_history import REMAINING_ORDER
+
+
+# Positions kept per generation of the transposition table, see TranspositionTable
+DEFAULT_TABLE_ENTRIES = 200000
+
+# SUIT_ORDERS[trump]: (suit mask, [(card, bit), ...] highest first) for each suit once trump is known
+SUIT_ORDERS = [
+    [(SUIT_MASK[trump][suit], [(card, CARD_BIT[card]) for card in REMAINING_ORDER[trump][suit]]) for suit in range(NUM_SUITS)]
+    for trump in range(NUM_SUITS)
+]
+
+
+class SearchTimeout(Exception):
+    """ Raised when a search runs past the solver's deadline """
+
+
+class TranspositionTable:
+    """
+    Bounds on the value of positions already searched, keyed on the cards left in each hand and the leader.
+
+    Memory is bounded with two generations: when the current dict reaches max_entries it becomes the
+    previous generation and a new one is started, so at most 2 * max_entries positions are kept and
+    recently used ones survive.
+    """
+    def __init__(self, max_entries=DEFAULT_TABLE_ENTRIES):
+        self.max_entries = max_entries
+        self.current = {}
+        self.previous = {}
+
+    def __len__(self):
+        return len(self.current) + len(self.previous)
+
+    def get(self, key):
+        bounds = self.current.get(key)
+        if bounds is None:
+            bounds = self.previous.get(key)
+        return bounds
+
+    def store(self, key, lower, upper):
+        if len(self.current) >= self.max_entries:
+            self.previous = self.current
+            self.current = {}
+        self.current[key] = (lower, upper)
+
+    def clear(self):
+        self.current = {}
+        self.previous = {}
+
+
+class DoubleDummySolver:
+    """
+    Solver for card id masks. Seats are numbered in play order (3 seats when someone goes alone)
+    and `declaring` says which seats are on the declaring side.
+    """
+    def __init__(self, trump, declaring, max_entries=DEFAULT_TABLE_ENTRIES):
+        self.trump = trump
+        self.declaring = tuple(declaring)
+        self.num_seats = len(self.declaring)
+        self.table = TranspositionTable(max_entries)
+        self.nodes = 0
+
+        # time.perf_counter() value after which a search raises SearchTimeout, None for no limit
+        self.deadline = None
+
+        self.hands = None
+        self.live = 0
+
+    def solve(self, hands, leader, trick=()):
+        """
+        Most tricks the declaring side can take from here, counting the trick in progress.
+
+        hands: card mask per seat, leader: seat that leads (or led `trick`), trick: card ids already played to the current
+        trick, which may be complete
+        """
+        self.hands = list(hands)
+        self.live = 0
+        for hand in self.hands:
+            self.live |= hand
+        for card in trick:
+            self.live |= CARD_BIT[card]
+
+        remaining = max(hand.bit_count() for hand in self.hands) + (1 if trick else 0)
+        if not trick:
+            return self._search_trick(leader, -1, remaining + 1)
+
+        # Replay the cards on the table to find who is winning the trick
+        ranks = RANK_TABLE[self.trump][EFFECTIVE_SUIT[self.trump][trick[0]]]
+        winner, winning_rank = leader, ranks[trick[0]]
+        for position, card in enumerate(trick):
+            if ranks[card] > winning_rank:
+                winner, winning_rank = (leader + position) % self.num_seats, ranks[card]
+
+        if len(trick) == self.num_seats:
+            # The trick is already complete, its winner leads the next one
+            for card in trick:
+                self.live ^= CARD_BIT[card]
+            won = 1 if self.declaring[winner] else 0
+            return won + self._search_trick(winner, -1, remaining)
+
+        seat = (leader + len(trick)) % self.num_seats
+        return self._play(leader, seat, list(trick), ranks, winner, winning_rank, -1, remaining + 1)
+
+    def _search_trick(self, leader, alpha, beta):
+        """
+        Value of the position at the start of a trick
+        """
+        remaining = self.hands[leader].bit_count()
+        if remaining == 0 or beta <= 0:
+            return 0
+        if alpha >= remaining:
+            return remaining
+        if remaining == 1:
+            return self._last_trick(leader)
+
+        key = leader
+        for hand in self.hands:
+            key = key << 24 | hand
+
+        bounds = self.table.get(key)
+        if bounds is not None:
+            lower, upper = bounds
+            if lower == upper or lower >= beta:
+                return lower
+            if upper <= alpha:
+                return upper
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+        else:
+            lower, upper = 0, remaining
+
+        value = self._play(leader, leader, [], None, -1, -1, alpha, beta)
+
+        if value <= alpha:
+            upper = value
+        elif value >= beta:
+            lower = value
+        else:
+            lower = upper = value
+        self.table.store(key, lower, upper)
+
+        return value
+
+    def _last_trick(self, leader):
+        """
+        Everyone has one card left, so there is nothing to choose
+        """
+        trump = self.trump
+        lead_card = self.hands[leader].bit_length() - 1
+        ranks = RANK_TABLE[trump][EFFECTIVE_SUIT[trump][lead_card]]
+
+        winner, winning_rank = leader, ranks[lead_card]
+        for offset in range(1, self.num_seats):
+            seat = (leader + offset) % self.num_seats
+            rank = ranks[self.hands[seat].bit_length() - 1]
+            if rank > winning_rank:
+                winner, winning_rank = seat, rank
+        return 1 if self.declaring[winner] else 0
+
+    def _play(self, leader, seat, trick, ranks, winner, winning_rank, alpha, beta):
+        """
+        Value of the position with `seat` to play the next card to `trick`. `ranks` are the Euchre ranks for the
+        suit that was led, and winner/winning_rank the seat and rank of the card winning the trick so far.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 0x3F == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        trump = self.trump
+        hand = self.hands[seat]
+
+        # Follow the suit that was led if possible
+        legal = hand
+        if trick:
+            following = hand & SUIT_MASK[trump][EFFECTIVE_SUIT[trump][trick[0]]]
+            if following:
+                legal = following
+
+        maximizing = self.declaring[seat]
+        best = -1 if maximizing else 99
+        last_to_play = len(trick) == self.num_seats - 1
+
+        moves = self._moves(legal)
+        if trick and self.declaring[winner] == maximizing:
+            # Partner is winning the trick, try the low cards first
+            moves.reverse()
+
+        for card in moves:
+            if not trick:
+                card_ranks = RANK_TABLE[trump][EFFECTIVE_SUIT[trump][card]]
+                card_winner, card_winning_rank = seat, card_ranks[card]
+            else:
+                card_ranks = ranks
+                card_winner, card_winning_rank = winner, winning_rank
+                if ranks[card] > winning_rank:
+                    card_winner, card_winning_rank = seat, ranks[card]
+
+            self.hands[seat] ^= CARD_BIT[card]
+            trick.append(card)
+
+            if last_to_play:
+                # Trick complete, the winner leads the next one
+                won = 1 if self.declaring[card_winner] else 0
+                trick_cards = 0
+                for played in trick:
+                    trick_cards |= CARD_BIT[played]
+                self.live ^= trick_cards
+                value = won + self._search_trick(card_winner, alpha - won, beta - won)
+                self.live ^= trick_cards
+            else:
+                value = self._play(
+                    leader, (seat + 1) % self.num_seats, trick, card_ranks, card_winner, card_winning_rank, alpha, beta
+                )
+
+            trick.pop()
+            self.hands[seat] ^= CARD_BIT[card]
+
+            if maximizing:
+                if value > best:
+                    best = value
+                    alpha = max(alpha, value)
+            elif value < best:
+                best = value
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        return best
+
+    def _moves(self, legal):
+        """
+        Legal cards to try, highest first, skipping cards that touch a higher card already being tried
+        (no unplayed card of the suit ranks between them, so either one gives the same result)
+        """
+        moves = []
+        live = self.live
+        for suit_mask, order in SUIT_ORDERS[self.trump]:
+            if not legal & suit_mask:
+                continue
+
+            in_run = False
+            for card, bit in order:
+                if not live & bit:
+                    # Played in an earlier trick, it does not separate the cards around it
+                    continue
+                if legal & bit:
+                    if not in_run:
+                        moves.append(card)
+                    in_run = True
+                else:
+                    in_run = False
+        return moves
+
+
+def solve_hand(hands, trump_suit, leader, declarer, played_cards=None, max_entries=DEFAULT_TABLE_ENTRIES):
+    """
+    Most tricks the declaring side can still take with every hand visible and best play from both sides.
+
+    hands: {player: [cards]} with the players in play order, leaving out a partner who sits out. Cards are anything
+    with `rank` and `suit` (models.Card or bot_simulations.Card) and players anything with `team` (Player or Bot).
+    leader: the player who leads the next trick, or who led played_cards
+    declarer: any player on the declaring side
+    played_cards: PlayedCard objects already played to the current trick, the count includes that trick
+    """
+    players = list(hands)
+    declaring = [player.team == declarer.team for player in players]
+    masks = []
+    for player in players:
+        mask = 0
+        for card in hands[player]:
+            mask |= CARD_BIT[CARD_IDS[card.rank, card.suit]]
+        masks.append(mask)
+
+    trick = [CARD_IDS[played_card.card.rank, played_card.card.suit] for played_card in played_cards or []]
+    if played_cards:
+        leader = played_cards[0].player
+
+    solver = DoubleDummySolver(SUIT_INDEX[trump_suit], declaring, max_entries)
+    return solver.solve(masks, players.index(leader), trick)
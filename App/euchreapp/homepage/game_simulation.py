@@ -0,0 +1,145 @@
+"""
+Full game simulation: hands are played until a team reaches 10 points, like the web game.
+
+The first dealer is picked at random, the deal passes to the left after every hand and a hand
+where everyone passes twice is thrown in and redealt by the next dealer. Hands are played with
+MonteCarloSimulation.simulate_deal and scored with scoring.py, the same scoring the web game uses
+in models.update_game_results. Games are split over a process pool like run_parallel_simulation.
+
+    python -m homepage.game_simulation
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from .bot_simulations import MonteCarloSimulation
+from .hand_strength import use_hand_strength_table
+from .scoring import GAME_POINTS, game_winner
+from .simulation_stats import CONFIDENCE_Z, RunningStat, SimulationResult, wilson_interval
+
+
+class GameStats:
+    """
+    Game level results, mergeable between worker processes
+    """
+    def __init__(self):
+        self.games = 0
+        self.team1_wins = 0
+        self.first_dealer_wins = 0  # games won by the team that dealt the first hand
+        self.hands = RunningStat()  # hands played per game, not counting redeals
+        self.redeals = RunningStat()  # thrown in hands per game
+
+        # Points per hand for the dealing team and the other team, to see the dealer's advantage
+        self.dealer_team_points = RunningStat()
+        self.other_team_points = RunningStat()
+
+    def add_hand(self, dealer_team, team1_points, team2_points):
+        dealer_points, other_points = (team1_points, team2_points) if dealer_team == 1 else (team2_points, team1_points)
+        self.dealer_team_points.add(dealer_points)
+        self.other_team_points.add(other_points)
+
+    def add_game(self, winner, first_dealer_team, hands, redeals):
+        self.games += 1
+        self.team1_wins += winner == 1
+        self.first_dealer_wins += winner == first_dealer_team
+        self.hands.add(hands)
+        self.redeals.add(redeals)
+
+    def merge(self, other):
+        self.games += other.games
+        self.team1_wins += other.team1_wins
+        self.first_dealer_wins += other.first_dealer_wins
+        for name in ("hands", "redeals", "dealer_team_points", "other_team_points"):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def estimates(self, z=CONFIDENCE_Z):
+        return {
+            "game_win_rate:team1": wilson_interval(self.team1_wins, self.games, z),
+            "game_win_rate:first_dealer_team": wilson_interval(self.first_dealer_wins, self.games, z),
+            "hands_per_game": self.hands.estimate(z),
+            "redeals_per_game": self.redeals.estimate(z),
+            "points_per_hand:dealer_team": self.dealer_team_points.estimate(z),
+            "points_per_hand:other_team": self.other_team_points.estimate(z),
+        }
+
+
+class GameSimulation(MonteCarloSimulation):
+    def play_game(self, players, rng, counters, game_stats, first_dealer=None, target=GAME_POINTS):
+        """
+        Plays one game to `target` points with players seated in order (each player's left is the next one)
+        and returns the winning team
+        """
+        dealer = rng.randrange(len(players)) if first_dealer is None else first_dealer
+        first_dealer_team = 1 if players[dealer].team == 1 else 2
+
+        team1_points, team2_points = 0, 0
+        hands, redeals = 0, 0
+        while True:
+            # Left of the dealer bids and leads first, simulate_deal expects the dealer last
+            seated = players[dealer + 1:] + players[:dealer + 1]
+            points = self.simulate_deal(self.shuffled_deck(rng), seated, counters)
+            dealer_team = 1 if players[dealer].team == 1 else 2
+            dealer = (dealer + 1) % len(players)
+
+            if points is None:
+                redeals += 1
+                continue
+
+            hands += 1
+            game_stats.add_hand(dealer_team, *points)
+            team1_points += points[0]
+            team2_points += points[1]
+
+            winner = game_winner(team1_points, team2_points, target)
+            if winner:
+                game_stats.add_game(winner, first_dealer_team, hands, redeals)
+                return winner
+
+    def simulate_games(self, num_games, players, counters, rng):
+        game_stats = GameStats()
+        for _ in range(num_games):
+            self.play_game(players, rng, counters, game_stats)
+        return game_stats
+
+    def run_game_simulation(self, num_games=100000, workers=None, seed=0):
+        """
+        Plays num_games full games split over worker processes (seeded per shard like run_parallel_simulation) and
+        returns a SimulationResult with the game level estimates, see GameStats.estimates
+        """
+        workers = workers or os.cpu_count()
+        use_hand_strength_table()  # built here if missing, before the workers need it
+        shard_sizes = [num_games // workers + (1 if shard < num_games % workers else 0) for shard in range(workers)]
+        shard_seeds = [f"{seed}:{shard}" for shard in range(workers)]
+
+        counters = self.new_counters(self.create_bots())
+        game_stats = GameStats()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard_counters, shard_stats in executor.map(simulate_game_shard, shard_sizes, shard_seeds):
+                self.merge_counters(counters, shard_counters)
+                game_stats.merge(shard_stats)
+
+        result = SimulationResult(game_stats.games, game_stats.estimates(), counters)
+        self.print_game_results(result)
+        return result
+
+    def print_game_results(self, result):
+        print(f"Results after {result.num_simulations} games:")
+        for metric, estimate in result.estimates.items():
+            print(f"{metric}: {estimate.value:.4f} (95% CI {estimate.low:.4f} to {estimate.high:.4f})")
+
+
+def simulate_game_shard(num_games, seed):
+    """
+    One shard of GameSimulation.run_game_simulation, runs in a worker process
+    """
+    use_hand_strength_table()
+    simulation = GameSimulation()
+    players = simulation.create_bots()
+    counters = simulation.new_counters(players)
+    game_stats = simulation.simulate_games(num_games, players, counters, random.Random(seed))
+    return counters, game_stats
+
+
+if __name__ == "__main__":
+    GameSimulation().run_game_simulation(100000, seed=1)
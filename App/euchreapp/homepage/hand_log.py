@@ -0,0 +1,230 @@
+"""
+Append-only binary log of simulated hands, so a long simulation can be analysed again without
+replaying it.
+
+Every hand is one fixed-width record of card ids (see card_engine.py) and small counts. Seats are
+numbered 0-3 in the order the simulation seats the players, and the dealer is the last seat:
+
+    hands          20 bytes, the 5 cards dealt to each seat in seat order
+    up_card        the card turned up
+    dealer         dealer seat
+    caller         seat that called trump, 255 if everyone passed (the other seats passed)
+    call_round     1 or 2, 0 if everyone passed
+    trump          trump suit index, 255 if everyone passed
+    going_alone    1 if the caller went alone
+    discard        card the dealer discarded after picking up, 255 in round 2
+    plays          20 bytes, the card each seat played to tricks 1-5 (trick major), 255 for a seat sitting out
+    leaders        5 bytes, the seat that led each trick
+    team1_tricks, team2_tricks, team1_points, team2_points
+
+A hand everyone passes on has no plays and no points. The file starts with a 16 byte header and
+records are only ever appended, a record cut short by a crash is ignored when reading.
+
+    with HandLogWriter("hands.bin") as log:
+        MonteCarloSimulation().run_simulation(10000000, hand_log=log)
+    for record in HandLogReader("hands.bin"): ...
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# File layout: 16 byte header (magic, version, record size), then the records
+HEADER = struct.Struct("<8sII")
+MAGIC = b"EUCHLOG1"
+VERSION = 1
+
+RECORD = struct.Struct("<20s7B20s5s4B")
+
+# Stored for "none" in a one byte field (no caller, no discard, a seat that sat out)
+NONE = 255
+
+NUM_SEATS = 4
+NUM_TRICKS = 5
+
+HandRecord = namedtuple("HandRecord", [
+    "hands",  # tuple per seat of its 5 card ids
+    "up_card",
+    "dealer",
+    "caller",  # None if everyone passed
+    "call_round",  # None if everyone passed
+    "trump",  # None if everyone passed
+    "going_alone",
+    "discard",  # None unless the dealer picked up
+    "tricks",  # tuple per trick of (leader, tuple of the card each seat played or None)
+    "team1_tricks",
+    "team2_tricks",
+    "team1_points",
+    "team2_points",
+])
+
+
+def pack_record(hands, up_card, dealer, caller=None, call_round=None, trump=None, going_alone=False, discard=None,
+                tricks=(), team1_tricks=0, team2_tricks=0, team1_points=0, team2_points=0):
+    """
+    Record bytes for one hand, fields as in HandRecord (tricks may be empty for a hand everyone passed on)
+    """
+    plays = bytearray([NONE] * (NUM_TRICKS * NUM_SEATS))
+    leaders = bytearray([NONE] * NUM_TRICKS)
+    for trick_number, (leader, cards) in enumerate(tricks):
+        leaders[trick_number] = leader
+        for seat, card in enumerate(cards):
+            if card is not None:
+                plays[trick_number * NUM_SEATS + seat] = card
+
+    return RECORD.pack(
+        bytes(card for hand in hands for card in hand),
+        up_card,
+        dealer,
+        NONE if caller is None else caller,
+        call_round or 0,
+        NONE if trump is None else trump,
+        1 if going_alone else 0,
+        NONE if discard is None else discard,
+        bytes(plays),
+        bytes(leaders),
+        team1_tricks, team2_tricks, team1_points, team2_points,
+    )
+
+
+def unpack_record(buffer, offset=0):
+    (hands, up_card, dealer, caller, call_round, trump, going_alone, discard, plays, leaders,
+     team1_tricks, team2_tricks, team1_points, team2_points) = RECORD.unpack_from(buffer, offset)
+
+    tricks = tuple(
+        (leaders[trick_number], tuple(None if card == NONE else card for card in plays[trick_number * NUM_SEATS:(trick_number + 1) * NUM_SEATS]))
+        for trick_number in range(NUM_TRICKS) if leaders[trick_number] != NONE
+    )
+    return HandRecord(
+        tuple(tuple(hands[seat * 5:seat * 5 + 5]) for seat in range(NUM_SEATS)),
+        up_card,
+        dealer,
+        None if caller == NONE else caller,
+        call_round or None,
+        None if trump == NONE else trump,
+        bool(going_alone),
+        None if discard == NONE else discard,
+        tricks,
+        team1_tricks, team2_tricks, team1_points, team2_points,
+    )
+
+
+class HandLogWriter:
+    """
+    Appends records to a log file, creating it with its header if it is new
+    """
+    def __init__(self, path):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            check_header(path)
+
+        self.file = open(path, "ab")
+        if not exists:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            # Drop a record left half written by an earlier run so the new ones stay aligned
+            size = os.path.getsize(path)
+            partial = (size - HEADER.size) % RECORD.size
+            if partial:
+                self.file.truncate(size - partial)
+        self.records_written = 0
+
+    def write(self, record):
+        """ Appends one record from pack_record """
+        self.file.write(record)
+        self.records_written += 1
+
+    def write_from(self, path):
+        """
+        Appends every whole record of another log (a worker's shard) and deletes it
+        """
+        check_header(path)
+        with open(path, "rb") as shard:
+            shard.seek(HEADER.size)
+            while True:
+                chunk = shard.read(RECORD.size * 4096)
+                if not chunk:
+                    break
+                whole = len(chunk) - len(chunk) % RECORD.size
+                self.file.write(chunk[:whole])
+                self.records_written += whole // RECORD.size
+        os.remove(path)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a hand log")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} hand log")
+
+
+class HandLogReader:
+    """
+    Memory mapped, read-only view of a log: len(reader), reader[i] and iteration give HandRecords
+    """
+    def __init__(self, path):
+        check_header(path)
+        self.path = path
+        self.file = open(path, "rb")
+        self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = (len(self.mapped) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("hand log index out of range")
+        return unpack_record(self.mapped, HEADER.size + index * RECORD.size)
+
+    def __iter__(self):
+        mapped = self.mapped
+        for offset in range(HEADER.size, HEADER.size + self.count * RECORD.size, RECORD.size):
+            yield unpack_record(mapped, offset)
+
+    def raw(self):
+        """ The records as one memoryview of count * RECORD.size bytes, for bulk readers """
+        return memoryview(self.mapped)[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+    def close(self):
+        self.mapped.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    import sys
+
+    with HandLogReader(sys.argv[1]) as reader:
+        calls = loners = team1_points = team2_points = 0
+        for record in reader:
+            calls += record.caller is not None
+            loners += record.going_alone
+            team1_points += record.team1_points
+            team2_points += record.team2_points
+
+        hands = max(len(reader), 1)
+        print(f"{len(reader)} hands, {calls / hands:.2%} called, {loners / hands:.2%} alone, "
+              f"points per hand {team1_points / hands:.4f} (team 1) {team2_points / hands:.4f} (team 2)")
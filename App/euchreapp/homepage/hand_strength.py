@@ -0,0 +1,172 @@
+"""
+Precomputed hand strength table for BotLogic.evaluate_hand.
+
+evaluate_hand is a pure function of a 5 card hand and the trump suit, so every one of the
+C(24,5) = 42,504 hands is scored once for each of the 4 trump suits and saved to disk. The
+table keeps the three parts of the score (trump, aces and voids strength) so the strategy
+weights can still be changed without rebuilding it.
+
+The table is not built when the app starts. Build it with the management command, or by
+running this file (the bot simulation scripts also build it if it is missing or out of date):
+
+    python manage.py build_hand_strength
+    python -m homepage.hand_strength
+
+The header records SCORING_VERSION, a table built by an older version of the scoring code is
+not loaded (bots score hands directly until it is rebuilt).
+"""
+import mmap
+import os
+import struct
+from array import array
+from collections import namedtuple
+from itertools import combinations
+from math import comb
+
+from .card_engine import CARD_IDS, NUM_CARDS, NUM_SUITS, RANKS, SUITS, SUIT_INDEX, cards_in_mask
+
+HAND_SIZE = 5
+HAND_COUNT = comb(NUM_CARDS, HAND_SIZE)  # 42,504
+NUM_COMPONENTS = 3  # trump strength, aces strength, voids strength
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hand_strength.bin")
+
+# File layout: 24 byte header, then float64 values ordered [hand index][trump suit][component]
+HEADER = struct.Struct("<8sIIII")  # magic, scoring version, hand count, suits, padding
+MAGIC = b"EUCHHS02"
+
+# Bump when BotLogic.evaluate_trump, evaluate_aces or evaluate_voids change, so saved tables are rebuilt
+SCORING_VERSION = 1
+
+# BINOM[n][k] for the combinatorial number system used to index hands
+BINOM = [[comb(n, k) for k in range(HAND_SIZE + 1)] for n in range(NUM_CARDS + 1)]
+
+# Lightweight card used while building the table, only rank and suit are needed by evaluate_hand
+TableCard = namedtuple("TableCard", ["rank", "suit"])
+
+
+def hand_index(card_ids):
+    """
+    Index (0 to 42,503) of a 5 card hand given its card ids in any order
+    """
+    c0, c1, c2, c3, c4 = sorted(card_ids)
+    return BINOM[c0][1] + BINOM[c1][2] + BINOM[c2][3] + BINOM[c3][4] + BINOM[c4][5]
+
+
+def hand_index_from_mask(mask):
+    return hand_index(cards_in_mask(mask))
+
+
+class HandStrengthTable:
+    def __init__(self, values, source=None):
+        # `values` is any float64 sequence indexed like the file body (a memoryview when memory mapped)
+        self.values = values
+        self.source = source
+
+    def __len__(self):
+        return HAND_COUNT
+
+    def components_for_index(self, index, trump):
+        """ (trump strength, aces strength, voids strength) for a hand index and trump suit index. """
+        offset = (index * NUM_SUITS + trump) * NUM_COMPONENTS
+        values = self.values
+        return values[offset], values[offset + 1], values[offset + 2]
+
+    def components(self, hand, trump_suit):
+        """ Same values as evaluate_trump, evaluate_aces and evaluate_voids for a list of 5 cards. """
+        index = hand_index([CARD_IDS[card.rank, card.suit] for card in hand])
+        return self.components_for_index(index, SUIT_INDEX[trump_suit])
+
+
+def build_hand_strength_values():
+    """
+    Scores every hand in every trump suit with BotLogic and returns the values in file order
+    """
+    from .bot_logic import BotLogic
+
+    bot = BotLogic()
+    deck = [TableCard(rank, suit) for suit in SUITS for rank in RANKS]
+    values = array("d", bytes(8 * HAND_COUNT * NUM_SUITS * NUM_COMPONENTS))
+
+    for card_ids in combinations(range(NUM_CARDS), HAND_SIZE):
+        hand = [deck[card_id] for card_id in card_ids]
+        offset = hand_index(card_ids) * NUM_SUITS * NUM_COMPONENTS
+
+        for trump_suit in SUITS:
+            values[offset] = bot.evaluate_trump(hand, trump_suit)
+            values[offset + 1] = bot.evaluate_aces(hand, trump_suit)
+            values[offset + 2] = bot.evaluate_voids(hand, trump_suit)
+            offset += NUM_COMPONENTS
+
+    return values
+
+
+def save_hand_strength_table(path=TABLE_PATH):
+    """
+    Builds the table and writes it to disk
+    """
+    values = build_hand_strength_values()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SCORING_VERSION, HAND_COUNT, NUM_SUITS, 0))
+        values.tofile(f)
+    os.replace(temp_path, path)
+
+    return path
+
+
+def open_hand_strength_table(path=TABLE_PATH):
+    """
+    Memory maps a saved table. Returns None if the file is missing, was built for a different layout or
+    by a different SCORING_VERSION.
+    """
+    expected_size = HEADER.size + 8 * HAND_COUNT * NUM_SUITS * NUM_COMPONENTS
+    if not os.path.exists(path) or os.path.getsize(path) != expected_size:
+        return None
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, scoring_version, hand_count, num_suits, _ = HEADER.unpack_from(mapped)
+    if magic != MAGIC or scoring_version != SCORING_VERSION or hand_count != HAND_COUNT or num_suits != NUM_SUITS:
+        mapped.close()
+        return None
+
+    return HandStrengthTable(memoryview(mapped)[HEADER.size:].cast("d"), source=path)
+
+
+# Table shared by every bot in the process, see load_hand_strength_table()
+_table = None
+
+
+def load_hand_strength_table(path=TABLE_PATH, build_if_missing=False):
+    """
+    Loads the table used by BotLogic.evaluate_hand. Bots fall back to scoring hands directly when no table is loaded.
+    With build_if_missing, a missing or out of date table is built first.
+    """
+    global _table
+
+    _table = open_hand_strength_table(path)
+    if _table is None and build_if_missing:
+        save_hand_strength_table(path)
+        _table = open_hand_strength_table(path)
+    return _table
+
+
+def get_hand_strength_table():
+    return _table
+
+
+def use_hand_strength_table():
+    """
+    The loaded table, loading it (built if missing or out of date) the first time. Called by the simulation
+    entry points and worker processes rather than on import, since building takes a few seconds.
+    """
+    return _table if _table is not None else load_hand_strength_table(build_if_missing=True)
+
+
+if __name__ == "__main__":
+    print(f"Scoring {HAND_COUNT} hands in {NUM_SUITS} trump suits...")
+    print(f"Saved hand strength table to {save_hand_strength_table()}")
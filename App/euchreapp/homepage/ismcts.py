@@ -0,0 +1,477 @@
+"""
+Information set Monte Carlo tree search (ISMCTS) bot.
+
+ISMCTSStrategy can make both of the bot decisions, calling trump (choose_trump, in place of
+BotLogic.determine_trump) and playing a card (choose_card, in place of BotLogic.determine_best_card).
+
+Each iteration deals the cards the bot cannot see at random (a determinization, consistent with
+the voids shown so far), walks down the tree picking moves that are legal in that deal with UCB1
+(counting how often each move was available, as moves depend on the hidden cards), adds one new
+node, plays the rest of the round out at random and scores the round points for every mover on
+the way back up. The search stops after max_iterations or time_limit seconds, whichever comes
+first, and the most visited move is played.
+
+Nodes are stored in parallel arrays (NodeStore) rather than one object per node, and the tree
+for card play is kept between the tricks of a round: on the next decision the bot walks down
+the cards played since and carries on from that subtree.
+"""
+import math
+import random
+import time
+from array import array
+
+from .bot_logic import BotLogic
+from .card_engine import (
+    CARD_BIT, CARD_IDS, CARD_RANK, CARD_SUIT, ACE, EFFECTIVE_SUIT, FULL_DECK, NO_LEAD, NUM_SUITS, RANK_TABLE, SUITS,
+    SUIT_INDEX, SUIT_MASK, TRUMP_MASK, cards_in_mask, hand_mask
+)
+from .pimc import read_position, sample_hands
+from .strategies import Strategy
+
+
+# Moves are small ints so a node's children fit in one bitmask: card ids 0-23 for card play, then the bids
+PASS = 24
+CALL = 25  # CALL + suit index
+CALL_ALONE = 29  # CALL_ALONE + suit index
+
+NO_NODE = -1
+
+
+def bid_move(decision, going_alone):
+    """ Move for a (decision, going_alone) pair as returned by determine_trump """
+    if decision == "pass":
+        return PASS
+    return (CALL_ALONE if going_alone else CALL) + SUIT_INDEX[decision]
+
+
+def bid_decision(move):
+    """ (decision, going_alone) for a bid move, the same values determine_trump returns """
+    if move == PASS:
+        return "pass", False
+    if move >= CALL_ALONE:
+        return SUITS[move - CALL_ALONE], True
+    return SUITS[move - CALL], False
+
+
+def worst_card(mask, trump):
+    """
+    Card id BotLogic.get_worst_card discards from a hand mask (hands are in card id order, so ties go to the lowest id)
+    """
+    ranks = RANK_TABLE[trump][NO_LEAD]
+    non_trump = mask & ~TRUMP_MASK[trump]
+    if not non_trump:
+        return min(cards_in_mask(mask), key=lambda card: ranks[card])
+
+    # Singleton non trump cards (not Aces) would leave a void
+    possible_voids = []
+    for card in cards_in_mask(non_trump):
+        in_suit = non_trump & SUIT_MASK[trump][CARD_SUIT[card]]
+        if in_suit.bit_count() == 1 and CARD_RANK[card] != ACE:
+            possible_voids.append(card)
+
+    return min(possible_voids or cards_in_mask(non_trump), key=lambda card: ranks[card])
+
+
+def _random_move(rng, moves):
+    moves = cards_in_mask(moves)
+    return moves[rng.randrange(len(moves))]
+
+
+class NodeStore:
+    """
+    Search tree kept as parallel arrays indexed by node number, node 0 is the root.
+
+    Children are a linked list (first_child, next_sibling) and child_moves is a bitmask of the moves
+    a node already has children for. Each node records the move that led to it and the seat that made
+    it, with `reward` summed from that seat's point of view.
+    """
+    def __init__(self):
+        self.parent = array('i')
+        self.move = array('b')
+        self.mover = array('b')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.child_moves = array('q')
+        self.visits = array('i')
+        self.available = array('i')
+        self.reward = array('d')
+        self.add(NO_NODE, -1, -1)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, move, mover):
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.move.append(move)
+        self.mover.append(mover)
+        self.first_child.append(NO_NODE)
+        self.child_moves.append(0)
+        self.visits.append(0)
+        self.available.append(0)
+        self.reward.append(0.0)
+
+        if parent == NO_NODE:
+            self.next_sibling.append(NO_NODE)
+        else:
+            self.next_sibling.append(self.first_child[parent])
+            self.first_child[parent] = node
+            self.child_moves[parent] |= 1 << move
+        return node
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def child(self, node, move):
+        """ Child of node reached by move, NO_NODE if it has not been expanded """
+        if not self.child_moves[node] >> move & 1:
+            return NO_NODE
+        for child in self.children(node):
+            if self.move[child] == move:
+                return child
+        return NO_NODE
+
+    def subtree(self, root):
+        """
+        Copy of the tree below `root` with `root` as the new node 0, everything else is dropped
+        """
+        tree = NodeStore()
+        tree.visits[0] = self.visits[root]
+        tree.available[0] = self.available[root]
+        tree.reward[0] = self.reward[root]
+
+        pending = [(root, 0)]
+        while pending:
+            old, new = pending.pop()
+            # Children are re-added in reverse so the linked lists keep their order
+            for child in reversed(list(self.children(old))):
+                copy = tree.add(new, self.move[child], self.mover[child])
+                tree.visits[copy] = self.visits[child]
+                tree.available[copy] = self.available[child]
+                tree.reward[copy] = self.reward[child]
+                pending.append((child, copy))
+        return tree
+
+
+class PlayState:
+    """
+    Card play from some point in a round with every hand known, seats are indexes into the players in play order
+    """
+    def __init__(self, hands, trump, calling_side, going_alone, leader, trick=(), caller_tricks=0):
+        self.hands = list(hands)
+        self.trump = trump
+        self.calling_side = calling_side  # True for the seats on the team that called trump
+        self.going_alone = going_alone
+        self.num_seats = len(self.hands)
+        self.caller_tricks = caller_tricks
+        self.tricks_left = max(hand.bit_count() for hand in self.hands)  # counting the trick in progress
+
+        self.leader = leader
+        self.trick = []
+        self.lead = NO_LEAD
+        self.winner = leader
+        self.winning_rank = -1
+        self.seat = leader
+        for card in trick:
+            self._add_to_trick(card)
+
+    def finished(self):
+        return self.tricks_left == 0
+
+    def to_move(self):
+        return self.seat
+
+    def legal(self):
+        hand = self.hands[self.seat]
+        if self.lead == NO_LEAD:
+            return hand
+        following = hand & SUIT_MASK[self.trump][self.lead]
+        return following if following else hand
+
+    def apply(self, card):
+        self.hands[self.seat] ^= CARD_BIT[card]
+        self._add_to_trick(card)
+
+        if len(self.trick) == self.num_seats:
+            # Trick complete, the winner leads the next one
+            if self.calling_side[self.winner]:
+                self.caller_tricks += 1
+            self.tricks_left -= 1
+            self.leader = self.seat = self.winner
+            self.trick = []
+            self.lead = NO_LEAD
+            self.winning_rank = -1
+
+    def _add_to_trick(self, card):
+        if not self.trick:
+            self.lead = EFFECTIVE_SUIT[self.trump][card]
+        rank = RANK_TABLE[self.trump][self.lead][card]
+        if rank > self.winning_rank:
+            self.winner, self.winning_rank = self.seat, rank
+        self.trick.append(card)
+        self.seat = (self.seat + 1) % self.num_seats
+
+    def reward(self, seat):
+        """
+        Round points for the seat's team less the other team's, scaled to 0-1
+        """
+        if self.caller_tricks >= 3:
+            caller_points = 4 if self.going_alone and self.caller_tricks == 5 else (2 if self.caller_tricks == 5 else 1)
+        else:
+            caller_points = -2
+        points = caller_points if self.calling_side[seat] else -caller_points
+        return (points + 4) / 8
+
+
+class BidState:
+    """
+    A round from the bidding on with every hand known. Seats are in bidding order, 0 left of the dealer and 3 the
+    dealer. When someone calls, card play carries on in a PlayState (`play`) over the seats still in the hand.
+    """
+    def __init__(self, hands, up_card):
+        self.hands = list(hands)
+        self.up_card = up_card
+        self.up_suit = CARD_SUIT[up_card]
+        self.bids = 0  # bids made so far, 4 per bidding round
+        self.play = None
+        self.seats = None  # bidding seat for each PlayState seat
+
+    def finished(self):
+        return self.play is not None and self.play.finished()
+
+    def to_move(self):
+        if self.play is None:
+            return self.bids % 4
+        return self.seats[self.play.seat]
+
+    def legal(self):
+        if self.play is not None:
+            return self.play.legal()
+
+        if self.bids < 4:
+            return 1 << PASS | 1 << CALL + self.up_suit | 1 << CALL_ALONE + self.up_suit
+
+        moves = 0
+        for suit in range(NUM_SUITS):
+            if suit != self.up_suit:
+                moves |= 1 << CALL + suit | 1 << CALL_ALONE + suit
+        # The dealer has to call in the second round
+        if self.bids < 7:
+            moves |= 1 << PASS
+        return moves
+
+    def apply(self, move):
+        if self.play is not None:
+            self.play.apply(move)
+            return
+
+        caller = self.bids % 4
+        self.bids += 1
+        if move == PASS:
+            return
+
+        going_alone = move >= CALL_ALONE
+        trump = move - (CALL_ALONE if going_alone else CALL)
+
+        hands = list(self.hands)
+        if self.bids <= 4:
+            # Ordered up, the dealer picks up the up card and discards
+            hands[3] |= CARD_BIT[self.up_card]
+            hands[3] ^= CARD_BIT[worst_card(hands[3], trump)]
+
+        self.seats = [seat for seat in range(4) if not (going_alone and seat == caller ^ 2)]
+        calling_side = [seat & 1 == caller & 1 for seat in self.seats]
+        self.play = PlayState([hands[seat] for seat in self.seats], trump, calling_side, going_alone, 0)
+
+    def reward(self, seat):
+        return self.play.reward(self.seats.index(seat) if seat in self.seats else self.seats.index(seat ^ 2))
+
+
+class ISMCTSStrategy(Strategy):
+    def __init__(self, max_iterations=2000, time_limit=0.25, max_nodes=100000, exploration=0.7, seed=0):
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit  # seconds per decision, None for no limit
+        self.max_nodes = max_nodes  # no new nodes are added past this, iterations carry on
+        self.exploration = exploration
+        self.seed = seed
+
+        # Card play tree kept per player for the rest of the round: name -> (round key, card ids played, NodeStore)
+        self.trees = {}
+
+        # Stats for the last decision
+        self.iterations_used = 0
+        self.nodes_reused = 0
+
+    def choose_trump(self, player, hand, dealer, up_card, player_order, trump_round):
+        """
+        Same arguments and result as BotLogic.determine_trump, for `player`
+        """
+        seat = player_order.index(player)
+        up = CARD_IDS[up_card.rank, up_card.suit]
+        own = hand_mask(hand)
+
+        # Everyone before this player passed, in both rounds if this is the second
+        bids = seat + (4 if trump_round == "2" else 0)
+        unseen = cards_in_mask(FULL_DECK & ~own & ~CARD_BIT[up])
+
+        def deal(rng):
+            # The other three hands come from the unseen cards, the last 3 of them are the rest of the kitty
+            rng.shuffle(unseen)
+            hands = [0] * 4
+            dealt = 0
+            for other in range(4):
+                if other == seat:
+                    hands[other] = own
+                    continue
+                for card in unseen[dealt:dealt + 5]:
+                    hands[other] |= CARD_BIT[card]
+                dealt += 5
+
+            state = BidState(hands, up)
+            for _ in range(bids):
+                state.apply(PASS)
+            return state
+
+        rng = random.Random(f"{self.seed}:{own}:{up}:{bids}")
+        tree = NodeStore()
+        self._search(tree, deal, rng)
+
+        # The bids open to the player do not depend on the deal
+        return bid_decision(self._best_move(tree, deal(rng).legal()))
+
+    def choose_card(self, player, players, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won,
+                    up_card=None, dealer=None, picked_up=False):
+        """
+        Same arguments and result as BotLogic.determine_best_card, plus the player choosing and `players`, everyone
+        taking part in the hand in play order, and the up card as for SamplingStrategy.choose_card
+        """
+        position = read_position(player, players, hand, trump_suit, played_cards, previous_tricks, up_card, dealer, picked_up)
+        choices = position.choices
+        if len(choices) == 1:
+            return choices[0]
+
+        calling_side = [other.team == trump_caller.team for other in players]
+        tricks_played = 5 - len(hand)
+        caller_tricks = tricks_won if player.team == trump_caller.team else tricks_played - tricks_won
+
+        # Every card played this round in order, the tree is reused if it was grown from earlier in the same sequence
+        plays = []
+        for trick_number in sorted(previous_tricks):
+            plays.extend(CARD_IDS[played_card.card.rank, played_card.card.suit] for played_card in previous_tricks[trick_number])
+        plays.extend(position.trick)
+
+        round_key = (trump_suit, trump_caller.name, going_alone, tuple(other.name for other in players))
+        tree = self._reuse_tree(player.name, round_key, plays, position.own)
+        self.nodes_reused = len(tree) - 1
+
+        def deal(rng):
+            hands = sample_hands(rng, position)
+            if hands is None:
+                return None
+            return PlayState(hands, position.trump, calling_side, going_alone, position.leader, position.trick, caller_tricks)
+
+        rng = random.Random(f"{self.seed}:{position.own}:{position.seen}:{position.seat}")
+        self._search(tree, deal, rng)
+        self.trees[player.name] = (round_key, plays, tree)
+
+        if tree.first_child[0] == NO_NODE:
+            return BotLogic.determine_best_card(player, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+
+        move = self._best_move(tree, hand_mask(choices))
+        return next(card for card in choices if CARD_IDS[card.rank, card.suit] == move)
+
+    def _reuse_tree(self, name, round_key, plays, own):
+        """
+        The player's tree from earlier in this round moved down to the current position, or a new tree
+        """
+        if name in self.trees:
+            old_key, old_plays, tree = self.trees[name]
+            if old_key == round_key and len(old_plays) < len(plays) and plays[:len(old_plays)] == old_plays:
+                node = 0
+                for card in plays[len(old_plays):]:
+                    node = tree.child(node, card)
+                    if node == NO_NODE:
+                        break
+                else:
+                    return tree.subtree(node)
+
+        return NodeStore()
+
+    def _search(self, tree, deal, rng):
+        """
+        Runs iterations from the root of `tree`, `deal(rng)` returns a new determinization of the root position
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit is not None else None
+        exploration = self.exploration
+
+        parent, move, mover, first_child, next_sibling = tree.parent, tree.move, tree.mover, tree.first_child, tree.next_sibling
+        child_moves, visits, available, reward = tree.child_moves, tree.visits, tree.available, tree.reward
+
+        self.iterations_used = 0
+        while self.iterations_used < self.max_iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            state = deal(rng)
+            if state is None:
+                break
+
+            # Selection and expansion
+            node = 0
+            path = [0]
+            while not state.finished():
+                legal = state.legal()
+
+                # Every child whose move is legal in this deal was available to choose
+                best, best_score = NO_NODE, -1.0
+                child = first_child[node]
+                while child != NO_NODE:
+                    if legal >> move[child] & 1:
+                        available[child] += 1
+                        score = reward[child] / visits[child] + exploration * math.sqrt(math.log(available[child]) / visits[child])
+                        if score > best_score:
+                            best, best_score = child, score
+                    child = next_sibling[child]
+
+                untried = legal & ~child_moves[node]
+                if untried and len(tree) < self.max_nodes:
+                    card = _random_move(rng, untried)
+                    seat = state.to_move()
+                    state.apply(card)
+                    node = tree.add(node, card, seat)
+                    available[node] = 1
+                    path.append(node)
+                    break
+                if best == NO_NODE:
+                    # Out of room for new nodes
+                    break
+
+                state.apply(move[best])
+                node = best
+                path.append(node)
+
+            # Play the rest of the round out at random
+            while not state.finished():
+                state.apply(_random_move(rng, state.legal()))
+
+            visits[0] += 1
+            for node in path[1:]:
+                visits[node] += 1
+                reward[node] += state.reward(mover[node])
+
+            self.iterations_used += 1
+
+    def _best_move(self, tree, legal):
+        """
+        Most visited legal move at the root, the lowest move on ties
+        """
+        best, best_visits = None, -1
+        for child in tree.children(0):
+            move = tree.move[child]
+            if legal >> move & 1 and (tree.visits[child] > best_visits or tree.visits[child] == best_visits and move < best):
+                best, best_visits = move, tree.visits[child]
+        return best
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from homepage.hand_strength import HAND_COUNT, NUM_SUITS, TABLE_PATH, load_hand_strength_table, save_hand_strength_table
+
+
+class Command(BaseCommand):
+    help = "Builds the precomputed hand strength table used by the bots (homepage/data/hand_strength.bin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=TABLE_PATH, help="Where to write the table")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Scoring {HAND_COUNT} hands in {NUM_SUITS} trump suits...")
+        path = save_hand_strength_table(options["path"])
+        load_hand_strength_table(path)
+        self.stdout.write(self.style.SUCCESS(f"Saved hand strength table to {path}"))
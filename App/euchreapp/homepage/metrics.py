@@ -0,0 +1,220 @@
+"""
+Counters and latency histograms for the web game, served in the Prometheus text format at /metrics.
+
+    euchre_bot_decision_seconds{decision="trump"|"card", bot="rules"|"sampling"|"ismcts"}
+    euchre_round_seconds                          start_euchre_round, all five tricks
+    euchre_view_seconds{view="<url name>"}        every view in homepage/views.py
+    euchre_view_responses_total{view, status}
+
+Turned on with settings.EUCHRE_METRICS["ENABLED"]. The flag is read once and kept in a module
+global (a Django settings lookup costs close to a microsecond), refreshed when override_settings
+changes it. When it is off timer() hands back a shared context manager that does nothing, timed()
+calls straight through and MetricsMiddleware removes itself at startup, so an instrumented call
+costs one global check.
+
+Metrics are kept in each process's memory, so under a multi-process server every worker reports
+its own and they reset on restart.
+"""
+import bisect
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Histogram bucket upper bounds in seconds, from a fast trump decision up to a slow search bot round
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    # name: (type, help text)
+    "euchre_bot_decision_seconds": ("histogram", "Time taken by a bot to decide on trump or a card to play"),
+    "euchre_round_seconds": ("histogram", "Time taken by start_euchre_round to play out a round"),
+    "euchre_view_seconds": ("histogram", "Time taken by each homepage view"),
+    "euchre_view_responses_total": ("counter", "Responses from each homepage view by status code"),
+}
+
+
+# settings.EUCHRE_METRICS["ENABLED"], None until it is first read
+_enabled = None
+
+
+def metrics_enabled():
+    global _enabled
+    if _enabled is None:
+        _enabled = bool(getattr(settings, "EUCHRE_METRICS", {}).get("ENABLED", False))
+    return _enabled
+
+
+@receiver(setting_changed)
+def reset_metrics_enabled(setting, **kwargs):
+    global _enabled
+    if setting == "EUCHRE_METRICS":
+        _enabled = None
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # per bucket (not cumulative), the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Histograms and counters keyed by (metric name, labels), labels being a sorted tuple of (label, value) pairs
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, labels=()):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, labels=(), amount=1):
+        with self.lock:
+            self.counters[name, labels] = self.counters.get((name, labels), 0) + amount
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self):
+        """
+        Every metric in the Prometheus text exposition format
+        """
+        with self.lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            series = histograms if metric_type == "histogram" else counters
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for key in keys:
+                labels = key[1]
+                if metric_type == "counter":
+                    lines.append(f"{name}{format_labels(labels)} {series[key]}")
+                    continue
+
+                counts, total, count, buckets = series[key]
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{label}="{escape_label_value(value)}"' for label, value in labels) + "}"
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Shared by every request in the process
+registry = MetricsRegistry()
+
+
+class Timer:
+    """
+    Context manager adding the time spent inside it to a histogram
+    """
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+def timer(name, **labels):
+    """
+    with timer("euchre_bot_decision_seconds", decision="card", bot="rules"): ...
+    """
+    if not metrics_enabled():
+        return NULL_TIMER
+    return Timer(name, tuple(sorted(labels.items())))
+
+
+def timed(name, **labels):
+    """
+    Decorator timing every call of a function into a histogram
+    """
+    label_items = tuple(sorted(labels.items()))
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics_enabled():
+                return function(*args, **kwargs)
+            with Timer(name, label_items):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Times every view in homepage/views.py and counts its responses by status code. Not used when metrics are off.
+    """
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        # The URL is only resolved inside get_response, so the view is known afterwards
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.func.__module__ == "homepage.views":
+            view = match.url_name or match.func.__name__
+            registry.observe("euchre_view_seconds", elapsed, (("view", view),))
+            registry.increment("euchre_view_responses_total", (("status", str(response.status_code)), ("view", view)))
+
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0014_alter_hand_trump_suit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='session_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='game',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='players', to='homepage.game'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='partner',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='team',
+            field=models.IntegerField(default=0),
+        ),
+    ]
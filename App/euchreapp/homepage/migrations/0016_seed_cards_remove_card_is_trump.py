@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_cards(apps, schema_editor):
+    """ Creates whichever of the 24 cards are missing """
+    Card = apps.get_model('homepage', 'Card')
+    existing = set(Card.objects.values_list('rank', 'suit'))
+    Card.objects.bulk_create([
+        Card(suit=suit, rank=rank)
+        for suit in ['hearts', 'diamonds', 'clubs', 'spades']
+        for rank in ['9', '10', 'J', 'Q', 'K', 'A']
+        if (rank, suit) not in existing
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0015_game_session_key_player_game_partner_team'),
+    ]
+
+    operations = [
+        # The 24 cards are created once here instead of by the views, and are never rewritten
+        migrations.RunPython(create_cards, migrations.RunPython.noop),
+        # Trump depends on the game, see Card.is_trump
+        migrations.RemoveField(
+            model_name='card',
+            name='is_trump',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0016_seed_cards_remove_card_is_trump'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playedcard',
+            index=models.Index(fields=['hand', 'player'], name='playedcard_hand_player_idx'),
+        ),
+    ]
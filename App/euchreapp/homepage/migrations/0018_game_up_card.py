@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0017_playedcard_hand_player_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='up_card',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='homepage.card'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='up_card_picked_up',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,8 +1,15 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.db.models import Max
 from random import shuffle
 from django.http import JsonResponse
 from .bot_logic import BotLogic
+from .card_registry import all_cards, get_card
+from .ismcts import ISMCTSStrategy
+from .metrics import timed, timer
+from .pimc import SamplingStrategy
+from .scoring import game_winner, round_points
+from .trick_history import TrickHistory
 import time
 import traceback
 
@@ -10,11 +17,21 @@ import traceback
 # Create your models here.
 # These will automatically create a database model to use the built in sqlite3
 
+# The four seats at a table, in seat order. Every game gets its own Player rows with these names.
+SEATS = [
+    {"name": "Player", "is_human": True, "team": 1, "partner": "Team Mate"},
+    {"name": "Opponent1", "is_human": False, "team": 2, "partner": "Opponent2"},
+    {"name": "Team Mate", "is_human": False, "team": 1, "partner": "Player"},
+    {"name": "Opponent2", "is_human": False, "team": 2, "partner": "Opponent1"},
+]
+
+
 class Player(models.Model, BotLogic):
     name = models.CharField(max_length=100)
     is_human = models.BooleanField(default=False)
     team = models.IntegerField(default=0)
     partner = models.CharField(max_length=100, default="")
+    game = models.ForeignKey('Game', on_delete=models.CASCADE, null=True, blank=True, related_name='players')  # Null for seats from before every game had its own
 
     def __str__(self):
         return self.name
@@ -31,10 +48,26 @@ class Game(models.Model):
     )
     team1_points = models.IntegerField(default=0)  # Points for Human + Bot2
     team2_points = models.IntegerField(default=0)  # Points for Bot1 + Bot3
+    session_key = models.CharField(max_length=40, blank=True, default="", db_index=True)  # Browser session playing this game
+    # Card turned up for trump in the current hand and whether the dealer picked it up, set by accept_trump
+    up_card = models.ForeignKey('Card', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    up_card_picked_up = models.BooleanField(default=False)
 
     def __str__(self):
         return f"Game {self.id} started at {self.created_at}"
 
+    def seats(self):
+        """
+        This game's players in seat order
+        """
+        return list(self.players.order_by('id'))
+
+    def create_seats(self):
+        """
+        Creates this game's four players (see SEATS) and returns them in seat order
+        """
+        return Player.objects.bulk_create([Player(game=self, **seat) for seat in SEATS])
+
 
 class Hand(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='hands')
@@ -66,13 +99,12 @@ class Card(models.Model):
 
     suit = models.CharField(max_length=10, choices=SUITS)
     rank = models.CharField(max_length=5, choices=RANKS)
-    is_trump = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('suit', 'rank')  # Prevent duplicates
 
     def __str__(self):
-        return f"{self.rank} of {self.suit}" + (" (Trump)" if self.is_trump else "")
+        return f"{self.rank} of {self.suit}"
         
     def next_suit(self):
         return self.SUIT_PAIRS[self.suit]
@@ -83,6 +115,10 @@ class Card(models.Model):
     def is_left_bower(self, trump_suit):
         return self.suit == self.SUIT_PAIRS[trump_suit] and self.rank == "J"
 
+    def is_trump(self, trump_suit):
+        """ Cards are shared by every game, so trump is worked out from the game's trump suit """
+        return trump_suit is not None and (self.suit == trump_suit or self.is_left_bower(trump_suit))
+
     @property
     def suit_name(self):
         return dict(self.SUITS)[self.suit]
@@ -97,6 +133,10 @@ class PlayedCard(models.Model):
     # REMOVE UNIQUE CONSTRAINT
     class Meta:
         unique_together = None  # REMOVE ANY UNIQUE CONSTRAINTS ON THIS MODEL
+        indexes = [
+            # A player's cards in a hand: filter(hand=..., player=...), and every card of a hand or of a game's hands
+            models.Index(fields=['hand', 'player'], name='playedcard_hand_player_idx'),
+        ]
 
     def __str__(self):
         return f"{self.player.name} played {self.card.rank} of {self.card.suit} in Game {self.hand.game.id}"
@@ -114,27 +154,19 @@ class GameResult(models.Model):
     
 # Helper functions to make the game work correctly
 
-def initialize_game(players):
+def initialize_game(players, session_key=""):
     """
     Initializes the game and returns a shuffled deck of cards.
     """
-    # Clear existing cards to ensure no duplicates
-    Card.objects.all().delete()
-
-    # Create a full deck of unique cards
-    deck = []
-    for suit, _ in Card.SUITS:
-        for rank, _ in Card.RANKS:
-            card = Card.objects.create(suit=suit, rank=rank)
-            deck.append(card)
+    # The cards are seeded by a migration and shared by every game
+    deck = all_cards()
     shuffle(deck)
 
     # Create the game
-    game = Game.objects.create()
+    game = Game.objects.create(session_key=session_key)
 
-    # Create players (avoid duplicates)
-    for player in players:
-        Player.objects.get_or_create(name=player["name"], is_human=player["is_human"])
+    # Create the game's players
+    Player.objects.bulk_create([Player(game=game, name=player["name"], is_human=player["is_human"]) for player in players])
 
     return game, deck
 
@@ -158,12 +190,13 @@ def deal_hand(deck, players, game):
         if deck_size < len(players) * 5:
             return JsonResponse({"error": "Not enough unique cards left in deck!"}, status=500)
 
-        # **Step 2: Create a new hand**
-        hand = Hand.objects.create(game=game, dealer=game.dealer, trump_suit=game.trump_suit or None)
+        # **Step 2: Create a new hand** (saved with its cards once every card is assigned)
+        hand = Hand(game=game, dealer=game.dealer, trump_suit=game.trump_suit or None)
 
         # **Step 3: Assign Cards**
         hands = {player: [] for player in players}
         assigned_cards = set()
+        dealt_cards = []
 
         for _ in range(5):  
             for player in players:
@@ -183,12 +216,17 @@ def deal_hand(deck, players, game):
                 assigned_cards.add(card)
                 hands[player].append(card)
 
-                PlayedCard.objects.create(
+                dealt_cards.append(PlayedCard(
                     player=player,
                     card=card,
                     hand=hand,
                     order=len(hands[player])
-                )
+                ))
+
+        # **Step 4: Save the hand and all 20 cards together**
+        with transaction.atomic():
+            hand.save()
+            PlayedCard.objects.bulk_create(dealt_cards)
 
         # Debugging: Print hands before returning
         print(f"🔥 DEBUG: Hands dealt: {hands}")
@@ -203,16 +241,6 @@ def deal_hand(deck, players, game):
 
 
 
-def assign_trump(deck, trump_suit):
-    """
-    Marks cards in the deck as trump cards based on the trump suit.
-    """
-    for card in deck:
-        card.is_trump = card.suit == trump_suit
-        card.save()
-    
-
-
 def determine_best_card(hand, trump_suit, played_cards):
     """
     Determines the best card to play based on Euchre rules.
@@ -272,41 +300,21 @@ def update_game_results(game, team1_tricks, team2_tricks, trump_caller, going_al
     """
     Updates game results after each round based on tricks won.
     """
-    if trump_caller.team == 1:
-        trump_calling_team = 1
-    else:
-        trump_calling_team = 2
-
-    if team1_tricks >= 3:
-        if trump_calling_team == 1:
-            # Team 1 called trump and won
-            if going_alone and team1_tricks == 5:
-                game.team1_points += 4
-            else:
-                game.team1_points += 1 if team1_tricks < 5 else 2
-        else:
-            # Team 1 euchred the other team
-            game.team1_points += 2
-    if team2_tricks >= 3:
-        if trump_calling_team == 2:
-            # Team 2 called trump and won
-            if going_alone and team2_tricks == 5:
-                game.team2_points += 4
-            else:
-                game.team2_points += 1 if team2_tricks < 5 else 2
-        else:
-            # Team 2 euchred the other team
-            game.team2_points += 2
+    trump_calling_team = 1 if trump_caller.team == 1 else 2
+    team1_points, team2_points = round_points(team1_tricks, team2_tricks, trump_calling_team, going_alone)
+    game.team1_points += team1_points
+    game.team2_points += team2_points
 
     game.save()
 
     # Check for game-winning condition
-    if game.team1_points >= 10 or game.team2_points >= 10:
-        winner = "Team 1" if game.team1_points >= 10 else "Team 2"
+    winning_team = game_winner(game.team1_points, game.team2_points)
+    if winning_team:
+        winner = f"Team {winning_team}"
 
         GameResult.objects.create(
             game=game,
-            winner=Player.objects.filter(name="Player").first() if game.team1_points >= 10 else Player.objects.filter(name__in=["Opponent1", "Opponent2"]).first(),
+            winner=game.players.filter(name="Player").first() if winning_team == 1 else game.players.filter(name__in=["Opponent1", "Opponent2"]).first(),
             total_hands=game.hands.count(),
             points={"team1": game.team1_points, "team2": game.team2_points},
         )
@@ -323,12 +331,14 @@ def reset_round_state(game):
     # Clear PlayedCard objects
     PlayedCard.objects.filter(hand__game=game).delete()
 
-    # Rotate dealer
+    # Rotate dealer, the new hand has no up card until trump is accepted
     game.dealer = rotate_dealer(game)
+    game.up_card = None
+    game.up_card_picked_up = False
     game.save()
 
     # Shuffle a new deck
-    deck = list(Card.objects.all())
+    deck = all_cards()
     shuffle(deck)  # Ensures cards are shuffled properly before dealing
 
     return deck
@@ -337,7 +347,7 @@ def rotate_dealer(game):
     """
     Rotates the dealer to the next player in the sequence.
     """
-    players = list(Player.objects.all())
+    players = game.seats()
 
     if not game.dealer:
         return players[0]  # Default to first player if no dealer is set
@@ -356,7 +366,7 @@ def rotate_dealer(game):
     """
     Rotates the dealer to the next player in the sequence.
     """
-    players = list(Player.objects.all())
+    players = game.seats()
     if not game.dealer:
         return players[0]  # Default to first player if no dealer is set
 
@@ -403,124 +413,209 @@ def play_card(player, hand, card, player_hands, game):
         hand=hand,
         player=player,
         card=card,
-        order=len(hand.played_cards.all()) + 1  # Set the correct play order
+        order=hand.played_cards.count() + 1  # Set the correct play order
     )
 
     # Remove the card from the player's hand
     player_hands[player].remove(card)
 
 
-def update_remaining_cards_frontend():
+def get_sampling_strategy():
     """
-    Triggers an update to the frontend for remaining cards.
+    SamplingStrategy configured by settings.EUCHRE_SAMPLING_BOT, or None when it is turned off
     """
-    try:
-        game = Game.objects.latest('id')
-        latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
-
-        if not latest_hand:
-            return
-
-        # Get all played cards
-        played_cards = PlayedCard.objects.filter(hand__game=game).values_list('card', flat=True)
+    config = getattr(settings, "EUCHRE_SAMPLING_BOT", {})
+    if not config.get("ENABLED"):
+        return None
 
-        # Get unplayed cards
-        remaining_cards = Card.objects.exclude(id__in=played_cards)
-        remaining_cards_list = [f"{card.rank} of {card.suit}" for card in remaining_cards]
+    return SamplingStrategy(
+        max_samples=config.get("MAX_SAMPLES", 32),
+        max_nodes=config.get("MAX_NODES", 200000),
+        time_limit=config.get("TIME_LIMIT", 0.05),
+        seed=config.get("SEED", 0),
+    )
 
-        return {"remaining_cards": remaining_cards_list}  # Instead of JsonResponse
 
-    except Exception as e:
-        print(f"Error updating remaining cards frontend: {str(e)}")
+def get_ismcts_strategy():
+    """
+    ISMCTSStrategy configured by settings.EUCHRE_ISMCTS_BOT, or None when it is turned off
+    """
+    config = getattr(settings, "EUCHRE_ISMCTS_BOT", {})
+    if not config.get("ENABLED"):
+        return None
 
+    return ISMCTSStrategy(
+        max_iterations=config.get("ITERATIONS", 2000),
+        time_limit=config.get("TIME_LIMIT", 0.25),
+        max_nodes=config.get("MAX_NODES", 100000),
+        exploration=config.get("EXPLORATION", 0.7),
+        seed=config.get("SEED", 0),
+    )
 
 
-def start_euchre_round(game, trump_caller, going_alone):
+class RoundEngine:
     """
-    Plays all 5 tricks in one request and returns the final round results.
+    Plays a round (all 5 tricks) from the latest dealt hand of a game. The deal, trump and tricks are kept in
+    memory while the bots play, then the round is written in one transaction: a Hand per trick with its winner,
+    the cards played to it (moved off the dealt hand) and the game's points.
     """
-    players = list(Player.objects.all())  # Fetch players
-    player_hands = {player: [] for player in players}  # Initialize hands
+    def __init__(self, game, trump_caller, going_alone):
+        self.game = game
+        self.trump_caller = trump_caller
+        self.going_alone = going_alone
+
+        self.players = game.seats()
+        self.player_hands = {player: [] for player in self.players}
+
+        # Cards dealt to each player, the rows are replaced by the cards played to each trick when the round is saved
+        self.deal = Hand.objects.filter(game=game).order_by('-id').first()
+        self.dealt_cards = {}
+        if self.deal:
+            players_by_id = {player.id: player for player in self.players}
+            for played_card in PlayedCard.objects.filter(hand=self.deal, player__in=self.players):
+                player = players_by_id[played_card.player_id]
+                card = get_card(played_card.card_id)
+                self.player_hands[player].append(card)
+                self.dealt_cards[player, card] = played_card
+
+        self.tricks = []  # (Hand, cards played to it in order), not saved until save()
+        self.team1_tricks = 0  # Player + Bot2
+        self.team2_tricks = 0  # Bot1 + Bot3
+
+    def play_card(self, player, trick_hand, card):
+        """
+        In-memory play_card: removes the card from the player's hand and sets trump from it if none was chosen
+        """
+        if card is None:
+            raise ValueError(f"Invalid card provided for player {player.name}.")
+
+        if card not in self.player_hands[player]:
+            raise ValueError(f"{card} is not in {player.name}'s hand.")
+
+        if self.game.trump_suit is None:
+            self.game.trump_suit = card.suit
+            print(f"Trump suit has been set to {self.game.trump_suit} based on {player.name}'s first card.")
+
+        self.player_hands[player].remove(card)
+
+    def play(self):
+        """
+        Plays all 5 tricks and returns the trick results for the response
+        """
+        game, players, player_hands = self.game, self.players, self.player_hands
+        trump_caller, going_alone = self.trump_caller, self.going_alone
+
+        tricks_data = []  # Store all trick results
+        previous_tricks = TrickHistory(game.trump_suit) # Key: trick number, value: list of cards played in that trick
+
+        # Left of the dealer leads the first trick
+        dealer_index = players.index(game.dealer)
+        trick_leader_index = (dealer_index + 1) % len(players)
+        trick_leader = players[trick_leader_index]
+
+        # If going alone, you play without partner
+        play_order = players[:]
+        if going_alone:
+            partner = next(p for p in play_order if p.name == trump_caller.partner)
+            play_order.remove(partner)
+            del player_hands[partner]
+
+        if trick_leader not in play_order:
+            new_leader_index = (trick_leader_index + 1) % len(players)
+            trick_leader = players[new_leader_index]
+
+        # Bots play with a search strategy when one is turned on in settings. The ISMCTS bot keeps its tree
+        # between tricks, so one strategy is used for the whole round
+        search_bot = get_ismcts_strategy() or get_sampling_strategy()
+        search_bot_name = "ismcts" if isinstance(search_bot, ISMCTSStrategy) else "sampling"
+
+        # Everyone saw the up card, the search bot keeps it out of (or in the dealer's) hidden cards
+        up_card = get_card(game.up_card_id) if game.up_card_id else None
+
+        # Play all 5 tricks in a loop
+        for trick_number in range(5):
+            trick_cards = []  # Cards played in this trick
+            hand = Hand(game=game, dealer=game.dealer, trump_suit=game.trump_suit or None)
+
+            # Whoever won the trick plays first
+            leader_index = play_order.index(trick_leader)
+            current_player_order = play_order[leader_index:] + play_order[:leader_index]
+
+            # Players play in order
+            for player in current_player_order:
+                tricks_won = self.team1_tricks if player.team == 1 else self.team2_tricks
+                if search_bot and not player.is_human:
+                    with timer("euchre_bot_decision_seconds", decision="card", bot=search_bot_name):
+                        card_to_play = search_bot.choose_card(
+                            player, play_order, player_hands[player], hand.trump_suit, trick_cards, previous_tricks, trump_caller, going_alone, tricks_won,
+                            up_card, game.dealer, game.up_card_picked_up
+                        )
+                else:
+                    with timer("euchre_bot_decision_seconds", decision="card", bot="rules"):
+                        card_to_play = player.determine_best_card(player_hands[player], hand.trump_suit, trick_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+                self.play_card(player, hand, card_to_play)
+                trick_cards.append(PlayedCard(player=player, hand=hand, card=card_to_play, order=len(trick_cards) + 1))
+
+            # Determine the winner of the trick
+            trick_winner = evaluate_trick_winner(hand.trump_suit, trick_cards)
+            hand.winner = trick_winner
+            self.tricks.append((hand, trick_cards))
+
+            # Whoever won the trick leads the next trick
+            trick_leader = trick_winner
+
+            # Assign trick points
+            if trick_winner.team == 1:
+                self.team1_tricks += 1
+            else:
+                self.team2_tricks += 1
 
-    # Fetch latest hand from the game
-    latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
-    if not latest_hand:
-        return JsonResponse({"error": "No hand found for the current game!"}, status=400)
+            previous_tricks[trick_number + 1] = trick_cards
 
-    # Retrieve unplayed cards for each player
-    unplayed_cards = PlayedCard.objects.filter(hand=latest_hand, player__in=players)
-    for played_card in unplayed_cards:
-        player_hands[played_card.player].append(played_card.card)
+            # Store trick results
+            tricks_data.append({
+                "trick_number": trick_number + 1,
+                "players": [pc.player.name for pc in trick_cards],
+                "cards": [f"{pc.card.rank} of {pc.card.suit}" for pc in trick_cards],
+                "winner": trick_winner.name
+            })
 
-    # Ensure all players have enough cards to play
-    for player in players:
-        if len(player_hands[player]) < 5:
-            return JsonResponse({"error": f"{player.name} has {len(player_hands[player])} cards instead of 5!"}, status=400)
+        return tricks_data
 
-    # Track tricks won by each team
-    team1_tricks = 0  # Player + Bot2
-    team2_tricks = 0  # Bot1 + Bot3
-    tricks_data = []  # Store all trick results
-    previous_tricks = {} # Key: trick number, value: list of cards played in that trick
+    def save(self):
+        """
+        Writes the played round: the trick hands, their cards and the game results
+        """
+        played_cards = [played_card for _, trick_cards in self.tricks for played_card in trick_cards]
+        with transaction.atomic():
+            Hand.objects.bulk_create([hand for hand, _ in self.tricks])
 
-    # Left of the dealer leads the first trick
-    dealer_index = players.index(game.dealer)
-    trick_leader_index = (dealer_index + 1) % len(players)
-    trick_leader = players[trick_leader_index]
-
-    # If going alone, you play without partner
-    play_order = players[:]
-    if going_alone:
-        partner = next(p for p in play_order if p.name == trump_caller.partner)
-        play_order.remove(partner)
-        del player_hands[partner]
-
-    if trick_leader not in play_order:
-        new_leader_index = (trick_leader_index + 1) % len(players)
-        trick_leader = players[new_leader_index]
-
-    # Play all 5 tricks in a loop
-    for trick_number in range(5):
-        trick_cards = []  # Cards played in this trick
-        hand = Hand.objects.create(game=game, dealer=game.dealer, trump_suit=game.trump_suit or None)
-
-        # Whoever won the trick plays first
-        leader_index = play_order.index(trick_leader)
-        current_player_order = play_order[leader_index:] + play_order[:leader_index]
-
-        # Players play in order
-        for player in current_player_order:
-            tricks_won = team1_tricks if player.team == 1 else team2_tricks
-            card_to_play = player.determine_best_card(player_hands[player], hand.trump_suit, trick_cards, previous_tricks, trump_caller, going_alone, tricks_won)
-            play_card(player, hand, card_to_play, player_hands, game)
-            trick_cards.append(PlayedCard(player=player, hand=hand, card=card_to_play, order=len(trick_cards) + 1))
-
-        # Determine the winner of the trick
-        trick_winner = evaluate_trick_winner(hand.trump_suit, trick_cards)
-        hand.winner = trick_winner
-        hand.save()
-
-        # Whoever won the trick leads the next trick
-        trick_leader = trick_winner
-
-        # Assign trick points
-        if trick_winner.team == 1:
-            team1_tricks += 1
-        else:
-            team2_tricks += 1
+            # Each played card moves from the dealt hand to the trick it was played to
+            PlayedCard.objects.filter(id__in=[
+                self.dealt_cards[pc.player, pc.card].id for pc in played_cards if (pc.player, pc.card) in self.dealt_cards
+            ]).delete()
+            PlayedCard.objects.bulk_create(played_cards)
+
+            # Saves the game, with the trump suit if the first card played set it
+            update_game_results(self.game, self.team1_tricks, self.team2_tricks, self.trump_caller, self.going_alone)
 
-        previous_tricks[trick_number + 1] = trick_cards
 
-        # Store trick results
-        tricks_data.append({
-            "trick_number": trick_number + 1,
-            "players": [pc.player.name for pc in trick_cards],
-            "cards": [f"{pc.card.rank} of {pc.card.suit}" for pc in trick_cards],
-            "winner": trick_winner.name
-        })
+@timed("euchre_round_seconds")
+def start_euchre_round(game, trump_caller, going_alone):
+    """
+    Plays all 5 tricks in one request and returns the final round results.
+    """
+    engine = RoundEngine(game, trump_caller, going_alone)
+    if not engine.deal:
+        return JsonResponse({"error": "No hand found for the current game!"}, status=400)
+
+    # Ensure all players have enough cards to play
+    for player in engine.players:
+        if len(engine.player_hands[player]) < 5:
+            return JsonResponse({"error": f"{player.name} has {len(engine.player_hands[player])} cards instead of 5!"}, status=400)
 
-    # Update the game results after all tricks
-    update_game_results(game, team1_tricks, team2_tricks, trump_caller, going_alone)
+    tricks_data = engine.play()
+    engine.save()
 
     # Return the final round results
     return JsonResponse({
@@ -0,0 +1,201 @@
+"""
+Sampling (perfect information Monte Carlo) card player.
+
+For each decision the hidden cards are dealt out at random in a way that agrees with everything the
+player has seen: their own hand, the cards already played and the suits each opponent has shown out
+of. Every legal card is then scored on each sample with the double dummy solver and the card with
+the best average number of tricks for the player's side is played.
+
+The samples for a decision are drawn from a random.Random seeded with the strategy seed and the
+cards seen so far, so the same position with the same seed always sees the same samples in the same
+order. Work per decision is capped by max_samples and max_nodes (solver positions, which do not
+depend on machine speed), plus a hard wall-clock time_limit. With the same seed, max_samples and
+max_nodes the chosen card is always the same unless the time_limit cuts a decision short.
+"""
+import random
+import time
+from collections import namedtuple
+
+from .bot_logic import BotLogic
+from .card_engine import (
+    CARD_BIT, CARD_IDS, EFFECTIVE_SUIT, FULL_DECK, NO_LEAD, NUM_SUITS, SUIT_INDEX, SUIT_MASK, cards_in_mask, legal_cards
+)
+from .double_dummy import DoubleDummySolver, SearchTimeout
+from .strategies import Strategy
+from .trick_history import TrickHistory
+
+
+class SamplingStrategy(Strategy):
+    def __init__(self, max_samples=32, max_nodes=200000, time_limit=0.05, seed=0):
+        self.max_samples = max_samples
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit  # seconds per decision
+        self.seed = seed
+
+        # Stats for the last decision
+        self.samples_used = 0
+        self.nodes_used = 0
+
+    def choose_card(self, player, players, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won,
+                    up_card=None, dealer=None, picked_up=False):
+        """
+        Same arguments and result as BotLogic.determine_best_card, plus the player choosing and `players`, everyone
+        taking part in the hand in play order. up_card is the card turned up for trump and picked_up whether `dealer`
+        picked it up, the samples keep it in the dealer's hand or out of play. Falls back to the BotLogic rules if no
+        sample could be solved in time.
+        """
+        start = time.perf_counter()
+        self.samples_used = 0
+        self.nodes_used = 0
+
+        position = read_position(player, players, hand, trump_suit, played_cards, previous_tricks, up_card, dealer, picked_up)
+        choices = position.choices
+        if len(choices) == 1:
+            return choices[0]
+
+        trump, trick, own, seat, leader = position.trump, position.trick, position.own, position.seat, position.leader
+        declaring = [other.team == player.team for other in players]
+
+        rng = random.Random(f"{self.seed}:{own}:{position.seen}:{seat}")
+        solver = DoubleDummySolver(trump, declaring)
+        solver.deadline = start + self.time_limit
+        totals = [0] * len(choices)
+
+        while self.samples_used < self.max_samples:
+            if solver.nodes >= self.max_nodes or time.perf_counter() >= solver.deadline:
+                break
+
+            hands = sample_hands(rng, position)
+            if hands is None:
+                break
+
+            # Score every card on this sample, a sample is only counted once all of them are solved
+            scores = []
+            try:
+                for card in choices:
+                    card_id = CARD_IDS[card.rank, card.suit]
+                    scores.append(solver.solve(hands[:seat] + [hands[seat] ^ CARD_BIT[card_id]] + hands[seat + 1:], leader, trick + [card_id]))
+            except SearchTimeout:
+                break
+
+            for i, score in enumerate(scores):
+                totals[i] += score
+            self.samples_used += 1
+
+        self.nodes_used = solver.nodes
+
+        if not self.samples_used:
+            return BotLogic.determine_best_card(player, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+
+        # Best average, the first card in hand order on ties
+        best = max(range(len(choices)), key=lambda i: totals[i])
+        return choices[best]
+
+
+# What a player knows when it is their turn to play, see read_position
+Position = namedtuple("Position", [
+    "trump",  # trump suit index
+    "choices",  # legal cards from the hand, in hand order
+    "trick",  # card ids on the table, in play order
+    "own",  # mask of the player's hand
+    "seat",  # index of the player in `players`
+    "leader",  # index of the player who led the trick on the table
+    "seen",  # mask of every card in a completed trick or on the table
+    "unseen",  # mask of the cards held by the other players (and the kitty), less the pinned cards
+    "pinned",  # mask of the unseen cards known to be in each player's hand (the picked up card)
+    "hand_sizes",  # cards left in each player's hand
+    "voids",  # bitmask of the suit indexes each player has shown out of
+])
+
+
+def read_position(player, players, hand, trump_suit, played_cards, previous_tricks, up_card=None, dealer=None, picked_up=False):
+    """
+    Position for `player` to play to the trick in played_cards, with `players` everyone in the hand in play order.
+    Everyone saw up_card: if `dealer` picked it up they hold it until it is played, otherwise it is out of play.
+    """
+    trump = SUIT_INDEX[trump_suit]
+    history = TrickHistory.of(previous_tricks, trump_suit)
+
+    trick = [CARD_IDS[played_card.card.rank, played_card.card.suit] for played_card in played_cards]
+    lead = EFFECTIVE_SUIT[trump][trick[0]] if trick else NO_LEAD
+    own = 0
+    for card in hand:
+        own |= CARD_BIT[CARD_IDS[card.rank, card.suit]]
+
+    legal = legal_cards(own, trump, lead)
+    choices = [card for card in hand if legal & CARD_BIT[CARD_IDS[card.rank, card.suit]]]
+
+    seat = players.index(player)
+    leader = players.index(played_cards[0].player) if played_cards else seat
+
+    seen = history.seen
+    for card in trick:
+        seen |= CARD_BIT[card]
+
+    # How many cards each other player still holds and which suits they are known to be out of
+    already_played = {played_card.player.name for played_card in played_cards}
+    hand_sizes = [len(hand) - (1 if other.name in already_played else 0) for other in players]
+    voids = [known_voids(history, other, played_cards, trump) for other in players]
+
+    unseen = FULL_DECK & ~seen & ~own
+    pinned = [0] * len(players)
+    if up_card is not None:
+        up = CARD_BIT[CARD_IDS[up_card.rank, up_card.suit]]
+        if unseen & up:
+            unseen &= ~up
+            # Not in `players` when the dealer sits out their partner's loner, then nobody playing holds it
+            if picked_up and dealer in players:
+                pinned[players.index(dealer)] = up
+
+    return Position(trump, choices, trick, own, seat, leader, seen, unseen, pinned, hand_sizes, voids)
+
+
+def known_voids(history, other, played_cards, trump):
+    """
+    Bitmask of suit indexes `other` has shown out of, including the trick in progress
+    """
+    voids = history.voids.get(other.name, 0)
+    if played_cards:
+        lead_suit = EFFECTIVE_SUIT[trump][CARD_IDS[played_cards[0].card.rank, played_cards[0].card.suit]]
+        for played_card in played_cards[1:]:
+            card_id = CARD_IDS[played_card.card.rank, played_card.card.suit]
+            if played_card.player.name == other.name and EFFECTIVE_SUIT[trump][card_id] != lead_suit:
+                voids |= 1 << lead_suit
+    return voids
+
+
+def sample_hands(rng, position, attempts=20):
+    """
+    Deals the unseen cards to the other players on top of their pinned cards, respecting known voids. The
+    players with the fewest possible cards are dealt first. Returns a list of hand masks in play order, or
+    None if no deal fits.
+    """
+    seat, hand_sizes, voids, unseen, pinned = position.seat, position.hand_sizes, position.voids, position.unseen, position.pinned
+    others = [other for other in range(len(hand_sizes)) if other != seat]
+
+    allowed = {}
+    for other in others:
+        mask = unseen
+        for suit in range(NUM_SUITS):
+            if voids[other] >> suit & 1:
+                mask &= ~SUIT_MASK[position.trump][suit]
+        allowed[other] = mask
+    to_deal = {other: hand_sizes[other] - pinned[other].bit_count() for other in others}
+    order = sorted(others, key=lambda other: (allowed[other].bit_count() - to_deal[other], other))
+
+    for _ in range(attempts):
+        hands = pinned[:]
+        hands[seat] = position.own
+        remaining = unseen
+
+        for other in order:
+            cards = cards_in_mask(allowed[other] & remaining)
+            if len(cards) < to_deal[other]:
+                break
+            for card in rng.sample(cards, to_deal[other]):
+                hands[other] |= CARD_BIT[card]
+            remaining &= ~hands[other]
+        else:
+            return hands
+
+    return None
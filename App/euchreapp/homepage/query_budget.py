@@ -0,0 +1,108 @@
+"""
+Query counts and time for every request, checked against the query budget each game endpoint declares.
+
+A view declares the most queries a request to it should run with @query_budget(n).
+QueryBudgetMiddleware counts every query run below it while the request is handled (through
+connection.execute_wrapper, so DEBUG does not need to be on) and adds them to the response:
+
+    X-Query-Count        queries run
+    X-Query-Time-Ms      time spent running them
+    X-Request-Time-Ms    time spent handling the request
+
+A request over its view's budget is printed as a warning, or raises QueryBudgetExceeded when
+settings.EUCHRE_QUERY_BUDGET["STRICT"] is set so the tests fail (see tests.py). The settings are
+read once and cached like metrics.py does, and the middleware removes itself when it is turned off.
+"""
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.conf import settings
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# settings.EUCHRE_QUERY_BUDGET, None until it is first read
+_config = None
+
+
+def query_budget_config():
+    global _config
+    if _config is None:
+        config = getattr(settings, "EUCHRE_QUERY_BUDGET", {})
+        _config = (bool(config.get("ENABLED", False)), bool(config.get("STRICT", False)))
+    return _config
+
+
+@receiver(setting_changed)
+def reset_query_budget_config(setting, **kwargs):
+    global _config
+    if setting == "EUCHRE_QUERY_BUDGET":
+        _config = None
+
+
+def query_budget(max_queries):
+    """
+    Decorator declaring the most queries a request to a view should run
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper counting the queries run and the time spent in them
+    """
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - start
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the queries and time of every request and checks them against the view's @query_budget.
+    Not used when EUCHRE_QUERY_BUDGET["ENABLED"] is off.
+    """
+    def __init__(self, get_response):
+        if not query_budget_config()[0]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        response["X-Query-Count"] = str(counter.count)
+        response["X-Query-Time-Ms"] = f"{counter.time * 1000:.2f}"
+        response["X-Request-Time-Ms"] = f"{elapsed * 1000:.2f}"
+
+        # The URL is only resolved inside get_response, so the view is known afterwards
+        match = getattr(request, "resolver_match", None)
+        budget = getattr(match.func, "query_budget", None) if match is not None else None
+        if budget is not None and counter.count > budget:
+            message = f"{request.method} {request.path} ran {counter.count} queries, its budget is {budget}"
+            if query_budget_config()[1]:
+                raise QueryBudgetExceeded(message)
+            print(f"⚠️ {message}")
+
+        return response
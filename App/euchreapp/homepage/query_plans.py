@@ -0,0 +1,81 @@
+"""
+Query plans for the hot game history lookups, so tests can check each one is answered from an index.
+
+The history tables only grow (a Hand per trick and a PlayedCard per card, for every game), so a
+lookup that scans a table gets slower with every game played. hot_queries() builds the lookups the
+views and RoundEngine run for a game, and query_plan() runs SQLite's EXPLAIN QUERY PLAN on them:
+
+    for name, queryset in hot_queries(game, hand, player).items():
+        print(name, query_plan(queryset))
+
+    python manage.py shell -c "from homepage.query_plans import print_query_plans; print_query_plans()"
+
+SQLite keeps the rowid in every index, so the game_id index of Hand already returns a game's hands in
+id order and the latest hand needs no index of its own. GameResult.game is one-to-one, so it is unique
+and indexed too. PlayedCard has the (hand, player) index from migration 0017.
+"""
+from django.db import connection
+
+from .models import Game, GameResult, Hand, PlayedCard
+
+
+def hot_queries(game, hand, player):
+    """
+    {name: queryset} for the lookups run on every request to the game endpoints
+    """
+    session_games = Game.objects.filter(session_key=game.session_key)
+    return {
+        # Latest hand of the game (accept_trump, pick_trump, RoundEngine, get_remaining_cards)
+        "latest_hand": Hand.objects.filter(game=game).order_by('-id')[:1],
+        # A player's cards in a hand (accept_trump, get_remaining_cards, determine_bot_trump_decision)
+        "player_cards": PlayedCard.objects.filter(hand=hand, player=player),
+        # The seats' cards in a hand (RoundEngine, current_hands)
+        "seat_cards": PlayedCard.objects.filter(hand=hand, player__in=game.seats()).order_by('id'),
+        # Every card dealt in a hand (pick_trump)
+        "hand_cards": PlayedCard.objects.filter(hand=hand),
+        # Every card played in the game (get_remaining_cards, reset_round_state)
+        "game_cards": PlayedCard.objects.filter(hand__game=game).values_list('card', flat=True),
+        # Result of a game (start_new_game)
+        "game_result": GameResult.objects.filter(game=game),
+        # The session's games without a result (reset_game)
+        "unarchived_games": session_games.filter(gameresult__isnull=True),
+        # The game's seats (Game.seats)
+        "seats": game.players.order_by('id'),
+    }
+
+
+def query_plan(queryset):
+    """
+    The detail column of EXPLAIN QUERY PLAN for a queryset, one string per step (SQLite only)
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def table_scans(plan):
+    """
+    Steps of a plan that read a whole table or sort the rows instead of using an index
+    """
+    return [
+        step for step in plan
+        if (step.startswith("SCAN") and "INDEX" not in step) or "TEMP B-TREE" in step
+    ]
+
+
+def print_query_plans(game=None):
+    """
+    Prints the plan of every hot query for a game (by default the latest one with a hand)
+    """
+    hand = Hand.objects.filter(game=game).order_by('-id').first() if game else Hand.objects.order_by('-id').first()
+    if hand is None:
+        print("No hands to explain, play a round first")
+        return
+
+    game = hand.game
+    for name, queryset in hot_queries(game, hand, hand.dealer).items():
+        plan = query_plan(queryset)
+        print(f"{name}: {'SCANS A TABLE' if table_scans(plan) else 'indexed'}")
+        for step in plan:
+            print(f"    {step}")
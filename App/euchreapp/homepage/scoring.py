@@ -0,0 +1,52 @@
+"""
+Euchre scoring shared by the web game (models.update_game_results) and the simulations.
+"""
+
+# Points needed to win a game
+GAME_POINTS = 10
+
+
+def round_points(team1_tricks, team2_tricks, calling_team, going_alone):
+    """
+    Points (team 1, team 2) for a round given each team's tricks and the team (1 or 2) that called trump
+    """
+    # 1 point if you call it and win 3 tricks
+    # 2 points if you call it and win 5 tricks
+    # 2 points if the other team calls it and you win 3 tricks
+    # 4 points if you win all 5 tricks when going alone
+    team1_points = 0
+    team2_points = 0
+
+    if team1_tricks >= 3:
+        if calling_team == 1:
+            # Team 1 called trump and won
+            if going_alone and team1_tricks == 5:
+                team1_points += 4
+            else:
+                team1_points += 1 if team1_tricks < 5 else 2
+        else:
+            # Team 1 euchred the other team
+            team1_points += 2
+    if team2_tricks >= 3:
+        if calling_team == 2:
+            # Team 2 called trump and won
+            if going_alone and team2_tricks == 5:
+                team2_points += 4
+            else:
+                team2_points += 1 if team2_tricks < 5 else 2
+        else:
+            # Team 2 euchred the other team
+            team2_points += 2
+
+    return team1_points, team2_points
+
+
+def game_winner(team1_points, team2_points, target=GAME_POINTS):
+    """
+    1 or 2 once a team has reached the target, otherwise None
+    """
+    if team1_points >= target:
+        return 1
+    if team2_points >= target:
+        return 2
+    return None
@@ -0,0 +1,216 @@
+"""
+Streaming statistics for MonteCarloSimulation runs.
+
+Rates (call, loner, win, march and loner success rates) are proportions of the simulation counters
+and get Wilson score intervals, which stay sensible near 0% and 100% and for small counts. Points
+per hand keep a running mean and variance (Welford's method) fed one deal or one batch at a time.
+
+Every metric has a name, "<metric>:<seat or team>":
+
+    round1_call_rate:Bot 1, round2_call_rate:Bot 1, round1_loner_rate:Bot 1, round2_loner_rate:Bot 1
+    points_per_hand:team1, win_rate:team1, march_rate:team1, loner_success_rate:team1
+
+Rates are fractions (0.25 rather than 25%), and a metric's interval half-width is in the same units.
+"""
+import math
+from collections import namedtuple
+
+
+# z value for the reported confidence intervals (95%)
+CONFIDENCE_Z = 1.96
+
+Estimate = namedtuple("Estimate", [
+    "value",  # point estimate
+    "low",
+    "high",
+    "half_width",  # (high - low) / 2, infinite when there are no samples yet
+    "samples",  # deals (or calls, or loner attempts) the estimate is based on
+])
+
+SEAT_RATES = {
+    # metric: counter, as a rate over every deal
+    "round1_call_rate": "calls_round1",
+    "round2_call_rate": "calls_round2",
+    "round1_loner_rate": "loner_attempts_round1",
+    "round2_loner_rate": "loner_attempts_round2",
+}
+
+TEAM_RATES = {
+    # metric: (successes counter, trials counter), with "{team}" filled in
+    "win_rate": ("{team}_wins", "{team}_calls"),
+    "march_rate": ("{team}_marches", "{team}_calls"),
+    "loner_success_rate": ("{team}_loner_wins", "{team}_loner_attempts"),
+}
+
+TEAMS = ["team1", "team2"]
+
+
+class RunningStat:
+    """
+    Running count, mean and sum of squared differences from the mean (Welford), mergeable between runs
+    """
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """
+        Adds the values summarised by another RunningStat (Chan et al.'s parallel update)
+        """
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+
+    def add_values(self, values):
+        """
+        Adds a batch of values at once (a list or NumPy array)
+        """
+        count = len(values)
+        if not count:
+            return self
+        mean = sum(values) / count if isinstance(values, list) else float(values.mean())
+        m2 = sum((value - mean) ** 2 for value in values) if isinstance(values, list) else float(((values - mean) ** 2).sum())
+        return self.merge(RunningStat(count, mean, m2))
+
+    def variance(self):
+        """ Sample variance, 0 with fewer than 2 values """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def estimate(self, z=CONFIDENCE_Z):
+        if self.count < 2:
+            return Estimate(self.mean, -math.inf, math.inf, math.inf, self.count)
+        half_width = z * math.sqrt(self.variance() / self.count)
+        return Estimate(self.mean, self.mean - half_width, self.mean + half_width, half_width, self.count)
+
+
+def wilson_interval(successes, trials, z=CONFIDENCE_Z):
+    """
+    Estimate for a proportion with the Wilson score interval
+    """
+    if not trials:
+        return Estimate(0.0, 0.0, 1.0, math.inf, 0)
+
+    p = successes / trials
+    z2 = z * z
+    center = (p + z2 / (2 * trials)) / (1 + z2 / trials)
+    half_width = z * math.sqrt(p * (1 - p) / trials + z2 / (4 * trials * trials)) / (1 + z2 / trials)
+    return Estimate(p, max(0.0, center - half_width), min(1.0, center + half_width), half_width, trials)
+
+
+class SimulationStats:
+    """
+    Confidence intervals for every metric of a run, from its counters (laid out like MonteCarloSimulation.new_counters)
+    and the points each team scored per deal
+    """
+    def __init__(self, counters, z=CONFIDENCE_Z):
+        self.counters = counters
+        self.z = z
+        self.points = {team: RunningStat() for team in TEAMS}
+
+    @property
+    def num_deals(self):
+        return self.points["team1"].count
+
+    def add_deal(self, team1_points, team2_points):
+        self.points["team1"].add(team1_points)
+        self.points["team2"].add(team2_points)
+
+    def add_batch(self, team1_points, team2_points):
+        """ Points arrays for a batch of deals """
+        self.points["team1"].add_values(team1_points)
+        self.points["team2"].add_values(team2_points)
+
+    def merge(self, other):
+        for team in TEAMS:
+            self.points[team].merge(other.points[team])
+        return self
+
+    def estimates(self):
+        """
+        {metric name: Estimate} for every metric
+        """
+        counters, z = self.counters, self.z
+        estimates = {}
+
+        for metric, counter in SEAT_RATES.items():
+            for name, count in counters[counter].items():
+                estimates[f"{metric}:{name}"] = wilson_interval(count, self.num_deals, z)
+
+        for team in TEAMS:
+            estimates[f"points_per_hand:{team}"] = self.points[team].estimate(z)
+            for metric, (successes, trials) in TEAM_RATES.items():
+                estimates[f"{metric}:{team}"] = wilson_interval(
+                    counters[successes.format(team=team)], counters[trials.format(team=team)], z
+                )
+
+        return estimates
+
+    def default_stop_metrics(self, exclude=()):
+        """
+        Metrics the stop rule checks unless told otherwise: every tracked metric, less those whose metric part
+        (before the ":") is in exclude, e.g. exclude=("loner_success_rate",) to stop caring about a rare event.
+        """
+        return [metric for metric in self.estimates() if metric.split(":")[0] not in exclude]
+
+    def is_precise(self, target_half_width, metrics=None, estimates=None, min_trials=0, exclude=()):
+        """
+        True once every metric's half-width is at or below its target and it is based on at least min_trials
+        samples. target_half_width is one number for all metrics (metrics, by default default_stop_metrics(exclude))
+        or {metric: target}, in which case only those metrics are checked.
+
+        The conditional rates (win, march and loner success) only get a sample when someone calls or goes alone,
+        so they can take far more deals than the call rates. Runs are bounded by their max_simulations.
+        """
+        estimates = estimates or self.estimates()
+        if isinstance(target_half_width, dict):
+            targets = target_half_width
+        else:
+            targets = {metric: target_half_width for metric in (metrics or self.default_stop_metrics(exclude))}
+        return all(
+            estimates[metric].half_width <= target and estimates[metric].samples >= min_trials
+            for metric, target in targets.items()
+        )
+
+    def result(self, converged=None):
+        return SimulationResult(self.num_deals, self.estimates(), self.counters, converged)
+
+
+class SimulationResult:
+    """
+    Outcome of a simulation run: estimates by metric name, the raw counters, and for runs with a stop rule
+    whether the target precision was reached (None when no stop rule was used)
+    """
+    def __init__(self, num_simulations, estimates, counters, converged=None):
+        self.num_simulations = num_simulations
+        self.estimates = estimates
+        self.counters = counters
+        self.converged = converged
+
+    def __getitem__(self, metric):
+        return self.estimates[metric]
+
+    def widest(self, metrics=None):
+        """ (metric, Estimate) with the largest half-width """
+        return max(((metric, self.estimates[metric]) for metric in (metrics or self.estimates)), key=lambda item: item[1].half_width)
+
+    def as_dict(self):
+        return {
+            "num_simulations": self.num_simulations,
+            "converged": self.converged,
+            "estimates": {metric: estimate._asdict() for metric, estimate in self.estimates.items()},
+        }
+
+    def __repr__(self):
+        return f"SimulationResult({self.num_simulations} simulations, {len(self.estimates)} metrics, converged={self.converged})"
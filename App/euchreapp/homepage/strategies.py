@@ -0,0 +1,77 @@
+"""
+Strategy protocol for bot decisions.
+
+A strategy makes the three decisions a bot faces, each given the player it is deciding for:
+
+    choose_trump(player, hand, dealer, up_card, player_order, trump_round) -> (decision, going_alone)
+    choose_discard(player, hand, trump_suit) -> card to discard after the dealer picks up
+    choose_card(player, players, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won,
+                up_card=None, dealer=None, picked_up=False) -> card
+
+with the same arguments and results as BotLogic.determine_trump, get_worst_card and determine_best_card
+(`players` is everyone taking part in the hand, in play order, and up_card the card turned up for trump,
+picked up by `dealer` if picked_up). Strategy makes all three with the
+BotLogic rules, so a strategy only overrides the decisions it changes. seat(player) is called once
+for each player a strategy is given to.
+
+SamplingStrategy (pimc.py) and ISMCTSStrategy (ismcts.py) are strategies, and RuleStrategy is BotLogic
+with some thresholds or weights changed.
+"""
+import copy
+
+from .bot_logic import BotLogic
+
+
+class Strategy:
+    def seat(self, player):
+        pass
+
+    def choose_trump(self, player, hand, dealer, up_card, player_order, trump_round):
+        return BotLogic.determine_trump(player, hand, dealer, up_card, player_order, trump_round)
+
+    def choose_discard(self, player, hand, trump_suit):
+        return BotLogic.get_worst_card(player, hand, trump_suit)
+
+    def choose_card(self, player, players, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won,
+                    up_card=None, dealer=None, picked_up=False):
+        return BotLogic.determine_best_card(player, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+
+
+class RuleStrategy(Strategy):
+    """
+    The BotLogic rules with overrides on its thresholds and weights, named like the tuning parameters
+    ("round1.first.normal", "weights.trump_cards", ...)
+    """
+    def __init__(self, overrides=None):
+        self.overrides = dict(overrides or {})
+        self.thresholds, self.weights = apply_overrides(self.overrides)
+
+    def seat(self, player):
+        # Players with their own thresholds or weights skip the shared trump decision cache
+        if self.overrides:
+            player.TRUMP_THRESHOLDS = self.thresholds
+            player.STRATEGY_WEIGHTS = self.weights
+
+
+def apply_overrides(overrides):
+    """
+    Copies of BotLogic.TRUMP_THRESHOLDS and BotLogic.STRATEGY_WEIGHTS with the overrides applied
+    """
+    thresholds = copy.deepcopy(BotLogic.TRUMP_THRESHOLDS)
+    weights = dict(BotLogic.STRATEGY_WEIGHTS)
+
+    for parameter, value in overrides.items():
+        keys = parameter.split(".")
+        if keys[0] == "weights":
+            settings, keys = weights, keys[1:]
+        else:
+            settings = thresholds
+
+        for key in keys[:-1]:
+            settings = settings[key]
+
+        if keys[-1] not in settings:
+            raise KeyError(f"Unknown tuning parameter: {parameter}")
+        settings[keys[-1]] = value
+
+    return thresholds, weights
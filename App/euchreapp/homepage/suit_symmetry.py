@@ -0,0 +1,140 @@
+"""
+Suit relabeling for trump decisions, and a cache of BotLogic.determine_trump results built on it.
+
+Before trump is called, what matters about a suit is only how it relates to the up card: the up
+suit itself, its partner suit (same color, home of the left bower) and the two other suits. So
+every (hand, up card, seat, round) can be relabeled so the up suit is hearts and its partner is
+diamonds, with the other two suits becoming clubs and spades in their original order. The order
+is kept rather than choosing whichever labeling is smaller because determine_trump breaks ties
+between those two suits by suit order, so swapping them could change the decision.
+
+    key, suit_map = canonical_key(hand_mask, up_card_id, "first", "1")
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from .card_engine import CARD_RANK, NUM_RANKS, NUM_SUITS, SUIT_INDEX, SUITS, partner_suit
+
+
+# Trump decisions kept by the shared cache, about 200 bytes each (a maxsize of 0 turns the cache off)
+DEFAULT_CACHE_SIZE = 65536
+
+SUIT_BITS = (1 << NUM_RANKS) - 1
+
+
+def _suit_map(up_suit):
+    """ New suit index for each suit when up_suit becomes hearts """
+    others = [suit for suit in range(NUM_SUITS) if suit not in (up_suit, partner_suit(up_suit))]
+    suit_map = [0] * NUM_SUITS
+    for new_suit, suit in enumerate([up_suit, partner_suit(up_suit)] + others):
+        suit_map[suit] = new_suit
+    return suit_map
+
+
+# SUIT_MAPS[up suit][suit] -> canonical suit, INVERSE_SUIT_MAPS[up suit][canonical suit] -> suit
+SUIT_MAPS = [_suit_map(up_suit) for up_suit in range(NUM_SUITS)]
+INVERSE_SUIT_MAPS = [[suit_map.index(new_suit) for new_suit in range(NUM_SUITS)] for suit_map in SUIT_MAPS]
+
+
+def _relabel(mask, suit_map):
+    relabeled = 0
+    for suit in range(NUM_SUITS):
+        relabeled |= (mask >> suit * NUM_RANKS & SUIT_BITS) << suit_map[suit] * NUM_RANKS
+    return relabeled
+
+
+# RELABEL_LOW/HIGH[up suit][12 bits]: the hearts and diamonds half / clubs and spades half of a mask, relabeled
+HALF_BITS = 2 * NUM_RANKS
+RELABEL_LOW = [[_relabel(bits, suit_map) for bits in range(1 << HALF_BITS)] for suit_map in SUIT_MAPS]
+RELABEL_HIGH = [[_relabel(bits << HALF_BITS, suit_map) for bits in range(1 << HALF_BITS)] for suit_map in SUIT_MAPS]
+
+
+def canonical_mask(mask, up_suit):
+    """ Card mask with its suits relabeled for an up card in up_suit (ranks are unchanged) """
+    return RELABEL_LOW[up_suit][mask & 0xFFF] | RELABEL_HIGH[up_suit][mask >> HALF_BITS]
+
+
+def canonical_key(mask, up_card, position, trump_round):
+    """
+    Key shared by every trump decision that is the same up to suit relabeling, and the suit map used.
+
+    mask: the hand as a card mask (for the dealer in round 1, the hand after picking up and discarding)
+    up_card: card id of the up card, position: seat from get_seat_position, trump_round: "1" or "2"
+    """
+    up_suit = up_card // NUM_RANKS
+
+    # The up card's rank only matters in round 1 (a bower turned up changes going alone), in round 2 it is turned down
+    up_rank = CARD_RANK[up_card] if trump_round == "1" else None
+    return (canonical_mask(mask, up_suit), up_rank, position, trump_round), SUIT_MAPS[up_suit]
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class TrumpDecisionCache:
+    """
+    Bounded LRU cache of canonical trump decisions, shared between threads. Lookups skip the lock (single
+    dict operations are atomic) so the hit and miss counts are approximate under concurrent use.
+
+    Decisions are stored with the canonical suit index (or None for a pass), see BotLogic.determine_trump.
+    """
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread since the lookup
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def info(self):
+        """ Same fields as functools.lru_cache's cache_info() """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every Player and simulation Bot in the process
+trump_decision_cache = TrumpDecisionCache()
+
+
+def encode_decision(decision, going_alone, suit_map):
+    """ determine_trump result as a cache value, with the suit relabeled """
+    return (None if decision == "pass" else suit_map[SUIT_INDEX[decision]], going_alone)
+
+
+def decode_decision(value, up_suit):
+    """ Cache value back to a determine_trump result for a hand whose up card is in up_suit """
+    canonical_suit, going_alone = value
+    if canonical_suit is None:
+        return "pass", going_alone
+    return SUITS[INVERSE_SUIT_MAPS[up_suit][canonical_suit]], going_alone
@@ -1,3 +1,571 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+
+from . import views
+from .batch_simulation import BatchSimulation
+from .bot_logic import BotLogic
+from .bot_simulations import Bot, Card, MonteCarloSimulation, simulate_shard
+from .card_engine import CARD_BIT, CARD_NAMES, EFFECTIVE_SUIT, NO_LEAD, NUM_CARDS, RANK_TABLE, card_from_name, cards_in_mask, legal_cards
+from .card_registry import load_cards
+from .deal_codec import NUM_DEALS, DealIndex, deck_for_deal, rank_deal, rank_deck, unrank_deal
+from .double_dummy import DoubleDummySolver
+from .models import Game, GameResult, Hand, PlayedCard
+from .pimc import SamplingStrategy
+from .query_budget import QueryBudgetExceeded
+from .query_plans import hot_queries, query_plan, table_scans
+
+
+@override_settings(EUCHRE_QUERY_BUDGET={"ENABLED": True, "STRICT": True})
+class QueryBudgetTests(TestCase):
+    """
+    Plays games through the endpoints the way start_game.js does. QueryBudgetMiddleware is strict here,
+    so any request running more queries than its view's @query_budget fails the test.
+    """
+    def setUp(self):
+        # The card registry is read once per process, load it so no test pays for it
+        load_cards()
+
+    def request(self, url, method="post", **data):
+        """
+        Sends a request, checks it succeeded within its view's budget and returns (json, query count)
+        """
+        response = getattr(self.client, method)(url, data)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        queries = int(response["X-Query-Count"])
+        self.assertLessEqual(queries, resolve(url).func.query_budget)
+        return json.loads(response.content), queries
+
+    def start_game(self):
+        game, _ = self.request("/start-game/")
+        deal, _ = self.request("/deal-hand/", game_id=game["new_game_id"])
+        return game["new_game_id"], deal
+
+    def play_round(self, game_id, deal, trump_round="1"):
+        """
+        Goes through trump selection and plays the round, returns {url: queries}
+        """
+        order = [player["name"] for player in deal["player_order"]]
+        up_card = deal["remaining_cards"][0]
+        queries = {}
+
+        _, queries["/pick-trump/"] = self.request("/pick-trump/", game_id=game_id, dealer=deal["dealer"])
+        _, queries["/determine-trump/"] = self.request(
+            "/determine-trump/", game_id=game_id, player=order[0], trump_round=trump_round,
+            up_card=up_card, player_order=json.dumps(deal["player_order"]),
+        )
+        if trump_round == "1":
+            _, queries["/accept-trump/"] = self.request("/accept-trump/", game_id=game_id, trump_round="1", card=up_card)
+        else:
+            _, queries["/accept-trump/"] = self.request("/accept-trump/", game_id=game_id, trump_round="2", suit="clubs")
+        _, queries["/get-remaining-cards/"] = self.request("/get-remaining-cards/", "get", game_id=game_id)
+
+        result, queries["/start-round/"] = self.request("/start-round/", game_id=game_id, trump_caller=order[0], going_alone="false")
+        self.assertEqual(len(result["tricks"]), 5)
+        _, queries["/get-game-score/"] = self.request("/get-game-score/", "get", game_id=game_id)
+        return queries
+
+    def test_game_endpoints_stay_within_budget(self):
+        game_id, deal = self.start_game()
+        self.play_round(game_id, deal, "1")
+
+        deal, _ = self.request("/deal-next-hand/", game_id=game_id)
+        self.play_round(game_id, deal, "2")
+
+        self.request("/reset-game/", game_id=game_id)
+
+    def test_queries_do_not_grow_with_history(self):
+        game_id, deal = self.start_game()
+
+        # Another table's history is not touched either
+        other = self.client_class()
+        other_game = json.loads(other.post("/start-game/").content)["new_game_id"]
+        other.post("/deal-hand/", {"game_id": other_game})
+
+        # accept_trump depends on whether the human deals, so rounds are compared with the same dealer
+        # a full rotation later. Points are cleared so the game is not won part way through.
+        first_rounds = {}
+        for round_number in range(8):
+            if round_number:
+                deal, _ = self.request("/deal-next-hand/", game_id=game_id)
+            queries = self.play_round(game_id, deal)
+            Game.objects.filter(id=game_id).update(team1_points=0, team2_points=0)
+
+            if deal["dealer"] in first_rounds:
+                self.assertEqual(queries, first_rounds[deal["dealer"]])
+            else:
+                first_rounds[deal["dealer"]] = queries
+
+    def test_reset_archives_every_game_of_the_session(self):
+        self.start_game()
+        self.start_game()  # archives the first game
+        _, queries = self.request("/reset-game/")
+
+        self.assertEqual(GameResult.objects.count(), 2)
+
+        # The same queries with more games in the session
+        self.start_game()
+        self.start_game()
+        self.assertEqual(self.request("/reset-game/")[1], queries)
+
+    def test_over_budget_raises(self):
+        self.start_game()
+        with mock.patch.object(views.get_game_score, "query_budget", 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get("/get-game-score/")
+
+    @override_settings(EUCHRE_QUERY_BUDGET={"ENABLED": False})
+    def test_disabled_middleware_adds_nothing(self):
+        response = self.client.post("/start-game/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Query-Count", response)
+
+
+class SessionGameTests(TestCase):
+    """
+    Games belong to the browser session that started them (views.get_game). Another session cannot read or
+    play them, even with the game id.
+    """
+    def setUp(self):
+        load_cards()
+        self.game_id = json.loads(self.client.post("/start-game/").content)["new_game_id"]
+        self.deal = json.loads(self.client.post("/deal-hand/", {"game_id": self.game_id}).content)
+
+        # A second browser with a game of its own
+        self.other = self.client_class()
+        self.other.post("/start-game/")
+
+    def test_other_session_cannot_read_or_play_the_game(self):
+        order = [player["name"] for player in self.deal["player_order"]]
+        up_card = self.deal["remaining_cards"][0]
+        hands_before = Hand.objects.filter(game_id=self.game_id).count()
+        cards_before = sorted(PlayedCard.objects.filter(hand__game_id=self.game_id).values_list("player", "card"))
+
+        requests = [
+            ("get", "/get-game-score/", {}),
+            ("get", "/get-remaining-cards/", {}),
+            ("post", "/deal-hand/", {}),
+            ("post", "/deal-next-hand/", {}),
+            ("post", "/pick-trump/", {"dealer": self.deal["dealer"]}),
+            ("post", "/determine-trump/", {
+                "player": order[0], "trump_round": "1", "up_card": up_card, "player_order": json.dumps(self.deal["player_order"]),
+            }),
+            ("post", "/accept-trump/", {"trump_round": "1", "card": up_card}),
+            ("post", "/start-round/", {"trump_caller": order[0], "going_alone": "false"}),
+        ]
+        for method, url, data in requests:
+            with self.subTest(url):
+                response = getattr(self.other, method)(url, {"game_id": self.game_id, **data})
+                self.assertEqual(response.status_code, 404, response.content)
+
+        # Resetting its own games leaves this one alone
+        self.assertEqual(self.other.post("/reset-game/").status_code, 200)
+
+        game = Game.objects.get(id=self.game_id)
+        self.assertIsNone(game.trump_suit)
+        self.assertEqual(Hand.objects.filter(game=game).count(), hands_before)
+        self.assertEqual(sorted(PlayedCard.objects.filter(hand__game=game).values_list("player", "card")), cards_before)
+        self.assertFalse(GameResult.objects.filter(game=game).exists())
+
+    def test_owner_can_play_the_game(self):
+        response = self.client.get("/get-game-score/", {"game_id": self.game_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {"team1": 0, "team2": 0})
+
+    def test_no_game_is_not_found(self):
+        response = self.client_class().get("/get-game-score/")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EUCHRE_SAMPLING_BOT={"ENABLED": True, "MAX_SAMPLES": 2, "TIME_LIMIT": 1})
+class UpCardTests(TestCase):
+    """
+    accept_trump records the up card on the game and the search bot is told about it when the round is played
+    """
+    def setUp(self):
+        load_cards()
+        self.game_id = json.loads(self.client.post("/start-game/").content)["new_game_id"]
+        self.deal = json.loads(self.client.post("/deal-hand/", {"game_id": self.game_id}).content)
+        self.up_card = json.loads(self.client.post("/pick-trump/", {"game_id": self.game_id, "dealer": self.deal["dealer"]}).content)["current_card"]
+
+    def play_round(self):
+        """ Plays the round and returns the (up_card, dealer, picked_up) the search bot was given """
+        seen = set()
+        choose_card = SamplingStrategy.choose_card
+
+        def spy(strategy, *args):
+            seen.add((str(args[9]), args[10].name, args[11]))
+            return choose_card(strategy, *args)
+
+        trump_caller = self.deal["player_order"][0]["name"]
+        with mock.patch.object(SamplingStrategy, "choose_card", spy):
+            response = self.client.post("/start-round/", {"game_id": self.game_id, "trump_caller": trump_caller, "going_alone": "false"})
+        self.assertEqual(response.status_code, 200, response.content)
+        return seen
+
+    def test_ordered_up(self):
+        self.client.post("/accept-trump/", {"game_id": self.game_id, "trump_round": "1", "card": self.up_card})
+
+        game = Game.objects.get(id=self.game_id)
+        self.assertEqual(str(game.up_card), self.up_card)
+        self.assertTrue(game.up_card_picked_up)
+        self.assertEqual(self.play_round(), {(self.up_card, self.deal["dealer"], True)})
+
+    def test_turned_down(self):
+        suit = next(suit for suit in ["hearts", "diamonds", "clubs", "spades"] if not self.up_card.endswith(suit))
+        self.client.post("/accept-trump/", {"game_id": self.game_id, "trump_round": "2", "suit": suit})
+
+        game = Game.objects.get(id=self.game_id)
+        self.assertEqual(str(game.up_card), self.up_card)
+        self.assertFalse(game.up_card_picked_up)
+        self.assertEqual(self.play_round(), {(self.up_card, self.deal["dealer"], False)})
+
+
+class QueryPlanTests(TestCase):
+    """
+    Checks the hot game history lookups (query_plans.hot_queries) are answered from an index, so they
+    stay as fast with millions of hands and played cards as with a few.
+    """
+    def setUp(self):
+        cards = load_cards()
+
+        # Some history in other games, so the plans are not those of a single game
+        for session_key in ["a", "b", "c"]:
+            game = Game.objects.create(session_key=session_key)
+            seats = game.create_seats()
+            hands = Hand.objects.bulk_create([Hand(game=game, dealer=seats[i % 4]) for i in range(10)])
+            PlayedCard.objects.bulk_create([
+                PlayedCard(player=seats[i % 4], card=cards[i], hand=hand, order=i) for hand in hands for i in range(20)
+            ])
+
+        self.game = game
+        self.hand = hands[-1]
+        self.player = seats[0]
+
+        # The planner picks indexes from table statistics, which ANALYZE gathers
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in hot_queries(self.game, self.hand, self.player).items():
+            with self.subTest(name):
+                plan = query_plan(queryset)
+                self.assertTrue(plan)
+                self.assertEqual(table_scans(plan), [], plan)
+
+    def test_player_cards_use_hand_player_index(self):
+        plan = query_plan(PlayedCard.objects.filter(hand=self.hand, player=self.player))
+        self.assertIn("playedcard_hand_player_idx", " ".join(plan))
+
+    def test_table_scans(self):
+        self.assertEqual(table_scans(["SEARCH homepage_hand USING INDEX homepage_hand_game_id (game_id=?)"]), [])
+        self.assertEqual(len(table_scans(["SCAN homepage_playedcard"])), 1)
+        self.assertEqual(len(table_scans(["SCAN homepage_hand", "USE TEMP B-TREE FOR ORDER BY"])), 2)
+
+
+class RecordingBot(Bot):
+    """
+    Bot that writes down every trump call, discard and card it plays
+    """
+    def __init__(self, name, partner, team, decisions):
+        super().__init__(name, partner, team)
+        self.decisions_made = decisions
+
+    def determine_trump(self, hand, dealer, up_card, player_order, trump_round):
+        decision = super().determine_trump(hand, dealer, up_card, player_order, trump_round)
+        self.decisions_made.append((self.name, decision))
+        return decision
+
+    def discard(self, hand, trump_suit):
+        card = super().discard(hand, trump_suit)
+        self.decisions_made.append((self.name, str(card)))
+        return card
+
+    def determine_best_card(self, hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won):
+        card = super().determine_best_card(hand, trump_suit, played_cards, previous_tricks, trump_caller, going_alone, tricks_won)
+        self.decisions_made.append((self.name, str(card)))
+        return card
+
+
+class ObjectRulesBot(RecordingBot):
+    """
+    The BotLogic helpers as they were before card_engine, comparing Card objects and rank strings
+    """
+    @staticmethod
+    def object_rank(card, trump_suit, lead_suit=None):
+        if card.is_right_bower(trump_suit):
+            return 25
+        elif card.is_left_bower(trump_suit):
+            return 24
+        if card.suit == trump_suit:
+            return 15 + ["9", "10", "Q", "K", "A"].index(card.rank)
+        if card.suit == lead_suit:
+            return 6 + ["9", "10", "J", "Q", "K", "A"].index(card.rank)
+        return ["9", "10", "J", "Q", "K", "A"].index(card.rank)
+
+    def determine_trump(self, hand, dealer, up_card, player_order, trump_round):
+        # Straight to the rules, the shared decision cache was filled by the card_engine bots
+        decision = self.decide_trump(hand, dealer, up_card, player_order, trump_round)
+        self.decisions_made.append((self.name, decision))
+        return decision
+
+    def get_trump_cards(self, hand, trump_suit):
+        return [card for card in hand if card.suit == trump_suit or card.is_left_bower(trump_suit)]
+
+    def get_non_trump_cards(self, hand, trump_suit):
+        trump_cards = self.get_trump_cards(hand, trump_suit)
+        return [card for card in hand if card not in trump_cards]
+
+    def get_worst_card(self, hand, trump_suit):
+        trump_cards = self.get_trump_cards(hand, trump_suit)
+        non_trump_cards = [card for card in hand if card not in trump_cards]
+
+        if not non_trump_cards:
+            return min(trump_cards, key=lambda x: self.object_rank(x, trump_suit))
+
+        suit_counts = {}
+        for card in non_trump_cards:
+            suit_counts.setdefault(card.suit, []).append(card)
+
+        possible_voids = [cards[0] for cards in suit_counts.values() if len(cards) == 1 and cards[0].rank != "A"]
+        if possible_voids:
+            return min(possible_voids, key=lambda x: self.object_rank(x, trump_suit))
+
+        return min(non_trump_cards, key=lambda x: self.object_rank(x, trump_suit))
+
+
+class CardEngineTests(SimpleTestCase):
+    """
+    The BotLogic helpers run on card_engine's precomputed tables, and have to decide exactly what the
+    Card object comparisons they replaced did
+    """
+    suits = ["hearts", "diamonds", "clubs", "spades"]
+
+    def test_euchre_rank_matches_object_rank(self):
+        cards = [Card(*name.split(" of ")) for name in CARD_NAMES]
+        for trump_suit in self.suits:
+            for lead_suit in [None] + self.suits:
+                for card in cards:
+                    self.assertEqual(
+                        BotLogic.euchre_rank(card, trump_suit, lead_suit),
+                        ObjectRulesBot.object_rank(card, trump_suit, lead_suit),
+                        (str(card), trump_suit, lead_suit),
+                    )
+
+    def test_helpers_match_object_helpers(self):
+        rng = random.Random(1)
+        bot = MonteCarloSimulation().create_bots()[0]
+        reference = ObjectRulesBot("Bot 1", "Bot 3", 1, [])
+        for _ in range(2000):
+            hand = [Card(*name.split(" of ")) for name in rng.sample(CARD_NAMES, rng.choice([5, 6]))]
+            trump_suit = rng.choice(self.suits)
+            self.assertEqual(bot.get_trump_cards(hand, trump_suit), reference.get_trump_cards(hand, trump_suit))
+            self.assertEqual(bot.get_non_trump_cards(hand, trump_suit), reference.get_non_trump_cards(hand, trump_suit))
+            self.assertIs(bot.get_worst_card(hand, trump_suit), reference.get_worst_card(hand, trump_suit))
+
+    def play(self, bot_class, decks):
+        """ Plays the decks with four bot_class bots and returns every decision and each deal's points """
+        decisions = []
+        players = [
+            bot_class("Bot 1", "Bot 3", 1, decisions),
+            bot_class("Bot 2", "Bot 4", 2, decisions),
+            bot_class("Bot 3", "Bot 1", 1, decisions),
+            bot_class("Bot 4", "Bot 2", 2, decisions),
+        ]
+        simulation = MonteCarloSimulation()
+        counters = simulation.new_counters(players)
+        points = [simulation.simulate_deal(list(deck), players, counters) for deck in decks]
+        return decisions, points, counters
+
+    def test_same_decisions_as_object_rules(self):
+        simulation = MonteCarloSimulation()
+        rng = random.Random(2)
+        decks = [simulation.shuffled_deck(rng) for _ in range(300)]
+
+        self.assertEqual(self.play(RecordingBot, decks), self.play(ObjectRulesBot, decks))
+
+
+class BatchSimulationTests(SimpleTestCase):
+    """
+    BatchSimulation plays the same rules as MonteCarloSimulation.simulate_deal, so the same decks give the same results deal for deal
+    """
+    def test_same_results_as_simulate_deal(self):
+        batch = BatchSimulation()
+        decks = batch.deal(500, np.random.default_rng(3))
+        results = batch.simulate(decks)
+
+        simulation = MonteCarloSimulation()
+        players = simulation.create_bots()
+        names = [player.name for player in players]
+        counters = simulation.new_counters(players)
+        for i, deck in enumerate(decks):
+            points = simulation.simulate_deal([CARD_NAMES[card] for card in deck], players, counters)
+            self.assertEqual(points or (0, 0), (results["team1_points"][i], results["team2_points"][i]), i)
+            self.assertEqual(points is None, results["caller"][i] < 0, i)
+
+        self.assertEqual(batch.add_to_counters(results, simulation.new_counters(players), names), counters)
+
+
+class ParallelSimulationTests(SimpleTestCase):
+    """
+    run_parallel_simulation only depends on num_simulations, workers and seed, however the shards are scheduled
+    """
+    def run_parallel(self, seed):
+        with redirect_stdout(io.StringIO()):
+            return MonteCarloSimulation().run_parallel_simulation(400, workers=2, seed=seed)
+
+    def test_same_seed_same_results(self):
+        first, second = self.run_parallel(5), self.run_parallel(5)
+        self.assertEqual(first.counters, second.counters)
+        self.assertEqual(first.estimates, second.estimates)
+
+        # And the same as playing the two shards one after the other in this process
+        simulation = MonteCarloSimulation()
+        counters = simulation.new_counters(simulation.create_bots())
+        for shard in range(2):
+            simulation.merge_counters(counters, simulate_shard(200, f"5:{shard}")[0])
+        self.assertEqual(first.counters, counters)
+
+    def test_seed_changes_results(self):
+        self.assertNotEqual(self.run_parallel(5).counters, self.run_parallel(6).counters)
+
+
+class DealCodecTests(SimpleTestCase):
+    """
+    Every deal has one index from 0 to NUM_DEALS - 1 and back
+    """
+    def test_deals_round_trip(self):
+        rng = random.Random(7)
+        simulation = MonteCarloSimulation()
+        for _ in range(500):
+            deck = simulation.shuffled_deck(rng)
+            hands = [sum(CARD_BIT[card_from_name(name)] for name in deck[seat * 5:seat * 5 + 5]) for seat in range(4)]
+            up_card = card_from_name(deck[20])
+
+            index = rank_deal(hands, up_card)
+            self.assertEqual(rank_deck(deck), index)
+            self.assertEqual(unrank_deal(index), (hands, up_card))
+            self.assertEqual(rank_deck(deck_for_deal(index)), index)
+
+    def test_indexes_round_trip(self):
+        rng = random.Random(8)
+        for index in [0, 1, NUM_DEALS - 2, NUM_DEALS - 1] + [rng.randrange(NUM_DEALS) for _ in range(500)]:
+            deck = deck_for_deal(index)
+            self.assertEqual(sorted(deck), sorted(CARD_NAMES))
+            self.assertEqual(rank_deal(*unrank_deal(index)), index)
+            self.assertEqual(rank_deck(deck), index)
+
+    def test_invalid_deals(self):
+        for index in [-1, NUM_DEALS]:
+            with self.assertRaises(ValueError):
+                unrank_deal(index)
+
+        hands, up_card = unrank_deal(12345)
+        with self.assertRaises(ValueError):
+            rank_deal([hands[0], hands[0], hands[2], hands[3]], up_card)
+        with self.assertRaises(ValueError):
+            rank_deal(hands, (hands[0] & -hands[0]).bit_length() - 1)
+
+
+class DealIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "deals.bin")
+
+    def test_save_and_reopen(self):
+        fingerprints = [NUM_DEALS - 1, 0, 987654321, 42]
+        with DealIndex(self.path) as index:
+            for fingerprint in fingerprints[:2]:
+                self.assertTrue(index.add(fingerprint))
+            index.save()
+            for fingerprint in fingerprints[2:]:
+                self.assertTrue(index.add(fingerprint))
+            self.assertFalse(index.add(0))
+            self.assertFalse(index.add(42))
+            index.save()
+
+        with DealIndex(self.path) as index:
+            self.assertEqual(len(index), len(fingerprints))
+            for fingerprint in fingerprints:
+                self.assertIn(fingerprint, index)
+            self.assertNotIn(1, index)
+            self.assertNotIn(NUM_DEALS - 2, index)
+
+    def test_corrupt_file(self):
+        with DealIndex(self.path) as index:
+            index.add(42)
+            index.save()
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        for corrupt in [b"", data[:10], data[:-1], b"X" + data[1:]]:
+            with open(self.path, "wb") as f:
+                f.write(corrupt)
+            with self.subTest(corrupt=corrupt), self.assertRaises(ValueError):
+                DealIndex(self.path)
+
+
+def minimax(hands, trump, declaring, leader, trick):
+    """ Tricks the declaring side takes with best play, trying every legal card with no pruning """
+    num_seats = len(hands)
+    if len(trick) == num_seats:
+        ranks = RANK_TABLE[trump][EFFECTIVE_SUIT[trump][trick[0]]]
+        position = max(range(num_seats), key=lambda i: ranks[trick[i]])
+        winner = (leader + position) % num_seats
+        return declaring[winner] + minimax(hands, trump, declaring, winner, ())
+    if not trick and not any(hands):
+        return 0
+
+    seat = (leader + len(trick)) % num_seats
+    lead = EFFECTIVE_SUIT[trump][trick[0]] if trick else NO_LEAD
+    values = []
+    for card in cards_in_mask(legal_cards(hands[seat], trump, lead)):
+        rest = list(hands)
+        rest[seat] ^= CARD_BIT[card]
+        values.append(minimax(rest, trump, declaring, leader, trick + (card,)))
+    return max(values) if declaring[seat] else min(values)
+
+
+class DoubleDummySolverTests(SimpleTestCase):
+    """
+    The solver's pruning (alpha-beta, the transposition table, one card per run of touching cards) must not
+    change the answer, so it is checked against a plain minimax on small endings
+    """
+    def random_position(self, rng, num_seats, tricks):
+        """ (trump, declaring, hands, leader, trick) with `tricks` cards per hand, some or all of the first trick may be played """
+        cards = rng.sample(range(NUM_CARDS), num_seats * tricks)
+        hands = [sum(CARD_BIT[card] for card in cards[seat::num_seats]) for seat in range(num_seats)]
+        trump = rng.randrange(4)
+        declaring = [seat % 2 == 0 for seat in range(num_seats)] if num_seats == 4 else [True, False, False]
+        rng.shuffle(declaring)
+        leader = rng.randrange(num_seats)
+
+        trick = ()
+        for position in range(rng.randrange(num_seats + 1)):
+            seat = (leader + position) % num_seats
+            lead = EFFECTIVE_SUIT[trump][trick[0]] if trick else NO_LEAD
+            card = rng.choice(cards_in_mask(legal_cards(hands[seat], trump, lead)))
+            hands[seat] ^= CARD_BIT[card]
+            trick += (card,)
+        return trump, declaring, hands, leader, trick
+
+    def test_matches_minimax(self):
+        rng = random.Random(9)
+        for num_seats in (4, 3):
+            for tricks in (2, 3):
+                for _ in range(150):
+                    trump, declaring, hands, leader, trick = self.random_position(rng, num_seats, tricks)
+                    with self.subTest(trump=trump, declaring=declaring, hands=hands, leader=leader, trick=trick):
+                        expected = minimax(hands, trump, declaring, leader, trick)
+                        self.assertEqual(DoubleDummySolver(trump, declaring).solve(hands, leader, trick), expected)
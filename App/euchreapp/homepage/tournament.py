@@ -0,0 +1,212 @@
+"""
+Round-robin tournament between bot strategies (see strategies.py), to see whether a stronger but
+slower bot is worth its CPU time.
+
+Every pair of entrants plays a duplicate match (MonteCarloSimulation.play_duplicate_deal): the
+first entrant's strategy sits on team 1, the second's on team 2, and every deal is replayed with
+the hands and the deal rotated through every seat, so only the play separates them. A match is
+split into shards run on a process pool, each seeded from the master seed, the pair and the shard.
+
+A match result is the first entrant's average points margin per hand, with a two sided z test
+against a margin of 0. Since every pair is tested, the p-values are Holm corrected before a match
+counts as won or lost. Entrants are ranked by their average margin over all their matches, along
+with the milliseconds each of their decisions took.
+
+    python -m homepage.tournament
+"""
+import itertools
+import math
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .bot_simulations import MonteCarloSimulation
+from .hand_strength import use_hand_strength_table
+from .ismcts import ISMCTSStrategy
+from .pimc import SamplingStrategy
+from .simulation_stats import CONFIDENCE_Z, Estimate, RunningStat
+from .strategies import RuleStrategy, Strategy
+
+# Family-wise significance level for the match results
+SIGNIFICANCE = 0.05
+
+MatchResult = namedtuple("MatchResult", [
+    "first",  # entrant names, the margin is the first one's
+    "second",
+    "margin",  # Estimate of the first entrant's points margin per hand
+    "p_value",  # two sided, against no difference
+    "adjusted_p_value",  # Holm corrected over every match in the tournament
+])
+
+Standing = namedtuple("Standing", [
+    "name",
+    "margin",  # Estimate of the average points margin per hand over all of the entrant's matches
+    "wins",  # matches with a significant positive margin
+    "losses",  # matches with a significant negative margin
+    "ms_per_decision",  # average time for a trump call, discard or card play
+])
+
+
+class Tournament:
+    def __init__(self, entrants, deals_per_match=2000, shards_per_match=None, workers=None, seed=0):
+        """
+        entrants: {name: strategy}, every strategy has to be picklable to reach the worker processes
+        """
+        if len(entrants) < 2:
+            raise ValueError("A tournament needs at least two entrants")
+
+        self.entrants = entrants
+        self.deals_per_match = deals_per_match
+        self.workers = workers or os.cpu_count()
+        self.shards_per_match = shards_per_match or self.workers
+        self.seed = seed
+
+    def run(self):
+        """
+        Plays every match and returns (standings best first, match results), printing both
+        """
+        use_hand_strength_table()  # built here if missing, before the workers need it
+        pairs = list(itertools.combinations(self.entrants, 2))
+        shard_sizes = [
+            self.deals_per_match // self.shards_per_match + (1 if shard < self.deals_per_match % self.shards_per_match else 0)
+            for shard in range(self.shards_per_match)
+        ]
+
+        margins = {pair: RunningStat() for pair in pairs}
+        think_time = {name: 0.0 for name in self.entrants}
+        decisions = {name: 0 for name in self.entrants}
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                (pair, shard): executor.submit(
+                    play_match_shard, self.entrants[pair[0]], self.entrants[pair[1]], size, f"{self.seed}:{pair[0]}:{pair[1]}:{shard}"
+                )
+                for pair in pairs
+                for shard, size in enumerate(shard_sizes) if size
+            }
+
+            # Merged in a fixed order so the results only depend on the seed and the shard count
+            for (pair, shard), future in futures.items():
+                margin, timings = future.result()
+                margins[pair].merge(margin)
+                for name, (seconds, count) in zip(pair, timings):
+                    think_time[name] += seconds
+                    decisions[name] += count
+
+        matches = match_results(margins)
+        standings = self.standings(matches, think_time, decisions)
+        self.print_results(standings, matches)
+        return standings, matches
+
+    def standings(self, matches, think_time, decisions):
+        """
+        Entrants ranked by their average margin over their matches (the interval treats the matches as independent)
+        """
+        margins = {name: [] for name in self.entrants}
+        wins = {name: 0 for name in self.entrants}
+        losses = {name: 0 for name in self.entrants}
+
+        for match in matches:
+            margins[match.first].append((match.margin.value, match.margin.half_width / CONFIDENCE_Z))
+            margins[match.second].append((-match.margin.value, match.margin.half_width / CONFIDENCE_Z))
+            if match.adjusted_p_value < SIGNIFICANCE:
+                winner, loser = (match.first, match.second) if match.margin.value > 0 else (match.second, match.first)
+                wins[winner] += 1
+                losses[loser] += 1
+
+        standings = []
+        for name in self.entrants:
+            count = len(margins[name])
+            value = sum(margin for margin, _ in margins[name]) / count
+            half_width = CONFIDENCE_Z * math.sqrt(sum(error * error for _, error in margins[name])) / count
+            estimate = Estimate(value, value - half_width, value + half_width, half_width, count)
+            ms_per_decision = think_time[name] * 1000 / decisions[name] if decisions[name] else 0.0
+            standings.append(Standing(name, estimate, wins[name], losses[name], ms_per_decision))
+
+        return sorted(standings, key=lambda standing: standing.margin.value, reverse=True)
+
+    def print_results(self, standings, matches):
+        print(f"Round robin, {self.deals_per_match} duplicate deals per match:")
+        print(f"{'#':>2}  {'Entrant':<20} {'Margin':>8} {'95% CI':>19} {'W':>3} {'L':>3} {'ms/decision':>12}")
+        for rank, standing in enumerate(standings, 1):
+            margin = standing.margin
+            print(f"{rank:>2}  {standing.name:<20} {margin.value:>8.4f} {f'{margin.low:.4f} to {margin.high:.4f}':>19} "
+                  f"{standing.wins:>3} {standing.losses:>3} {standing.ms_per_decision:>12.3f}")
+
+        print("Matches (margin for the first entrant, p-values Holm corrected):")
+        for match in matches:
+            margin = match.margin
+            verdict = "significant" if match.adjusted_p_value < SIGNIFICANCE else "not significant"
+            print(f"{match.first} vs {match.second}: {margin.value:.4f} (95% CI {margin.low:.4f} to {margin.high:.4f}), "
+                  f"p = {match.p_value:.4f}, adjusted p = {match.adjusted_p_value:.4f}, {verdict}")
+
+
+def match_results(margins):
+    """
+    MatchResult for each pair's margins ({(first, second): RunningStat of per deal margins}), in the same order
+    """
+    estimates = {pair: margin.estimate(CONFIDENCE_Z) for pair, margin in margins.items()}
+    p_values = {pair: two_sided_p_value(margin) for pair, margin in margins.items()}
+    adjusted = holm_correction(p_values)
+    return [MatchResult(first, second, estimates[first, second], p_values[first, second], adjusted[first, second])
+            for first, second in margins]
+
+
+def two_sided_p_value(margin):
+    """
+    p-value of a z test of a RunningStat's mean against 0
+    """
+    if margin.count < 2:
+        return 1.0
+    standard_error = math.sqrt(margin.variance() / margin.count)
+    if standard_error == 0:
+        # Identical play on every deal
+        return 1.0 if margin.mean == 0 else 0.0
+    return math.erfc(abs(margin.mean) / standard_error / math.sqrt(2))
+
+
+def holm_correction(p_values):
+    """
+    Holm-Bonferroni adjusted p-values ({key: p-value} in and out), which keep the chance of any false positive
+    among all the tests at the significance level
+    """
+    ordered = sorted(p_values, key=lambda key: p_values[key])
+    adjusted = {}
+    running_max = 0.0
+    for i, key in enumerate(ordered):
+        running_max = max(running_max, min(1.0, (len(ordered) - i) * p_values[key]))
+        adjusted[key] = running_max
+    return adjusted
+
+
+def play_match_shard(first, second, num_deals, seed):
+    """
+    One shard of a match, runs in a worker process. Returns the RunningStat of first's margin per deal and
+    (seconds, decisions) spent by each strategy.
+    """
+    use_hand_strength_table()
+    simulation = MonteCarloSimulation()
+    players = simulation.create_bots([first, second, first, second])
+    counters = simulation.new_counters(players)
+    rng = random.Random(seed)
+
+    margin = RunningStat()
+    for _ in range(num_deals):
+        margin.add(simulation.play_duplicate_deal(simulation.shuffled_deck(rng), players, counters))
+
+    timings = []
+    for team in (1, 2):
+        bots = [player for player in players if player.team == team]
+        timings.append((sum(bot.think_time for bot in bots), sum(bot.decisions for bot in bots)))
+    return margin, timings
+
+
+if __name__ == "__main__":
+    tournament = Tournament({
+        "rules": Strategy(),
+        "cautious dealer": RuleStrategy({"round1.dealer.normal": 0.3, "round2.dealer.reverse.normal": 0.35}),
+        "sampling": SamplingStrategy(max_samples=16, time_limit=0.02),
+        "ismcts": ISMCTSStrategy(max_iterations=300, time_limit=0.05),
+    }, deals_per_match=200, seed=1)
+    tournament.run()
@@ -0,0 +1,141 @@
+"""
+Running record of the tricks played so far in a round.
+
+TrickHistory is the `previous_tricks` dict that BotLogic already receives (trick number ->
+list of PlayedCard), but every card is folded into bitmasks once, when its trick is stored.
+Boss card, "highest remaining", trump-led and void questions are then answered from the
+masks instead of rescanning every previous trick on every decision.
+"""
+from .card_engine import (
+    CARD_BIT, CARD_IDS, JACK, LEFT_BOWER, NUM_RANKS, NUM_SUITS, RANK_TABLE, RANKS,
+    RIGHT_BOWER, SUIT_INDEX, SUIT_MASK, SUITS, TRUMP_MASK, EFFECTIVE_SUIT, NO_LEAD, make_card, partner_suit
+)
+
+
+SUIT_BITS = (1 << NUM_RANKS) - 1
+
+# HIGHEST_UNSEEN_RANK[seen]: highest rank index (A down to 9) whose bit is not set in a 6 bit suit mask, None if all are seen
+HIGHEST_UNSEEN_RANK = [
+    next((rank for rank in reversed(range(NUM_RANKS)) if not seen >> rank & 1), None)
+    for seen in range(1 << NUM_RANKS)
+]
+
+# REMAINING_ORDER[trump][suit]: cards that follow `suit`, highest Euchre rank first
+REMAINING_ORDER = [
+    [
+        sorted(
+            (card for card in range(NUM_SUITS * NUM_RANKS) if EFFECTIVE_SUIT[trump][card] == suit),
+            key=lambda card, trump=trump: -RANK_TABLE[trump][NO_LEAD][card]
+        )
+        for suit in range(NUM_SUITS)
+    ]
+    for trump in range(NUM_SUITS)
+]
+
+
+class TrickHistory(dict):
+    def __init__(self, trump_suit=None, tricks=None):
+        super().__init__()
+        self.trump_suit = trump_suit
+        self.trump = SUIT_INDEX[trump_suit] if trump_suit else None
+
+        self.seen = 0  # Every card in a completed trick
+        self.led = 0  # Cards that led a completed trick
+        self.voids = {}  # Player name -> bitmask of suit indexes they have shown out of
+
+        for trick_number, played_cards in (tricks or {}).items():
+            self[trick_number] = played_cards
+
+    @classmethod
+    def of(cls, previous_tricks, trump_suit=None):
+        """
+        Returns previous_tricks as a TrickHistory, building one from a plain dict if needed
+        """
+        if isinstance(previous_tricks, cls):
+            return previous_tricks
+        return cls(trump_suit, previous_tricks)
+
+    def __setitem__(self, trick_number, played_cards):
+        if trick_number in self:
+            raise ValueError(f"Trick {trick_number} has already been recorded.")
+
+        super().__setitem__(trick_number, played_cards)
+
+        lead_suit = None
+        for position, played_card in enumerate(played_cards):
+            card_id = CARD_IDS[played_card.card.rank, played_card.card.suit]
+
+            if position == 0:
+                self.led |= CARD_BIT[card_id]
+                if self.trump is not None:
+                    lead_suit = EFFECTIVE_SUIT[self.trump][card_id]
+            elif lead_suit is not None and EFFECTIVE_SUIT[self.trump][card_id] != lead_suit:
+                # Did not follow suit, so the player has none left
+                name = played_card.player.name
+                self.voids[name] = self.voids.get(name, 0) | 1 << lead_suit
+
+            self.seen |= CARD_BIT[card_id]
+
+    def update(self, *args, **kwargs):
+        for trick_number, played_cards in dict(*args, **kwargs).items():
+            self[trick_number] = played_cards
+
+    def has_seen(self, card):
+        return bool(self.seen & CARD_BIT[CARD_IDS[card.rank, card.suit]])
+
+    def cards_seen_in_suit(self, suit):
+        """
+        Mask of played cards that follow the suit (the left bower counts as trump)
+        """
+        return self.seen & SUIT_MASK[self.trump][SUIT_INDEX[suit]]
+
+    def bowers_played(self):
+        """
+        (right bower played, left bower played)
+        """
+        return bool(self.seen & CARD_BIT[RIGHT_BOWER[self.trump]]), bool(self.seen & CARD_BIT[LEFT_BOWER[self.trump]])
+
+    def trump_led(self, trump_suit=None):
+        """
+        Whether any completed trick was led with a trump card
+        """
+        trump = SUIT_INDEX[trump_suit] if trump_suit else self.trump
+        return bool(self.led & TRUMP_MASK[trump])
+
+    def is_void(self, player_name, suit):
+        return bool(self.voids.get(player_name, 0) >> SUIT_INDEX[suit] & 1)
+
+    def boss_card(self, suit, is_trump=False):
+        """
+        Highest card remaining in the suit as (rank, suit), or (None, None) if all of its cards are gone.
+
+        Matches BotLogic.get_boss_card: off suits are ranked by their printed suit and for trump the
+        right bower, then the left bower, then the rest of the printed suit are checked.
+        """
+        suit_index = SUIT_INDEX[suit]
+        seen = self.seen >> suit_index * NUM_RANKS & SUIT_BITS
+
+        if is_trump:
+            if not seen >> JACK & 1:
+                return "J", suit
+            if not self.seen & CARD_BIT[make_card(JACK, partner_suit(suit_index))]:
+                return "J", SUITS[partner_suit(suit_index)]
+
+            # Both bowers have been played already
+            seen |= 1 << JACK
+
+        rank = HIGHEST_UNSEEN_RANK[seen]
+        if rank is None:
+            return None, None
+
+        return RANKS[rank], suit
+
+    def highest_remaining(self, suit, exclude=0):
+        """
+        Card id of the highest unplayed card that follows the suit (bowers included), skipping cards in the `exclude` mask
+        """
+        gone = self.seen | exclude
+        for card in REMAINING_ORDER[self.trump][SUIT_INDEX[suit]]:
+            if not gone & CARD_BIT[card]:
+                return card
+        return None
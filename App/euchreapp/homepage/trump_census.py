@@ -0,0 +1,107 @@
+"""
+Exact trump call rates from enumerating every hand instead of sampling deals.
+
+A seat's trump decision only depends on its 5 cards, the up card, its position and the round, so
+every combination can be decided once. Relabeling suits (see suit_symmetry.py) maps every up card
+onto a heart with the same decisions, so only the 6 hearts are walked as up cards, each with all
+C(23,5) = 33,649 hands from the other cards: 201,894 combinations per position and round, each
+standing for the same 4 real deals (one per up suit) and so equally likely.
+
+The dealer in round 1 is the exception. When two cards tie for the worst card the dealer discards
+the one that comes first in the hand, and relabeling suits changes which one that is, so every up
+card is walked for the dealer. Hands are held in card id order, while a simulated dealer holds them
+in the order dealt, so on those ties (about 1 hand in 6,000) a simulation can discard differently.
+
+The rates are what a seat would do if the bidding reached it, whatever the other seats hold. The
+Monte Carlo call rates (MonteCarloSimulation.run_simulation) only count a seat's call when every
+seat before it passed, so they agree for the first seat in round 1 and come out lower for the rest.
+
+    python -m homepage.trump_census
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from itertools import combinations
+
+from .bot_logic import BotLogic
+from .bot_simulations import Card, MonteCarloSimulation
+from .card_engine import CARD_NAMES, CARD_SUIT, NUM_CARDS, NUM_RANKS, SUIT_INDEX, partner_suit
+from .hand_strength import use_hand_strength_table
+from .strategies import apply_overrides
+
+POSITIONS = ["first", "second", "third", "dealer"]
+
+# Up cards walked, every other up suit is the same up to relabeling (hearts, card ids 0-5)
+UP_CARDS = list(range(NUM_RANKS))
+ALL_UP_CARDS = list(range(NUM_CARDS))
+
+
+class TrumpCensus:
+    def __init__(self, overrides=None):
+        """
+        overrides: threshold and weight overrides for the bots, named as in tuning.py
+        """
+        self.overrides = dict(overrides or {})
+
+    def run(self, rounds=("1", "2"), workers=None):
+        """
+        Decides every combination for every position in each round, split over worker processes, and returns
+        {metric: exact rate as a Fraction}, printing the rates
+        """
+        use_hand_strength_table()  # built here if missing, before the workers need it
+        tasks = [(trump_round, seat) for trump_round in rounds for seat in range(len(POSITIONS))]
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            counts = list(executor.map(census_shard, *zip(*tasks), [self.overrides] * len(tasks)))
+
+        rates = {}
+        for (trump_round, seat), (calls, loners, next_calls, total) in zip(tasks, counts):
+            position = POSITIONS[seat]
+            rates[f"round{trump_round}_call_rate:{position}"] = Fraction(calls, total)
+            rates[f"round{trump_round}_loner_rate:{position}"] = Fraction(loners, total)
+            if trump_round == "2":
+                # Calls for the suit of the same color as the up card, the rest are for the other two suits
+                rates[f"round2_next_rate:{position}"] = Fraction(next_calls, total)
+
+        self.print_results(rates)
+        return rates
+
+    def print_results(self, rates):
+        print("Exact trump call rates (what each seat calls when the bidding reaches it):")
+        for metric, rate in rates.items():
+            print(f"{metric}: {float(rate):.4%}")
+
+
+def census_shard(trump_round, seat, overrides=None):
+    """
+    (calls, loner calls, calls for the next suit, combinations) for one position in one round, runs in a worker process
+    """
+    use_hand_strength_table()
+    players = MonteCarloSimulation().create_bots()
+    bot, dealer = players[seat], players[3]
+    if overrides:
+        bot.TRUMP_THRESHOLDS, bot.STRATEGY_WEIGHTS = apply_overrides(overrides)
+
+    cards = [Card(*name.split(" of ")) for name in CARD_NAMES]
+    dealer_round1 = trump_round == "1" and bot is dealer
+
+    calls = loners = next_calls = total = 0
+    for up_card_id in (ALL_UP_CARDS if dealer_round1 else UP_CARDS):
+        up_card = cards[up_card_id]
+        next_suit = partner_suit(CARD_SUIT[up_card_id])
+        others = [cards[card_id] for card_id in range(NUM_CARDS) if card_id != up_card_id]
+
+        for hand in combinations(others, 5):
+            # decide_trump rather than determine_trump, every combination is new so the cache would only get in the way
+            decision, going_alone = BotLogic.decide_trump(bot, list(hand), dealer, up_card, players, trump_round)
+            total += 1
+            if decision != "pass":
+                calls += 1
+                loners += bool(going_alone)
+                next_calls += SUIT_INDEX[decision] == next_suit
+
+    return calls, loners, next_calls, total
+
+
+if __name__ == "__main__":
+    TrumpCensus().run()
@@ -0,0 +1,156 @@
+"""
+Parallel tuner for the BotLogic trump thresholds and strategy weights.
+
+A candidate configuration is a set of overrides on top of BotLogic.TRUMP_THRESHOLDS and
+BotLogic.STRATEGY_WEIGHTS. Parameters are named by their path in those dicts, with weights
+prefixed by "weights":
+
+    "round1.first.normal", "round2.dealer.reverse.loner", "weights.trump_cards", ...
+
+Every candidate plays the same deals (common random numbers), once with the candidate bots on
+team 1 against default bots and once with the teams swapped, using the NumPy BatchSimulation.
+Each deal gives one paired sample: the candidate team's points minus the default bots' points,
+averaged over both seatings. Default bots against default bots score a margin of exactly 0 on
+every deal, so this is the candidate's paired difference against the defaults. Candidates are
+ranked on its mean and confidence interval, and since every candidate has a margin for the same
+deals, two candidates are compared deal by deal too (gap_to_next). Candidates are spread over a
+process pool.
+
+    python -m homepage.tuning
+"""
+import itertools
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch_simulation import BatchSimulation
+from .bot_logic import BotLogic
+from .simulation_stats import CONFIDENCE_Z
+from .strategies import apply_overrides
+
+TuningResult = namedtuple("TuningResult", [
+    "overrides",  # {parameter: value} for the candidate
+    "margin_per_hand",  # average points per deal the candidate team scores more than the default bots
+    "confidence_interval",  # (low, high) for margin_per_hand
+    "gap_to_next",  # (low, high) for the paired difference in margin to the next ranked candidate, None for the last
+    "points_per_hand",  # average points the candidate team scores per deal
+    "opponent_points_per_hand",  # average points the default bots score against it
+    "num_deals",
+])
+
+
+def make_bot(overrides=None):
+    """
+    BotLogic with the overrides applied to copies of its thresholds and weights, the class defaults are left alone
+    """
+    bot = BotLogic()
+    bot.TRUMP_THRESHOLDS, bot.STRATEGY_WEIGHTS = apply_overrides(overrides or {})
+    return bot
+
+
+def candidate_configurations(parameter_ranges):
+    """
+    Every combination of the values in parameter_ranges ({parameter: [values]}), as override dicts
+    """
+    parameters = list(parameter_ranges)
+    return [dict(zip(parameters, values)) for values in itertools.product(*(parameter_ranges[p] for p in parameters))]
+
+
+def evaluate_candidate(overrides, num_deals, seed, batch_size=100000):
+    """
+    Plays num_deals deals twice, candidate on team 1 and then on team 2. Returns (margins, points sum, opponent
+    points sum), margins holding for each deal the candidate's points minus the default bots' points averaged
+    over both seatings.
+
+    The decks only depend on the seed, so every candidate evaluated with the same seed sees the same deals.
+    """
+    candidate, default = make_bot(overrides), make_bot()
+    as_team1 = BatchSimulation(bots=[candidate, default, candidate, default])
+    as_team2 = BatchSimulation(bots=[default, candidate, default, candidate])
+
+    rng = np.random.default_rng(seed)
+    margins = np.empty(num_deals, dtype=np.float32)  # multiples of 0.5, exact in float32
+    points_sum, opponent_sum = 0.0, 0.0
+
+    done = 0
+    while done < num_deals:
+        decks = as_team1.deal(min(batch_size, num_deals - done), rng)
+        first = as_team1.simulate(decks)
+        second = as_team2.simulate(decks)
+
+        # One paired sample per deal, the average over both seatings
+        points = (first["team1_points"] + second["team2_points"]) / 2
+        opponent_points = (first["team2_points"] + second["team1_points"]) / 2
+
+        margins[done:done + len(decks)] = points - opponent_points
+        points_sum += float(points.sum())
+        opponent_sum += float(opponent_points.sum())
+        done += len(decks)
+
+    return margins, points_sum, opponent_sum
+
+
+def mean_interval(samples):
+    """
+    (mean, (low, high)) of the samples with a normal CONFIDENCE_Z interval
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    mean = float(samples.mean())
+    margin = CONFIDENCE_Z * float(samples.std(ddof=1)) / math.sqrt(len(samples)) if len(samples) > 1 else math.inf
+    return mean, (mean - margin, mean + margin)
+
+
+def tune(parameter_ranges, num_deals=100000, seed=0, workers=None):
+    """
+    Evaluates every candidate in parameter_ranges on the same deals and returns TuningResults, best margin over
+    the default bots first
+    """
+    candidates = candidate_configurations(parameter_ranges)
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(candidates))) as executor:
+        evaluated = list(executor.map(
+            evaluate_candidate, candidates, itertools.repeat(num_deals), itertools.repeat(seed)
+        ))
+
+    ranked = sorted(zip(candidates, evaluated), key=lambda pair: float(pair[1][0].mean()), reverse=True)
+
+    results = []
+    for rank, (overrides, (margins, points_sum, opponent_sum)) in enumerate(ranked):
+        margin, interval = mean_interval(margins)
+        gap = mean_interval(margins - ranked[rank + 1][1][0])[1] if rank + 1 < len(ranked) else None
+        results.append(TuningResult(
+            overrides=overrides,
+            margin_per_hand=margin,
+            confidence_interval=interval,
+            gap_to_next=gap,
+            points_per_hand=points_sum / num_deals,
+            opponent_points_per_hand=opponent_sum / num_deals,
+            num_deals=num_deals,
+        ))
+    return results
+
+
+def print_tuning_results(results, top=10):
+    print(f"Top {min(top, len(results))} of {len(results)} configurations after {results[0].num_deals} deals each:")
+    for result in results[:top]:
+        low, high = result.confidence_interval
+        settings = ", ".join(f"{parameter}={value}" for parameter, value in result.overrides.items())
+        print(f"  {result.margin_per_hand:+.4f} points per hand over the defaults (95% CI {low:+.4f} to {high:+.4f}, "
+              f"scoring {result.points_per_hand:.4f} against {result.opponent_points_per_hand:.4f}): {settings}")
+        if result.gap_to_next is not None:
+            low, high = result.gap_to_next
+            verdict = "better than" if low > 0 else "not significantly better than"
+            print(f"      {verdict} the next (95% CI of the paired difference {low:+.4f} to {high:+.4f})")
+
+
+if __name__ == "__main__":
+    results = tune({
+        "round1.first.normal": [0.30, 0.33, 0.36],
+        "round1.dealer.normal": [0.23, 0.26, 0.29],
+        "weights.trump_cards": [0.65, 0.7, 0.75],
+    }, num_deals=200000)
+    print_tuning_results(results)
@@ -13,6 +13,6 @@ urlpatterns = [
     # path('play-card/', views.play_human_card, name='play_card'), # Player plays card
     path('get-game-score/', views.get_game_score, name='get_game_score'),  # Update game score at end of round
     path('get-remaining-cards/', views.get_remaining_cards, name='get_remaining_cards'),
-    path('play-next-trick/', views.play_next_trick, name='play_next_trick'),
     path('determine-trump/', views.determine_bot_trump_decision, name='determine_trump'),
+    path('metrics', views.metrics, name='metrics'),  # Prometheus metrics, when EUCHRE_METRICS is enabled
 ]
\ No newline at end of file
@@ -2,12 +2,33 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.contrib.auth.views import LoginView
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.db import transaction
+from django.db.models import Count
 from django.views.decorators.csrf import csrf_exempt
 from random import shuffle
-from .models import start_euchre_round, Game, Player, Card, deal_hand as model_deal_hand, PlayedCard, reset_round_state, Hand, GameResult, rotate_dealer
+from .metrics import metrics_enabled, registry, timer
+from .query_budget import query_budget
+from .card_registry import all_cards, card_by_name, get_card
+from .models import start_euchre_round, get_ismcts_strategy, Game, Player, deal_hand as model_deal_hand, PlayedCard, reset_round_state, Hand, GameResult, rotate_dealer
 import json
 
+
+def get_game(request):
+    """
+    The game this browser session is playing: game_id from the request if it is one of the session's games,
+    otherwise the last game the session started. Raises Game.DoesNotExist for any other game.
+    """
+    game_id = request.POST.get("game_id") or request.GET.get("game_id") or request.session.get("game_id")
+    if not game_id or not request.session.session_key:
+        raise Game.DoesNotExist("No active game found. Please start a new game first.")
+    return Game.objects.select_related('dealer').get(id=game_id, session_key=request.session.session_key)
+
+
+def game_not_found():
+    """ Response for a request without a game of this session, see get_game """
+    return JsonResponse({"error": "No active game found. Please start a new game first."}, status=404)
+
 # Render the homepage
 def home(request):
     return render(request, "home.html")  # Reference the template in the root templates directory
@@ -39,14 +60,19 @@ class CustomLoginView(LoginView):
         # Redirect regular users to the default redirect URL
         return super().get_success_url()
 
+@query_budget(12)
 @csrf_exempt
 def start_new_game(request):
     if request.method == 'POST':
         try:
             print("🔥 Starting a new game while keeping previous data...")
 
-            # Step 1: Mark the last game as completed if unfinished
-            last_game = Game.objects.order_by('-id').first()
+            # Games belong to the browser session that started them, so make sure it has a session key
+            if not request.session.session_key:
+                request.session.save()
+
+            # Step 1: Mark this session's last game as completed if unfinished
+            last_game = Game.objects.filter(session_key=request.session.session_key).order_by('-id').first()
             if last_game and not GameResult.objects.filter(game=last_game).exists():
                 GameResult.objects.create(
                     game=last_game,
@@ -56,32 +82,15 @@ def start_new_game(request):
                 )
                 print(f"✅ Archived last game: {last_game.id}")
 
-            # Step 2: Create a new game
-            game = Game.objects.create()
-
-            # Step 3: Reset only the deck for this game
-            print("♠️ Creating a fresh deck for the new game...")
-            suits = ["hearts", "diamonds", "clubs", "spades"]
-            ranks = ["9", "10", "J", "Q", "K", "A"]
+            # Step 2: Create a new game with its own four players
+            game = Game.objects.create(session_key=request.session.session_key)
+            players = game.create_seats()
+            request.session["game_id"] = game.id
 
-            # Only create cards that are not already in the database
-            existing_cards = {(card.rank, card.suit) for card in Card.objects.all()}
-            new_cards = []
-
-            for suit in suits:
-                for rank in ranks:
-                    if (rank, suit) not in existing_cards:
-                        new_cards.append(Card(suit=suit, rank=rank, is_trump=False))
-
-            # Bulk create to speed up performance
-            Card.objects.bulk_create(new_cards)
-            print(f"✅ {len(new_cards)} new cards created for the game.")
-
-            # Step 4: Shuffle and assign dealer
-            deck = list(Card.objects.all())
+            # Step 3: Shuffle and assign dealer (the cards are seeded by a migration, see card_registry.py)
+            deck = all_cards()
             shuffle(deck)
 
-            players = Player.objects.all()
             if len(deck) < len(players):
                 return JsonResponse({"error": "Not enough cards to determine dealer."}, status=400)
 
@@ -99,17 +108,17 @@ def start_new_game(request):
             game.dealer = dealer
             game.save()
 
-            # Step 5: Return cards to deck & shuffle
+            # Step 4: Return cards to deck & shuffle
             deck.extend(dealt_cards.values())
             shuffle(deck)
 
-            # Step 6: Deal hands
+            # Step 5: Deal hands
             hands = {player: [deck.pop() for _ in range(5)] for player in players}
 
-            # Step 7: Prepare remaining cards for trump selection
+            # Step 6: Prepare remaining cards for trump selection
             remaining_cards = deck[:4] if len(deck) >= 4 else []
 
-            # Step 8: Send response
+            # Step 7: Send response
             return JsonResponse({
                 "hands": {player.name: [f"{card.rank} of {card.suit}" for card in hand] for player, hand in hands.items()},
                 "dealt_cards": {player.name: f"{card.rank} of {card.suit}" for player, card in dealt_cards.items()},
@@ -127,6 +136,7 @@ def start_new_game(request):
     return JsonResponse({"error": "Invalid request method."}, status=400)
 
 
+@query_budget(12)
 @csrf_exempt
 def deal_next_hand(request):
     """
@@ -137,8 +147,8 @@ def deal_next_hand(request):
     """
     if request.method == "POST":
         try:
-            # Retrieve the latest game
-            game = Game.objects.latest('id')
+            # Retrieve the session's game
+            game = get_game(request)
 
             # Reset round state (This already rotates the dealer)
             deck = reset_round_state(game)
@@ -150,7 +160,7 @@ def deal_next_hand(request):
             print(f"✅ New dealer assigned: {new_dealer.name}")
 
             # Get all players and cards
-            players = Player.objects.all()
+            players = game.seats()
             
             # Calculate player order starting to the left of the new dealer
             player_list = list(players)
@@ -180,6 +190,8 @@ def deal_next_hand(request):
 
             return JsonResponse(response)
 
+        except Game.DoesNotExist:
+            return game_not_found()
         except Exception as e:
             print(f"🚨 Error in deal_next_hand: {str(e)}")
             return JsonResponse({"error": str(e)}, status=500)
@@ -189,23 +201,24 @@ def deal_next_hand(request):
 
 
 
+@query_budget(8)
 @csrf_exempt
 def deal_hand(request):
     if request.method == "POST":
         try:
             print("📢 deal_hand() function was called!")
 
-            # Ensure game is initialized or fetch the latest game
+            # Ensure game is initialized or fetch the session's game
             try:
-                game = Game.objects.latest('id')
+                game = get_game(request)
             except Game.DoesNotExist:
-                return JsonResponse({"error": "No active game found. Please start a new game first."}, status=400)
+                return game_not_found()
 
             # Shuffle the deck
-            deck = list(Card.objects.all())
+            deck = all_cards()
             shuffle(deck)
 
-            players = Player.objects.all()
+            players = game.seats()
 
             # Calculate player order starting to the left of the dealer
             player_list = list(players)
@@ -254,37 +267,39 @@ def deal_hand(request):
 
 
 
+@query_budget(6)
 @csrf_exempt
 def pick_trump(request):
     if request.method == "POST":
         try:
             dealer_name = request.POST.get("dealer")
-            players = Player.objects.all()
+            game = get_game(request)
+            players = game.seats()
 
-            # Fetch the remaining cards in their current order
-            remaining_cards = list(Card.objects.filter(is_trump=False)[:4])  # Fetch 4 cards as a list
+            # The remaining cards are the ones not dealt in the game's latest hand
+            latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
+            dealt_cards = set(PlayedCard.objects.filter(hand=latest_hand).values_list('card', flat=True)) if latest_hand else set()
+            remaining_cards = kitty(dealt_cards)  # Fetch 4 cards as a list
             if not remaining_cards:
                 raise ValueError("No remaining cards in the deck for trump selection.")
 
             # Remove the top card for the next round if rejected
             current_card = remaining_cards.pop(0)  # Get and remove the first card
             player_order = list(players)
-            dealer = Player.objects.get(name=dealer_name)
+            dealer = next(player for player in players if player.name == dealer_name)
 
             # Rotate the player order to start with the player left of the dealer
             start_index = (player_order.index(dealer) + 1) % len(player_order)
             player_order = player_order[start_index:] + player_order[:start_index]
 
-            # Update the deck
-            remaining_cards_queryset = Card.objects.filter(pk__in=[card.pk for card in remaining_cards])
-            Card.objects.exclude(pk__in=remaining_cards_queryset).update(is_trump=False)
-
             # Return the current card and player order for frontend logic
             response = {
                 "current_card": f"{current_card.rank} of {current_card.suit}",
                 "player_order": [player.name for player in player_order],
             }
             return JsonResponse(response)
+        except Game.DoesNotExist:
+            return game_not_found()
         except Exception as e:
             print(f"Error in pick_trump: {str(e)}")
             return JsonResponse({"error": str(e)}, status=500)
@@ -292,6 +307,34 @@ def pick_trump(request):
     return JsonResponse({"error": "Invalid request method."}, status=400)
 
 
+def kitty(dealt_cards):
+    """
+    The 4 cards not dealt to a player (dealt_cards: card ids), the first is the one turned up for trump
+    """
+    return [card for card in all_cards() if card.id not in dealt_cards][:4]
+
+
+def current_hands(hand, players):
+    """
+    {player id: list of Cards} for the players' cards in a hand, in one query
+    """
+    hands = {player.id: [] for player in players}
+    for player_id, card_id in PlayedCard.objects.filter(hand=hand, player__in=players).order_by('id').values_list('player', 'card'):
+        hands[player_id].append(get_card(card_id))
+    return hands
+
+
+def replace_hand(player, hand, cards):
+    """
+    Replaces a player's cards in a hand with cards, saved in the given order. Call it inside a transaction.
+    """
+    PlayedCard.objects.filter(player=player, hand=hand).delete()
+    PlayedCard.objects.bulk_create([
+        PlayedCard(player=player, card=card, hand=hand, order=i + 1) for i, card in enumerate(cards)
+    ])
+
+
+@query_budget(12)
 @csrf_exempt
 def accept_trump(request):
     if request.method == "POST":
@@ -301,11 +344,11 @@ def accept_trump(request):
             if not trump_round:
                 return JsonResponse({"error": "Missing trump round data."}, status=400)
 
-            # Fetch latest game
+            # Fetch the session's game
             try:
-                game = Game.objects.latest('id')
+                game = get_game(request)
             except Game.DoesNotExist:
-                return JsonResponse({"error": "No active game found. Please start a game first."}, status=400)
+                return game_not_found()
 
             # Fetch latest hand
             latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
@@ -329,15 +372,14 @@ def accept_trump(request):
                 
                 # Fetch card
                 try:
-                    card = Card.objects.get(rank=rank, suit=suit)
-                except Card.DoesNotExist:
+                    card = card_by_name(card_info)
+                except KeyError:
                     return JsonResponse({"error": f"Card '{card_info}' does not exist."}, status=400)
 
-                # Get player's current hand
-                dealer_played_cards = PlayedCard.objects.filter(player=game.dealer, hand=latest_hand)
-
-                # Convert to list of Cards for dealer_pickup
-                dealer_hand = [played_card.card for played_card in dealer_played_cards]
+                # Get the dealer's and the human player's current hands, as lists of Cards for dealer_pickup
+                player = game.players.get(is_human=True)
+                hands = current_hands(latest_hand, [game.dealer, player])
+                dealer_hand = hands[game.dealer.id]
 
                 dealer_hand.append(card)
                 
@@ -345,52 +387,25 @@ def accept_trump(request):
                 discarded_card = game.dealer.get_worst_card(dealer_hand, card.suit)
                 dealer_hand.remove(discarded_card)
 
-                dealer_played_cards.delete()
-
-                if game.dealer.is_human:
-                    dealer_hand = sort_hand(dealer_hand, suit)
-
-                for i, card in enumerate(dealer_hand):
-                    PlayedCard.objects.create(
-                        player=game.dealer,
-                        card=card,
-                        hand=latest_hand,
-                        order=i + 1  # Ensure correct order
-                    )
-
-                if not game.dealer.is_human:
-                    player = Player.objects.get(is_human=True)
-                    player_cards = PlayedCard.objects.filter(player=player, hand=latest_hand)
-                    player_hand = [played_card.card for played_card in player_cards]
-                    sorted_player_hand = sort_hand(player_hand, suit)
-
-                    player_cards.delete()
-
-                    for i, card in enumerate(sorted_player_hand):
-                        PlayedCard.objects.create(
-                            player=player,
-                            card=card,
-                            hand=latest_hand,
-                            order=i + 1
-                        )
-
-                # Retrieve updated hand
-                if game.dealer.is_human:
-                    updated_hand = [
-                        f"{pc.card.rank} of {pc.card.suit}"
-                        for pc in PlayedCard.objects.filter(player=game.dealer, hand=latest_hand)
-                    ]
-                else:
-                    updated_hand = [
-                        f"{pc.card.rank} of {pc.card.suit}"
-                        for pc in PlayedCard.objects.filter(player=player, hand=latest_hand)
-                    ]
+                with transaction.atomic():
+                    if game.dealer.is_human:
+                        updated_hand = sort_hand(dealer_hand, suit)
+                        replace_hand(game.dealer, latest_hand, updated_hand)
+                    else:
+                        replace_hand(game.dealer, latest_hand, dealer_hand)
+                        updated_hand = sort_hand(hands[player.id], suit)
+                        replace_hand(player, latest_hand, updated_hand)
+
+                    # Update the game's trump suit, the dealer picked up the up card
+                    game.trump_suit = suit
+                    game.up_card = card
+                    game.up_card_picked_up = True
+                    game.save()
+
+                # The human's updated hand, in the order just saved
+                updated_hand = [f"{card.rank} of {card.suit}" for card in updated_hand]
                 print(f"Updated hand: {updated_hand}")
 
-                # Update the game's trump suit
-                game.trump_suit = suit
-                game.save()
-
                 return JsonResponse({
                     "trump_suit": suit,
                     "updated_hand": updated_hand,
@@ -404,31 +419,26 @@ def accept_trump(request):
                 if not suit:
                     return JsonResponse({"error": "Missing suit data."}, status=400)
                 
-                player = Player.objects.get(is_human=True)
-                player_cards = PlayedCard.objects.filter(player=player, hand=latest_hand)
-                player_hand = [played_card.card for played_card in player_cards]
+                player = game.players.get(is_human=True)
+
+                # Every dealt card, for the human's hand and the turned down up card (the first card of the kitty)
+                dealt_cards = list(PlayedCard.objects.filter(hand=latest_hand).order_by('id').values_list('player', 'card'))
+                player_hand = [get_card(card_id) for player_id, card_id in dealt_cards if player_id == player.id]
                 sorted_player_hand = sort_hand(player_hand, suit)
+                turned_down = kitty({card_id for _, card_id in dealt_cards})
 
-                player_cards.delete()
-
-                for i, card in enumerate(sorted_player_hand):
-                    PlayedCard.objects.create(
-                        player=player,
-                        card=card,
-                        hand=latest_hand,
-                        order=i + 1
-                    )
-
-                # Retrieve updated hand
-                updated_hand = [
-                    f"{pc.card.rank} of {pc.card.suit}"
-                    for pc in PlayedCard.objects.filter(player=player, hand=latest_hand)
-                ]
-                print(f"Updated hand: {updated_hand}")
+                with transaction.atomic():
+                    replace_hand(player, latest_hand, sorted_player_hand)
+
+                    # Update the game's trump suit, the up card was turned down
+                    game.trump_suit = suit
+                    game.up_card = turned_down[0] if turned_down else None
+                    game.up_card_picked_up = False
+                    game.save()
 
-                # Update the game's trump suit
-                game.trump_suit = suit
-                game.save()
+                # The updated hand, in the order just saved
+                updated_hand = [f"{card.rank} of {card.suit}" for card in sorted_player_hand]
+                print(f"Updated hand: {updated_hand}")
                 
                 return JsonResponse({
                     "trump_suit": suit,
@@ -445,34 +455,33 @@ def accept_trump(request):
 
 
 
+@query_budget(12)
 @csrf_exempt
 def reset_game(request):
     if request.method == "POST":
         try:
+            # Only this session's games are reset, other tables keep playing
+            session_games = Game.objects.filter(session_key=request.session.session_key) if request.session.session_key else Game.objects.none()
+
             # Archive past games instead of deleting them
-            for game in Game.objects.all():
-                if not GameResult.objects.filter(game=game).exists():
-                    GameResult.objects.create(
-                        game=game,
-                        winner=None,  # If game was unfinished, set winner as None
-                        total_hands=game.hands.count(),
-                        points={"team1": game.team1_points, "team2": game.team2_points}
-                    )
+            # (one query for the games without a result and their hand counts, however many games there are)
+            unarchived_games = session_games.filter(gameresult__isnull=True).annotate(hand_count=Count('hands'))
+            GameResult.objects.bulk_create([
+                GameResult(
+                    game=game,
+                    winner=None,  # If game was unfinished, set winner as None
+                    total_hands=game.hand_count,
+                    points={"team1": game.team1_points, "team2": game.team2_points}
+                )
+                for game in unarchived_games
+            ])
 
             # Clear played cards and active hands
-            PlayedCard.objects.all().delete()  
-            Hand.objects.all().delete()        
+            PlayedCard.objects.filter(hand__game__in=session_games).delete()
+            Hand.objects.filter(game__in=session_games).delete()
 
             # Reset ongoing games (instead of deleting, clear fields)
-            Game.objects.all().update(dealer=None, trump_suit="", team1_points=0, team2_points=0)
-
-            # 🔥 Ensure the deck is fully recreated
-            Card.objects.all().delete()  # Ensure no duplicate cards remain
-
-            # Create a fresh deck of unique cards
-            for suit, _ in Card.SUITS:
-                for rank, _ in Card.RANKS:
-                    Card.objects.create(suit=suit, rank=rank, is_trump=False)
+            session_games.update(dealer=None, trump_suit="", team1_points=0, team2_points=0, up_card=None, up_card_picked_up=False)
 
             return JsonResponse({"message": "Game reset successfully and archived."})
 
@@ -483,6 +492,7 @@ def reset_game(request):
 
 
 
+@query_budget(12)
 @csrf_exempt
 def start_round(request):
     """
@@ -490,53 +500,22 @@ def start_round(request):
     """
     if request.method == "POST":
         try:
-            game = Game.objects.latest('id')
+            game = get_game(request)
             trump_caller_name = request.POST.get("trump_caller")
             going_alone = request.POST.get("going_alone") == "true"
 
             try:
-                trump_caller = Player.objects.get(name=trump_caller_name)
+                trump_caller = game.players.get(name=trump_caller_name)
             except Player.DoesNotExist:
                 return JsonResponse({"error": f"Player '{trump_caller_name}' does not exist."}, status=400)
 
-            # Ensure a previous hand exists in the game
-            if not game.hands.exists():
-                return JsonResponse({"error": "No previous round found. Cannot start a new round."}, status=400)
-
-            # Step 1: Retrieve all players
-            players = Player.objects.all()
-            player_hands = {player: [] for player in players}
-
-            # Step 2: Get the latest hand for the game
-            latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
-            if not latest_hand:
-                return JsonResponse({"error": "No hand found for the current game!"}, status=400)
-
-            # Step 3: Fetch PlayedCards only for this hand and these players
-            unplayed_cards = PlayedCard.objects.filter(hand=latest_hand, player__in=players)
-
-            # Debugging output
-            print(f"Before starting round, total PlayedCards: {unplayed_cards.count()}")
-
-            # Step 4: Assign cards to player_hands
-            for played_card in unplayed_cards:
-                player_hands[played_card.player].append(played_card.card)
-
-            # Debugging: Check card assignments
-            for player, cards in player_hands.items():
-                print(f"{player.name} has {len(cards)} cards AFTER retrieval.")
-
-            # Ensure all players have enough cards before starting the round
-            for player in players:
-                player_cards = player_hands[player]
-                if len(player_cards) < 5:
-                    return JsonResponse({"error": f"{player.name} has {len(player_cards)} cards instead of 5!"}, status=500)
-
-            # Step 5: Play the entire round (all 5 tricks)
+            # Play the entire round (all 5 tricks). RoundEngine loads the latest hand once and checks every player has 5 cards
             round_result = start_euchre_round(game, trump_caller, going_alone)  # Plays **all 5 tricks**
             
             return round_result  # Returns JSON with full round data
 
+        except Game.DoesNotExist:
+            return game_not_found()
         except Exception as e:
             print(f"Error in start_round: {str(e)}")
             return JsonResponse({"error": f"Internal Server Error: {str(e)}"}, status=500)
@@ -544,75 +523,61 @@ def start_round(request):
     return JsonResponse({'error': 'Invalid request method'}, status=400)
 
 
+@query_budget(3)
 @csrf_exempt
 def get_game_score(request):
     """
     Returns the current game score.
     """
     try:
-        game = Game.objects.latest('id')
+        game = get_game(request)
         return JsonResponse({
             "team1": game.team1_points,
             "team2": game.team2_points
         })
     except Game.DoesNotExist:
-        return JsonResponse({"error": "No active game found."}, status=400)
+        return game_not_found()
     
+@query_budget(7)
 @csrf_exempt
 def get_remaining_cards(request):
     """
     Returns a list of all remaining (unplayed) cards in the current round.
     """
     try:
-        game = Game.objects.latest('id')
+        game = get_game(request)
         latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
 
         if not latest_hand:
             return JsonResponse({"error": "No active round found."}, status=400)
 
         # Get all played cards in this round
-        played_cards = PlayedCard.objects.filter(hand__game=game).values_list('card', flat=True)
+        played_cards = set(PlayedCard.objects.filter(hand__game=game).values_list('card', flat=True))
 
         # Get all cards that haven't been played, excluding the Player's hand
-        player = Player.objects.get(name="Player")  # Adjust if Player's name differs
-        player_hand = PlayedCard.objects.filter(player=player, hand=latest_hand).values_list('card', flat=True)
+        player = game.players.get(name="Player")  # Adjust if Player's name differs
+        player_hand = set(PlayedCard.objects.filter(player=player, hand=latest_hand).values_list('card', flat=True))
 
-        remaining_cards = Card.objects.exclude(id__in=played_cards).exclude(id__in=player_hand)
+        remaining_cards = [card for card in all_cards() if card.id not in played_cards and card.id not in player_hand]
 
         remaining_cards_list = [f"{card.rank} of {card.suit}" for card in remaining_cards]
 
         return JsonResponse({"remaining_cards": remaining_cards_list})
 
+    except Game.DoesNotExist:
+        return game_not_found()
     except Exception as e:
         print(f"Error in get_remaining_cards: {str(e)}")
         return JsonResponse({"error": f"Internal Server Error: {str(e)}"}, status=500)
 
     
-@csrf_exempt
-def play_next_trick(request):
-    """
-    Plays the next trick and returns its result.
-    """
-    if request.method == "POST":
-        try:
-            game = Game.objects.latest('id')
-
-            # Play the next trick
-            response = start_euchre_round(game)
-
-            return response  # Returns JSON containing trick details
-
-        except Exception as e:
-            return JsonResponse({"error": f"Internal Server Error: {str(e)}"}, status=500)
-
-    return JsonResponse({'error': 'Invalid request method'}, status=400)
-
+@query_budget(7)
 @csrf_exempt
 def determine_bot_trump_decision(request):
     if request.method == "POST":
         try:
-            # Fetch the latest game
-            game = Game.objects.latest('id')
+            # Fetch the session's game
+            game = get_game(request)
 
             # Fetch the player
             bot_name = request.POST.get("player")
@@ -621,7 +586,7 @@ def determine_bot_trump_decision(request):
             trump_round = request.POST.get("trump_round")
 
             try:
-                bot = Player.objects.get(name=bot_name)
+                bot = game.players.get(name=bot_name)
             except Player.DoesNotExist:
                 return JsonResponse({"error": f"Player '{bot_name}' does not exist."}, status=400)
             
@@ -629,25 +594,41 @@ def determine_bot_trump_decision(request):
             latest_hand = Hand.objects.filter(game=game).order_by('-id').first()
 
             bot_hand_played_cards = PlayedCard.objects.filter(player=bot, hand=latest_hand)
-            bot_hand = [played_card.card for played_card in bot_hand_played_cards]
+            bot_hand = [get_card(played_card.card_id) for played_card in bot_hand_played_cards]
 
             # Fetch the up card
             up_card_string = request.POST.get("up_card")
-            up_card_rank, up_card_suit = up_card_string.split(" of ")
-            up_card = Card.objects.get(rank=up_card_rank, suit=up_card_suit)
+            up_card = card_by_name(up_card_string)
 
             # Fetch the player order
             player_order_data = json.loads(request.POST.get("player_order"))
-            player_order = [Player.objects.get(name=player['name']) for player in player_order_data]
-
-            # Determine the trump decision
-            trump_decision, going_alone = bot.determine_trump(bot_hand, game.dealer, up_card, player_order, trump_round)
+            players_by_name = {player.name: player for player in game.seats()}
+            player_order = [players_by_name[player['name']] for player in player_order_data]
+
+            # Determine the trump decision, with the ISMCTS bot if it is turned on in settings
+            search_bot = get_ismcts_strategy()
+            if search_bot:
+                with timer("euchre_bot_decision_seconds", decision="trump", bot="ismcts"):
+                    trump_decision, going_alone = search_bot.choose_trump(bot, bot_hand, game.dealer, up_card, player_order, trump_round)
+            else:
+                with timer("euchre_bot_decision_seconds", decision="trump", bot="rules"):
+                    trump_decision, going_alone = bot.determine_trump(bot_hand, game.dealer, up_card, player_order, trump_round)
 
             return JsonResponse({"decision": trump_decision, "going_alone": going_alone})
 
+        except Game.DoesNotExist:
+            return game_not_found()
         except Exception as e:
             return JsonResponse({"error": f"Internal Server Error: {str(e)}"}, status=500)
         
+def metrics(request):
+    """
+    Bot and view latency metrics in the Prometheus text format, see metrics.py
+    """
+    if not metrics_enabled():
+        return HttpResponse("Metrics are turned off", status=404, content_type="text/plain")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 def sort_hand(hand, trump_suit=None):
     """
     Sorts a list of Cards based on their suits and ranks
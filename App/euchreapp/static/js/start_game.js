@@ -5,6 +5,7 @@ $(document).ready(function () {
     let trumpSelected = false;
     let gameResponse = null;
     let kitty = [] // Store the global response object here
+    let gameId = null; // This browser's game, sent with every request so the server uses its own rows
 
     // Reset Current Trump and Game Score on Page Load
     $("#current-trump").text("None");
@@ -171,7 +172,7 @@ $(document).ready(function () {
     }    
 
     function acceptTrump(player, card, trumpRound, goingAlone) {
-        const data = { trump_round: trumpRound};
+        const data = { trump_round: trumpRound, game_id: gameId };
 
         if (trumpRound === 1) {
             if (gameResponse.remaining_cards.includes(card)) {
@@ -318,6 +319,7 @@ $(document).ready(function () {
             url: "/determine-trump/",
             type: "POST",
             data: {
+                game_id: gameId,
                 player: player,
                 dealer: dealer,
                 up_card: upCard,
@@ -428,6 +430,7 @@ $(document).ready(function () {
             url: "/start-game/", // Matches the URL in urls.py
             type: "POST",
             success: function (response) {
+                gameId = response.new_game_id;
                 console.log("New dealer is:", response.dealer); // Debugging log
             
                 // ✅ Ensure dealer is highlighted and icon is added on first round
@@ -469,7 +472,7 @@ $(document).ready(function () {
         $.ajax({
             url: "/deal-hand/",
             type: "POST",
-            data: { dealer: dealer },
+            data: { dealer: dealer, game_id: gameId },
             success: function (response) {
                 gameResponse = response;
                 playerOrder = response.player_order;
@@ -702,7 +705,7 @@ $(document).ready(function () {
         $.ajax({
             url: "/start-round/",
             type: "POST",
-            data: { trump_caller: trumpCaller, going_alone: goingAlone },
+            data: { trump_caller: trumpCaller, going_alone: goingAlone, game_id: gameId },
             success: function (response) {
                 console.log("✅ Round Results Received:", response);
 
@@ -744,6 +747,7 @@ $(document).ready(function () {
         $.ajax({
             url: "/deal-next-hand/",  // Redeal hands and rotate dealer
             type: "POST",
+            data: { game_id: gameId },
             success: function (response) {
 
                 gameResponse = response;
@@ -832,6 +836,7 @@ $(document).ready(function () {
         $.ajax({
             url: "/reset-game/",  // Reset the game state
             type: "POST",
+            data: { game_id: gameId },
             success: function (response) {
                 console.log(response.message);
                 // Reset Current Trump and Game Score on Page Load
@@ -902,6 +907,7 @@ $(document).ready(function () {
         $.ajax({
             url: "/get-remaining-cards/",
             type: "GET",
+            data: { game_id: gameId },
             success: function (response) {
                 if (response.remaining_cards) {
                     // Filter out used cards